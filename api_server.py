@@ -0,0 +1,348 @@
+"""Servidor HTTP/JSON opcional sobre os serviços de estoque, vendas e relatórios.
+
+Outros sistemas (feed de estoque do site, financeiro) consultam por aqui em vez
+de abrir vehicle_management.db diretamente. O servidor é um processo à parte,
+com asyncio: as leituras rodam num conjunto fixo de conexões somente leitura
+(uma por thread do pool) e as vendas numa única conexão de escrita, em
+transações curtas de SalesService (a mesma baixa atômica de estoque da tela de
+vendas). Assim o servidor segura o lock de escrita no máximo por uma venda de
+cada vez e os terminais desktop só esperam dentro do busy_timeout.
+
+Rotas (respostas em JSON, valores monetários em centavos):
+    GET  /api/health
+    GET  /api/vehicles?limit=100&after=CURSOR          veículos à venda
+    GET  /api/vehicles/ID
+    POST /api/sales        {"vehicle_id", "customer_id", "seller_id", "final_price_cents"}
+    GET  /api/reports/sales?from=AAAA-MM-DD&to=AAAA-MM-DD&limit=100&after=CURSOR
+    GET  /api/reports/sales-summary?from=AAAA-MM-DD&to=AAAA-MM-DD
+    GET  /api/reports/low-stock?threshold=5&limit=100&after=CURSOR
+
+As listas são paginadas por chave: a resposta traz {"items": [...], "next": ...}
+e "next" (null na última página) é passado em "after" para buscar a seguinte.
+
+Uso:
+    python api_server.py [--host 127.0.0.1] [--port 8080] [--db vehicle_management.db] [--readers 4]
+"""
+import argparse
+import asyncio
+import base64
+import json
+import logging
+import re
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from urllib.parse import parse_qs, urlsplit
+
+from database import DB_PATH, connect
+from migrations import migrate, prune_change_log
+from services import REPORT_PAGE_SIZE, InventoryService, OutOfStockError, ReportService, SalesService
+from validation import ValidationError
+
+logger = logging.getLogger(__name__)
+
+# Conexões somente leitura (threads) atendendo as consultas
+DEFAULT_READERS = 4
+# Itens por página: padrão e máximo aceito em "limit"
+DEFAULT_PAGE_SIZE = REPORT_PAGE_SIZE
+MAX_PAGE_SIZE = 1000
+# Tamanho máximo do corpo de uma requisição
+MAX_BODY_BYTES = 64 * 1024
+# Conexões HTTP ociosas são fechadas após este tempo
+IDLE_TIMEOUT_S = 30
+
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           409: "Conflict", 413: "Payload Too Large", 422: "Unprocessable Entity", 500: "Internal Server Error",
+           503: "Service Unavailable"}
+
+
+class ApiError(Exception):
+    """Erro devolvido ao cliente com o status HTTP e a mensagem."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ConnectionPool:
+    """Conexões do servidor: N leitoras (uma por thread) e uma de escrita, numa thread própria.
+
+    read(func, ...) e write(func, ...) executam func(conn, ...) na thread da
+    conexão e devolvem o resultado ao loop do asyncio. As escritas ficam em
+    fila na única thread de escrita, sem disputar o lock entre si.
+    """
+
+    def __init__(self, path=DB_PATH, readers=DEFAULT_READERS):
+        self.path = path
+        self._local = threading.local()
+        self._readers = ThreadPoolExecutor(readers, "api-leitura", initializer=self._open, initargs=(True,))
+        self._writer = ThreadPoolExecutor(1, "api-escrita", initializer=self._open, initargs=(False,))
+
+    def _open(self, read_only):
+        self._local.conn = connect(self.path, read_only=read_only)
+
+    def _call(self, func, args):
+        return func(self._local.conn, *args)
+
+    async def read(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._readers, self._call, func, args)
+
+    async def write(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._writer, self._call, func, args)
+
+    def close(self):
+        # As conexões pertencem às threads do pool e são fechadas com o processo
+        self._readers.shutdown(wait=True)
+        self._writer.shutdown(wait=True)
+
+
+# --- PARÂMETROS ---
+
+def encode_cursor(key):
+    """Chave da última linha da página, opaca para o cliente."""
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(text, types):
+    """Chave de encode_cursor; types são os tipos das colunas da chave (int ou str), na ordem."""
+    if not text:
+        return None
+    try:
+        key = json.loads(base64.urlsafe_b64decode(text.encode("ascii")))
+    except ValueError:
+        raise ApiError(400, "Parâmetro 'after' inválido.")
+    # type() e não isinstance: true/false (bool é subclasse de int) não valem como chave inteira
+    if not isinstance(key, list) or len(key) != len(types) or any(type(value) is not kind for value, kind in zip(key, types)):
+        raise ApiError(400, "Parâmetro 'after' inválido.")
+    return tuple(key)
+
+
+def int_param(query, name, default, minimum=0, maximum=None):
+    value = query.get(name, default)
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise ApiError(400, f"Parâmetro '{name}' deve ser um número inteiro.")
+    if value < minimum or (maximum is not None and value > maximum):
+        raise ApiError(400, f"Parâmetro '{name}' fora do intervalo permitido.")
+    return value
+
+
+def date_range(query):
+    """Período (from, to) em AAAA-MM-DD; padrão: do dia 1º do mês até hoje."""
+    today = datetime.now()
+    try:
+        start = datetime.strptime(query.get("from") or today.strftime("%Y-%m-01"), "%Y-%m-%d")
+        end = datetime.strptime(query.get("to") or today.strftime("%Y-%m-%d"), "%Y-%m-%d")
+    except ValueError:
+        raise ApiError(400, "Formato de data inválido. Use AAAA-MM-DD.")
+    return start, end
+
+
+def page(items, key, limit):
+    """Resposta de uma lista paginada; next só existe se a página veio cheia."""
+    return {
+        "items": [item._asdict() for item in items],
+        "next": encode_cursor(key(items[-1])) if len(items) == limit else None,
+    }
+
+
+# --- ROTAS ---
+
+async def health(pool, query, body):
+    return 200, {"status": "ok"}
+
+
+async def list_vehicles(pool, query, body):
+    limit = int_param(query, "limit", DEFAULT_PAGE_SIZE, 1, MAX_PAGE_SIZE)
+    after = decode_cursor(query.get("after"), (str, str, int))
+    vehicles = await pool.read(lambda conn: InventoryService(conn).available_page(after, limit))
+    return 200, page(vehicles, lambda v: (v.make, v.model, v.id), limit)
+
+
+async def get_vehicle(pool, query, body, vehicle_id):
+    vehicle = await pool.read(lambda conn: InventoryService(conn).get(int(vehicle_id)))
+    if vehicle is None:
+        raise ApiError(404, "Veículo não encontrado.")
+    return 200, vehicle._asdict()
+
+
+async def register_sale(pool, query, body):
+    fields = ("vehicle_id", "customer_id", "seller_id", "final_price_cents")
+    try:
+        data = json.loads(body or b"{}")
+        args = [data[name] for name in fields]
+    except (ValueError, TypeError, KeyError):
+        raise ApiError(400, "Informe vehicle_id, customer_id, seller_id e final_price_cents (inteiros).")
+    # Só inteiros JSON: 1.9 não vira 1 e true/false (bool é subclasse de int) não valem como id ou preço
+    invalid = [name for name, value in zip(fields, args) if not isinstance(value, int) or isinstance(value, bool)]
+    if invalid:
+        raise ApiError(422, f"Valores não inteiros em: {', '.join(invalid)}.")
+    try:
+        receipt = await pool.write(lambda conn: SalesService(conn).register_sale(*args))
+    except OutOfStockError as e:
+        raise ApiError(409, str(e))
+    except ValidationError as e:
+        raise ApiError(422, str(e))
+    return 201, receipt._asdict()
+
+
+async def sales_report(pool, query, body):
+    start, end = date_range(query)
+    limit = int_param(query, "limit", DEFAULT_PAGE_SIZE, 1, MAX_PAGE_SIZE)
+    after = decode_cursor(query.get("after"), (int, int))
+    # Do início do dia inicial ao fim do dia final
+    start_ts = int(start.timestamp())
+    end_ts = int((end + timedelta(days=1)).timestamp()) - 1
+    sales = await pool.read(lambda conn: ReportService(conn).sales_page(start_ts, end_ts, after, limit))
+    return 200, page(sales, lambda s: (s.sale_ts, s.id), limit)
+
+
+async def sales_summary(pool, query, body):
+    start, end = date_range(query)
+    start_day, end_day = int(start.strftime("%Y%m%d")), int(end.strftime("%Y%m%d"))
+    totals = await pool.read(lambda conn: ReportService(conn).daily_totals(start_day, end_day))
+    return 200, {"items": [total._asdict() for total in totals]}
+
+
+async def low_stock(pool, query, body):
+    threshold = int_param(query, "threshold", 5)
+    limit = int_param(query, "limit", DEFAULT_PAGE_SIZE, 1, MAX_PAGE_SIZE)
+    after = decode_cursor(query.get("after"), (int, int))
+    vehicles = await pool.read(lambda conn: ReportService(conn).low_stock_page(threshold, after, limit))
+    return 200, page(vehicles, lambda v: (v.stock, v.id), limit)
+
+
+# (método, padrão do caminho) -> rota; grupos do padrão viram argumentos
+ROUTES = [
+    ("GET", re.compile(r"/api/health"), health),
+    ("GET", re.compile(r"/api/vehicles"), list_vehicles),
+    ("GET", re.compile(r"/api/vehicles/(\d+)"), get_vehicle),
+    ("POST", re.compile(r"/api/sales"), register_sale),
+    ("GET", re.compile(r"/api/reports/sales"), sales_report),
+    ("GET", re.compile(r"/api/reports/sales-summary"), sales_summary),
+    ("GET", re.compile(r"/api/reports/low-stock"), low_stock),
+]
+
+
+class ApiServer:
+    """Servidor HTTP/1.1 (com keep-alive) que despacha as requisições para ROUTES."""
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def dispatch(self, method, target, body):
+        """Executa a rota e retorna (status, objeto JSON)."""
+        url = urlsplit(target)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        allowed = False
+        for route_method, pattern, handler in ROUTES:
+            match = pattern.fullmatch(url.path)
+            if match is None:
+                continue
+            if route_method != method:
+                allowed = True
+                continue
+            try:
+                return await handler(self.pool, query, body, *match.groups())
+            except ApiError as e:
+                return e.status, {"error": str(e)}
+            except sqlite3.OperationalError:
+                # Lock não liberado dentro do busy_timeout: o cliente pode tentar de novo.
+                # Como no 500, o texto da exceção fica só no log
+                logger.warning("Banco ocupado ao atender %s %s", method, url.path, exc_info=True)
+                return 503, {"error": "Banco de dados ocupado; tente novamente."}
+            except Exception:
+                # O detalhe fica no log do servidor; o cliente não vê texto de exceção interna
+                logger.exception("Erro ao atender %s %s", method, url.path)
+                return 500, {"error": "Erro interno do servidor."}
+        if allowed:
+            return 405, {"error": "Método não permitido."}
+        return 404, {"error": "Rota não encontrada."}
+
+    async def handle(self, reader, writer):
+        """Atende as requisições de uma conexão até o cliente fechá-la (ou ficar ocioso)."""
+        try:
+            while True:
+                request_line = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT_S)
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length") or 0)
+                if length > MAX_BODY_BYTES:
+                    self.respond(writer, 413, {"error": "Corpo da requisição muito grande."}, keep_alive=False)
+                    await writer.drain()
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                status, payload = await self.dispatch(method, target, body)
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                self.respond(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+            # Espera o transporte fechar, para as conexões keep-alive não se acumularem abertas
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+
+    @staticmethod
+    def respond(writer, status, payload, keep_alive):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + data
+        )
+
+
+async def serve(path=DB_PATH, host="127.0.0.1", port=8080, readers=DEFAULT_READERS, ready=None):
+    """Aplica as migrações, limpa o change_log e atende até ser cancelado; ready(porta) é chamado ao começar a escutar."""
+    pool = ConnectionPool(path, readers)
+    try:
+        await pool.write(migrate)
+        await pool.write(prune_change_log)
+        api = ApiServer(pool)
+        server = await asyncio.start_server(api.handle, host, port)
+        if ready is not None:
+            ready(server.sockets[0].getsockname()[1])
+        async with server:
+            await server.serve_forever()
+    finally:
+        pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=DB_PATH, help="arquivo do banco (padrão: %(default)s)")
+    parser.add_argument("--host", default="127.0.0.1", help="endereço de escuta (padrão: %(default)s)")
+    parser.add_argument("--port", type=int, default=8080, help="porta (padrão: %(default)s; 0 escolhe uma livre)")
+    parser.add_argument("--readers", type=int, default=DEFAULT_READERS, help="conexões de leitura (padrão: %(default)s)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    try:
+        asyncio.run(serve(
+            args.db, args.host, args.port, args.readers,
+            ready=lambda port: print(f"API escutando em http://{args.host}:{port}/api/health", flush=True)
+        ))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
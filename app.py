@@ -1,48 +1,127 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import sqlite3
-from datetime import datetime
-import hashlib
-
-try:
-    import pandas as pd
-except ImportError:
-    pd = None
-
-# Dependências para Gráficos
-try:
-    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
-    import matplotlib.pyplot as plt
-    plt.style.use('ggplot')
-except ImportError:
-    FigureCanvasTkAgg = None 
-    NavigationToolbar2Tk = None
-    plt = None
-
-
-# --- FUNÇÃO DE HASHING PARA SENHAS ---
-
-def hash_password(password):
-    """Gera um hash SHA256 para a senha com um salt simples."""
-    # Usar um salt constante para simplificar a demonstração no ambiente Tkinter/SQLite
-    salt = "loja_veiculos_salt"
-    hashed = hashlib.sha256((password + salt).encode('utf-8')).hexdigest()
-    return hashed
+import threading
+from datetime import datetime, timedelta
+from bisect import bisect_left, insort
+
+from catalog import get_catalog
+from database import DB_PATH, connect, get_connection_manager
+from migrations import prune_change_log, table_versions
+from rollups import parse_day_key
+from query_executor import QueryExecutor
+from search import ENTITY_LABELS, search
+from services import (
+    INVENTORY_PAGE_SIZE, MAKES_LISTING, MODELS_LISTING, SALES_HISTORY_PAGE_SIZE, SALES_LISTING, USERS_LISTING,
+    AnalyticsFilter, CartLine, DuplicateError, InventoryService, OutOfStockError, PeopleService, ReportService, SalesService, UserService,
+    fetch_changes, fetch_page,
+)
+from widgets import SearchEntry
+from exports import EXPORT_FORMATS, export_rows, missing_dependency, preload_export_dependencies
+from imports import IMPORT_FORMATS, default_rejects_path, import_file, missing_dependency as missing_import_dependency
+from validation import ValidationError, parse_money
+
+# --- DEPENDÊNCIAS PESADAS (CARREGADAS SOB DEMANDA) ---
+# matplotlib (gráficos) e openpyxl/pyarrow (exportação) só são importados no primeiro uso,
+# ou antes, numa thread em segundo plano logo após o primeiro login (ver SessionManager.start_session)
+
+# Atraso entre a abertura da janela e o pré-carregamento em segundo plano
+PREWARM_DELAY_MS = 1500
+
+_chart_backend = None
+_chart_backend_lock = threading.Lock()
+
+
+def load_chart_backend():
+    """(AnalyticsChart, FigureCanvasTkAgg, NavigationToolbar2Tk), importados uma única vez; None sem matplotlib."""
+    global _chart_backend
+    with _chart_backend_lock:
+        if _chart_backend is None:
+            try:
+                from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+                from charts import AnalyticsChart
+            except ImportError:
+                _chart_backend = False
+            else:
+                _chart_backend = (AnalyticsChart, FigureCanvasTkAgg, NavigationToolbar2Tk)
+        return _chart_backend or None
+
+
+def prewarm_imports():
+    """Importa as dependências pesadas (gráficos e exportação) para o primeiro uso não esperar por elas."""
+    load_chart_backend()
+    preload_export_dependencies()
+
+
+# --- VALORES MONETÁRIOS (CENTAVOS INTEIROS) ---
+
+def format_money(cents):
+    """Formata centavos no padrão exibido pela aplicação ('R$ 48000.50')."""
+    reais, centavos = divmod(cents, 100)
+    return f"R$ {reais}.{centavos:02d}"
+
+# --- PAGINAÇÃO DAS LISTAS (ESTOQUE E HISTÓRICO DE VENDAS) ---
+
+# Fração da rolagem a partir da qual a próxima página é carregada
+PAGE_PREFETCH_AT = 0.9
+
+# Quantidade de resultados exibidos na Busca Geral
+GLOBAL_SEARCH_LIMIT = 50
+
+# --- FORMATAÇÃO DAS LISTAS ---
+# Registros de services.py formatados para as Treeviews (também medidos por benchmarks/run.py)
+
+def format_inventory_row(vehicle, threshold):
+    """Valores e tag de um veículo na Treeview do estoque."""
+    vid, make, model, manuf_year, model_year, color, price, stock, is_active, sale_date = vehicle
+    price_formatted = format_money(price)
+    
+    # ATUALIZADO: Renomeia o status
+    if is_active:
+        status = "Disponível" 
+        display_sale_date = ""
+    else:
+        status = "Vendido"
+        display_sale_date = sale_date if sale_date else "N/A"
+    
+    # Tags para cor
+    tag = 'low_stock' if stock < threshold and is_active else 'inactive' if not is_active else ''
+    return (vid, make, model, manuf_year, model_year, color, price_formatted, stock, status, display_sale_date), tag
+
+def format_person_row(person):
+    """Formata uma linha de Vendedor/Cliente (valores e tags) para a Treeview."""
+    pid, name, phone, email, is_active = person
+    status = "Ativo" if is_active else "Inativo"
+    tag = 'inactive' if not is_active else ''
+    return (pid, name, phone, email, status), (tag,)
+
+def format_sale_row(sale):
+    """Formata uma linha do histórico de vendas para a Treeview."""
+    sid, sale_ts, vehicle_info, customer_name, seller_name, final_price, quantity = sale
+    date_f = datetime.fromtimestamp(sale_ts).strftime("%Y-%m-%d")
+    # Itens de carrinho guardam o preço de cada unidade; a lista mostra o total da linha
+    price_f = format_money(final_price * quantity)
+    return (date_f, vehicle_info, customer_name, seller_name, quantity, price_f), ()
+
+# --- ANÁLISE GRÁFICA ---
+
+# Granularidades do gráfico de vendas: rótulo na tela -> chave de ANALYTICS_PERIODS (services.py)
+ANALYTICS_GRANULARITIES = {"Dia": "day", "Semana": "week", "Mês": "month", "Trimestre": "quarter"}
+ALL_MAKES = "Todas"
 
 # --- JANELA DE LOGIN ---
 
 class LoginWindow:
-    def __init__(self, master):
+    def __init__(self, master, users, on_login):
+        """Tela de login dentro de master; on_login(usuário) é chamado quando a senha confere."""
         self.master = master
-        self.conn = sqlite3.connect('vehicle_management.db')
-        self.cursor = self.conn.cursor()
+        self.users = users
+        self.on_login = on_login
 
-        # Garante que as tabelas (incluindo 'users') e o Admin inicial existam
-        self.setup_db()
-        
-        self.master.title("Login - Sistema de Gestão")
-        self.master.geometry("600x600")
-        self.master.resizable(False, False)
+        window = master.winfo_toplevel()
+        window.title("Login - Sistema de Gestão")
+        window.geometry("600x600")
+        window.resizable(False, False)
 
         # Configuração do Frame
         login_frame = ttk.Frame(master, padding="20")
@@ -66,36 +145,6 @@ class LoginWindow:
         # Botão de Login
         ttk.Button(login_frame, text="Login", command=self.authenticate).pack(pady=15)
 
-    def setup_db(self):
-        """Cria a tabela de usuários e insere o admin padrão."""
-        try:
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS users (
-                    id INTEGER PRIMARY KEY,
-                    username TEXT UNIQUE NOT NULL,
-                    hashed_password TEXT NOT NULL,
-                    role TEXT NOT NULL,
-                    name TEXT
-                )
-            """)
-            
-            # Insere o Admin padrão se não existir
-            admin_username = 'admin'
-            admin_password_hash = hash_password('admin')
-            
-            self.cursor.execute("SELECT COUNT(*) FROM users WHERE username=?", (admin_username,))
-            if self.cursor.fetchone()[0] == 0:
-                self.cursor.execute(
-                    "INSERT INTO users (username, hashed_password, role, name) VALUES (?, ?, ?, ?)",
-                    (admin_username, admin_password_hash, 'Admin', 'Administrador Principal')
-                )
-                self.conn.commit()
-                messagebox.showinfo("Configuração Inicial", "Perfil de Admin criado: user='admin', senha='admin'.")
-            
-        except sqlite3.Error as e:
-            messagebox.showerror("Erro de DB", f"Falha ao criar tabela de usuários: {e}")
-
-
     def authenticate(self):
         """Tenta autenticar o usuário e abre a aplicação principal."""
         username = self.username_entry.get().strip()
@@ -105,26 +154,11 @@ class LoginWindow:
             messagebox.showwarning("Erro de Login", "Preencha usuário e senha.")
             return
 
-        hashed_input = hash_password(password)
-        
-        self.cursor.execute(
-            "SELECT id, role, name, hashed_password FROM users WHERE username = ?", 
-            (username,)
-        )
-        user_record = self.cursor.fetchone()
-
-        if user_record and user_record[3] == hashed_input:
-            user_id = user_record[0]
-            role = user_record[1]
-            user_name = user_record[2]
-            
-            self.master.destroy() 
-            
-            # Abre a aplicação principal
-            root = tk.Tk()
-            app = VehicleStoreApp(root, user_id, role, user_name)
-            root.mainloop()
+        user = self.users.authenticate(username, password)
 
+        if user is not None:
+            # A troca de tela destrói este frame; nada mais é feito aqui depois
+            self.on_login(user)
         else:
             messagebox.showerror("Erro de Login", "Usuário ou senha inválidos.")
 
@@ -132,20 +166,36 @@ class LoginWindow:
 # --- CLASSE PRINCIPAL DA APLICAÇÃO ---
 
 class VehicleStoreApp:
-    def __init__(self, master, user_id, role, user_name):
-        """Inicializa a aplicação, configura o DB e a interface."""
+    def __init__(self, master, user_id, role, user_name, session):
+        """Monta a aplicação do usuário logado dentro de master (frame da sessão, ver SessionManager)."""
         self.master = master
+        self.session = session
         self.current_user_id = user_id
         self.current_role = role
         self.current_user_name = user_name
         
-        master.title(f"Sistema de Gestão de Vendas de Veículos - Logado como: {user_name} ({role})")
-        master.geometry("1150x700")
+        window = master.winfo_toplevel()
+        window.title(f"Sistema de Gestão de Vendas de Veículos - Logado como: {user_name} ({role})")
+        window.geometry("1150x700")
+        window.resizable(True, True)
         
         # --- Configuração do Banco de Dados SQLite ---
-        self.conn = sqlite3.connect('vehicle_management.db')
-        self.cursor = self.conn.cursor()
-        self.create_tables() # Garante que as tabelas de dados existam
+        # Conexão de escrita e thread de consultas vêm da sessão e são as mesmas em todos os logins;
+        # as leituras pesadas (listas, relatórios, gráficos) rodam na thread, com conexão própria (WAL)
+        db = session.db
+        self.conn = db.writer
+        self.db_path = db.path
+        self.catalog = get_catalog(db.path)
+        # Todo o SQL fica nos serviços (services.py); as abas só leem widgets e exibem resultados
+        self.inventory = InventoryService(self.conn, self.catalog)
+        self.customers = PeopleService("customers", self.conn)
+        self.sellers = PeopleService("sellers", self.conn)
+        self.sales = SalesService(self.conn)
+        self.users = UserService(self.conn)
+        self.queries = session.queries
+        self.queries.on_status = self.update_query_status
+        self.long_jobs = session.long_jobs
+        self.long_jobs.on_status = self.update_long_job_status
 
         # --- Variáveis de Estado ---
         self.report_type = tk.StringVar(value="Estoque")
@@ -166,6 +216,7 @@ class VehicleStoreApp:
         self.sales_frame = ttk.Frame(self.notebook, padding="10")
         self.reports_frame = ttk.Frame(self.notebook, padding="10") 
         self.analytics_frame = ttk.Frame(self.notebook, padding="10")
+        self.search_frame = ttk.Frame(self.notebook, padding="10")
         self.admin_frame = ttk.Frame(self.notebook, padding="10") # NOVA ABA ADMIN
 
         # Adiciona as Abas
@@ -176,114 +227,330 @@ class VehicleStoreApp:
         self.notebook.add(self.sales_frame, text="5. Gestão de Vendas")
         self.notebook.add(self.reports_frame, text="6. Relatórios") 
         self.notebook.add(self.analytics_frame, text="7. Análise Gráfica")
+        self.notebook.add(self.search_frame, text="8. Busca Geral")
 
         # Adiciona a aba de Admin SOMENTE se o usuário for 'Admin'
         if self.current_role == 'Admin':
-            self.notebook.add(self.admin_frame, text="8. Gestão de Usuários (Admin)")
-        
-        # Constrói o conteúdo de cada aba
-        self.setup_parameters_tab(self.params_frame)
-        self.setup_seller_tab(self.seller_frame)
-        self.setup_inventory_tab(self.inventory_frame)
-        self.setup_customer_tab(self.customer_frame)
-        self.setup_sales_tab(self.sales_frame)
-        self.setup_reports_tab(self.reports_frame)
-        self.setup_analytics_tab(self.analytics_frame)
+            self.notebook.add(self.admin_frame, text="9. Gestão de Usuários (Admin)")
+        
+        # O conteúdo de cada aba só é montado (e carregado) na primeira vez que ela é selecionada;
+        # chave: caminho do frame, como devolvido por notebook.select()
+        self.tab_builders = {
+            str(self.params_frame): self.setup_parameters_tab,
+            str(self.seller_frame): self.setup_seller_tab,
+            str(self.inventory_frame): self.setup_inventory_tab,
+            str(self.customer_frame): self.setup_customer_tab,
+            str(self.sales_frame): self.setup_sales_tab,
+            str(self.reports_frame): self.setup_reports_tab,
+            str(self.analytics_frame): self.setup_analytics_tab,
+            str(self.search_frame): self.setup_search_tab,
+        }
         if self.current_role == 'Admin':
-            self.setup_admin_tab(self.admin_frame)
+            self.tab_builders[str(self.admin_frame)] = self.setup_admin_tab
         
-        # Inicializa e recarrega dados ao trocar de aba
+        # Figura e canvas do Matplotlib, criados no primeiro desenho e reaproveitados
+        self.analytics_chart = None
+        self.matplotlib_canvas = None
+        # Versões das tabelas e filtros dos dados exibidos (nada é recalculado enquanto não mudarem)
+        self.analytics_version = None
+
+        # Versões já renderizadas em cada Treeview/dropdown (atualização incremental)
+        self.tree_states = {}
+        self.inventory_state = None
+        # Versão do catálogo de marcas/modelos já aplicada aos dropdowns
+        self.catalog_menus_version = None
+
+        # Indicador de consultas em andamento (alimentado pelo QueryExecutor)
+        status_frame = ttk.Frame(master)
+        status_frame.pack(pady=5, padx=10, side=tk.LEFT)
+        self.query_progress = ttk.Progressbar(status_frame, length=150, mode='indeterminate')
+        self.query_progress.pack(side=tk.LEFT)
+        self.query_status_label = ttk.Label(status_frame, text="")
+        self.query_status_label.pack(side=tk.LEFT, padx=5)
+        self.query_progress_running = False
+        # Importação ou exportação em andamento (thread de tarefas longas), com cancelamento
+        self.long_job_label = ttk.Label(status_frame, text="")
+        self.long_job_label.pack(side=tk.LEFT, padx=5)
+        self.long_job_cancel = ttk.Button(status_frame, text="Cancelar", command=self.cancel_long_jobs, state='disabled')
+        self.long_job_cancel.pack(side=tk.LEFT)
+
+        # Monta e carrega só a aba visível; as demais, ao serem selecionadas
+        self.current_tab = None
         self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_change)
-        self.load_initial_data()
+        self.on_tab_change()
         
         # Botão de Logout
         ttk.Button(master, text="Logout", command=self.logout).pack(pady=5, padx=10, side=tk.RIGHT)
 
     def logout(self):
-        """Fecha a aplicação atual e retorna para a tela de login."""
-        self.master.destroy()
-        # Abre a tela de login novamente
-        root = tk.Tk()
-        LoginWindow(root)
-        root.mainloop()
-
-    def create_tables(self):
-        """Cria todas as tabelas necessárias no SQLite. (Tabela users é criada no LoginWindow)"""
-        try:
-            # 1. Tabela de Parâmetros (Marcas)
-            self.cursor.execute("CREATE TABLE IF NOT EXISTS makes (name TEXT PRIMARY KEY)")
-            # 2. Tabela de Parâmetros (Modelos)
-            self.cursor.execute("CREATE TABLE IF NOT EXISTS models (id INTEGER PRIMARY KEY, make_name TEXT, model_name TEXT, UNIQUE(make_name, model_name))")
-            # 3. Tabela de Vendedores
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS sellers (
-                    id INTEGER PRIMARY KEY,
-                    name TEXT NOT NULL,
-                    phone TEXT,
-                    email TEXT UNIQUE,
-                    is_active INTEGER DEFAULT 1
-                )
-            """)
-            # 4. Tabela de Veículos em Estoque 
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS vehicles (
-                    id INTEGER PRIMARY KEY,
-                    make TEXT NOT NULL,
-                    model TEXT NOT NULL,
-                    manufacture_year INTEGER,
-                    model_year INTEGER,
-                    color TEXT,
-                    sale_price REAL NOT NULL,
-                    stock INTEGER NOT NULL,
-                    is_active INTEGER DEFAULT 1,
-                    sale_date_only TEXT
-                )
-            """)
-            # 5. Tabela de Clientes
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS customers (
-                    id INTEGER PRIMARY KEY,
-                    name TEXT NOT NULL,
-                    phone TEXT,
-                    email TEXT UNIQUE,
-                    is_active INTEGER DEFAULT 1
-                )
-            """)
-            # 6. Tabela de Histórico de Vendas
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS sales (
-                    id INTEGER PRIMARY KEY,
-                    vehicle_id INTEGER,
-                    vehicle_info TEXT,
-                    customer_name TEXT,
-                    seller_name TEXT,
-                    final_price REAL NOT NULL,
-                    sale_date TEXT NOT NULL
+        """Encerra a sessão e volta para a tela de login na mesma janela."""
+        self.session.show_login()
+
+    def close(self):
+        """Libera o que não sai junto com os widgets: consultas e tarefas longas pendentes da sessão e a figura da análise."""
+        self.queries.cancel()
+        self.queries.on_status = None
+        # Importação interrompida entre blocos (os já gravados ficam); exportação sem arquivo
+        self.long_jobs.cancel()
+        self.long_jobs.on_status = None
+        self.close_analytics()
+
+    def get_table_versions(self, *tables):
+        """Retorna as versões atuais das tabelas informadas (uma única consulta)."""
+        return table_versions(self.conn, *tables)
+
+    def run_query(self, func, on_done, group=None, key=None, error_title="Erro de Banco de Dados"):
+        """Executa func(conn, job) na thread de consultas; on_done(resultado) roda no loop do Tk.
+
+        group é o frame da aba dona da consulta (cancelada ao sair da aba); key identifica
+        pedidos que se substituem (só o mais recente é entregue).
+        """
+        def on_error(error):
+            messagebox.showerror(error_title, f"Ocorreu um erro: {error}")
+        return self.queries.submit(func, on_done, on_error, key=key, group=None if group is None else str(group))
+
+    def run_long_job(self, func, on_done, error_title):
+        """Executa func(conn, job) na thread de tarefas longas (importação e exportação); on_done(resultado) roda no loop do Tk.
+
+        Enquanto isso as consultas das abas seguem na thread de consultas. A tarefa não
+        é cancelada ao trocar de aba.
+        """
+        def on_error(error):
+            messagebox.showerror(error_title, f"Ocorreu um erro: {error}")
+        return self.long_jobs.submit(func, on_done, on_error)
+
+    def update_long_job_status(self, active, progress, message=None):
+        """Mostra a mensagem da importação ou exportação em andamento e habilita o cancelamento."""
+        self.long_job_label.config(text=(message or "Processando arquivo...") if active else "")
+        self.long_job_cancel.config(state='normal' if active else 'disabled')
+
+    def cancel_long_jobs(self):
+        """Cancela a importação/exportação em andamento e as que aguardam na fila.
+
+        A exportação é interrompida dentro do SQLite e não deixa arquivo; a importação para
+        no fim do bloco atual, e os blocos já gravados aparecem nas listas na próxima atualização.
+        """
+        self.long_jobs.cancel()
+
+    def update_query_status(self, active, progress, message=None):
+        """Atualiza o indicador de progresso das consultas em segundo plano."""
+        if not active:
+            self.query_progress.stop()
+            self.query_progress_running = False
+            self.query_progress.config(mode='determinate', value=0)
+            self.query_status_label.config(text="")
+            return
+        self.query_status_label.config(text=message or "Consultando...")
+        if progress is None:
+            if not self.query_progress_running:
+                self.query_progress.config(mode='indeterminate')
+                self.query_progress.start()
+                self.query_progress_running = True
+        else:
+            self.query_progress.stop()
+            self.query_progress_running = False
+            self.query_progress.config(mode='determinate', value=progress * 100)
+
+    def tab_of(self, widget):
+        """Frame da aba do Notebook que contém o widget."""
+        while widget.master is not self.notebook:
+            widget = widget.master
+        return widget
+
+    def import_records(self, entity, description, refresh):
+        """Importa veículos/clientes/vendedores de um CSV ou XLSX em segundo plano e atualiza a lista uma vez no final."""
+        file_path = filedialog.askopenfilename(
+            filetypes=[(f"{name} files", f"*{extension}") for extension, (name, _) in IMPORT_FORMATS.items()],
+            title=f"Importar {description}"
+        )
+        if not file_path: return
+
+        library = missing_import_dependency(file_path)
+        if library is not None:
+            return messagebox.showerror("Erro de Dependência", f"Para importar este formato, você precisa instalar a biblioteca {library}:\nExecute: pip install {library}")
+
+        rejects_path = default_rejects_path(file_path)
+
+        def run_import(conn, job):
+            # A conexão da thread de tarefas longas é somente leitura: a importação abre a sua
+            job.set_message(f"Importando {description}...")
+            writer = connect(self.db_path)
+            try:
+                return import_file(
+                    writer, entity, file_path, rejects_path,
+                    progress=lambda imported, rejected: job.set_message(f"{imported} importados, {rejected} rejeitados...")
                 )
-            """)
-            
-            # Checagem e adição da nova coluna 'sale_date_only' se não existir (para compatibilidade com DBs antigos)
-            self.cursor.execute("PRAGMA table_info(vehicles)")
-            columns = [col[1] for col in self.cursor.fetchall()]
-            if 'sale_date_only' not in columns:
-                 self.cursor.execute("ALTER TABLE vehicles ADD COLUMN sale_date_only TEXT")
-            
-            self.conn.commit()
-        except sqlite3.Error as e:
-            messagebox.showerror("Erro de Banco de Dados", f"Falha ao criar tabelas: {e}")
+            finally:
+                writer.close()
+
+        def done(result):
+            imported, rejected = result
+            message = f"{imported} registro(s) de {description} importado(s)."
+            if rejected:
+                message += f"\n{rejected} linha(s) rejeitada(s), com o motivo, em:\n{rejects_path}"
+            messagebox.showinfo("Importação Concluída", message)
+            refresh()
+
+        self.run_long_job(run_import, done, error_title="Erro na Importação")
+
+    def sync_tree(self, listing, tree, format_row, sort_key=None, descending=False, on_changed=None, page_size=None):
+        """Sincroniza a Treeview com a lista (services.Listing), aplicando somente as linhas alteradas desde a última renderização.
+
+        O id de cada registro (primeira coluna) é o iid do item. sort_key deve reproduzir
+        em Python a ordenação de listing.order_sql; sem ele a Treeview é reconstruída
+        sempre que a versão da tabela mudar. A consulta (services.fetch_changes) roda na
+        thread de consultas e a Treeview é atualizada quando o resultado chega;
+        on_changed() é chamado em seguida se algo foi alterado. Com page_size (listas com
+        listing.after_sql e sort_key) só a primeira página é carregada; as seguintes vêm
+        de load_tree_page, e as alterações fora das linhas já carregadas são ignoradas.
+        """
+        table = listing.table
+        state = self.tree_states.get(table)
+        base_version = None if state is None else state['version']
+        incremental = sort_key is not None
+
+        def apply(result):
+            current = self.tree_states.get(table)
+            if current is not state or (state is not None and state['version'] != base_version):
+                # Outra atualização chegou antes desta; recalcula a partir do estado atual
+                self.sync_tree(listing, tree, format_row, sort_key, descending, on_changed, page_size)
+                return
+            version, changed_ids, rows = result
+            if rows is None:
+                return
+            if changed_ids is None:
+                self.rebuild_tree(table, tree, version, rows, format_row, sort_key, page_size)
+            else:
+                self.patch_tree(state, tree, version, changed_ids, rows, format_row, sort_key, descending)
+            if on_changed is not None:
+                on_changed()
 
-    def load_initial_data(self):
-        """Carrega dados iniciais ao iniciar o app."""
-        self.refresh_inventory_list()
-        self.refresh_customer_list()
-        self.refresh_seller_list()
-        self.refresh_sales_history()
-        self.refresh_param_lists()
-        self.refresh_sales_dropdowns()
+        self.run_query(
+            lambda conn, job: fetch_changes(conn, listing, base_version, incremental, page_size),
+            apply, group=self.tab_of(tree), key=f"tree:{table}"
+        )
+
+    def rebuild_tree(self, table, tree, version, rows, format_row, sort_key, page_size=None):
+        """Reconstrução completa da Treeview (primeira renderização ou muitas alterações)."""
+        for item in tree.get_children(): tree.delete(item)
+        keys = []
+        key_of = {}
+        for row in rows:
+            values, tags = format_row(row)
+            iid = str(row[0])
+            tree.insert("", tk.END, iid=iid, values=values, tags=tags)
+            if sort_key is not None:
+                key_of[iid] = sort_key(row)
+                keys.append(key_of[iid])
+        keys.sort()
+        self.tree_states[table] = {
+            'version': version, 'keys': keys, 'key_of': key_of,
+            # Lista paginada: None se toda a tabela já está na Treeview; senão, o tamanho da página
+            'page_size': page_size if page_size is not None and len(rows) == page_size else None,
+            'page_job': None,
+        }
+
+    def patch_tree(self, state, tree, version, changed_ids, rows, format_row, sort_key, descending):
+        """Aplica na Treeview apenas as linhas alteradas, mantendo a ordenação."""
+        keys = state['keys']
+        key_of = state['key_of']
+
+        # Linhas removidas da tabela saem da Treeview
+        for row_id in set(changed_ids) - {row[0] for row in rows}:
+            iid = str(row_id)
+            if iid in key_of:
+                del keys[bisect_left(keys, key_of.pop(iid))]
+                tree.delete(iid)
+
+        for row in rows:
+            values, tags = format_row(row)
+            iid = str(row[0])
+            key = sort_key(row)
+            old_key = key_of.get(iid)
+            if state['page_size'] is not None and keys and (key < keys[0] if descending else key > keys[-1]):
+                # Depois da última linha carregada: chega com a página dela (sai daqui se já estava)
+                if old_key is not None:
+                    del keys[bisect_left(keys, key_of.pop(iid))]
+                    tree.delete(iid)
+                continue
+            if old_key == key:
+                tree.item(iid, values=values, tags=tags)
+                continue
+            if old_key is not None:
+                del keys[bisect_left(keys, old_key)]
+            position = bisect_left(keys, key)
+            index = len(keys) - position if descending else position
+            keys.insert(position, key)
+            key_of[iid] = key
+            if old_key is None:
+                tree.insert("", index, iid=iid, values=values, tags=tags)
+            else:
+                tree.item(iid, values=values, tags=tags)
+                tree.move(iid, "", index)
 
-    def on_tab_change(self, event):
-        """Ação executada ao trocar de aba."""
-        selected_tab = self.notebook.tab(self.notebook.select(), "text")
+        state['version'] = version
+
+    def load_tree_page(self, listing, tree, format_row, sort_key, descending=False):
+        """Acrescenta à Treeview paginada (ver sync_tree) a página seguinte à última linha carregada."""
+        state = self.tree_states.get(listing.table)
+        if state is None or state['page_size'] is None or not state['keys']:
+            return
+        if state['page_job'] is not None and not state['page_job'].cancelled:
+            return  # página anterior ainda em busca
+        after = state['keys'][0] if descending else state['keys'][-1]
+        page_size = state['page_size']
+
+        def apply(rows):
+            state['page_job'] = None
+            if self.tree_states.get(listing.table) is not state:
+                return  # a lista foi recarregada enquanto a página era buscada
+            keys, key_of = state['keys'], state['key_of']
+            for row in rows:
+                iid = str(row[0])
+                if iid in key_of:
+                    continue
+                values, tags = format_row(row)
+                tree.insert("", tk.END, iid=iid, values=values, tags=tags)
+                key_of[iid] = sort_key(row)
+                insort(keys, key_of[iid])
+            if len(rows) < page_size:
+                state['page_size'] = None
+
+        state['page_job'] = self.run_query(
+            lambda conn, job: fetch_page(conn, listing, after, page_size),
+            apply, group=self.tab_of(tree), key=f"page:{listing.table}"
+        )
+
+    def paged_scroll(self, scrollbar, load_page):
+        """yscrollcommand de uma lista paginada: move a barra e pede a próxima página quando o fim fica visível."""
+        def on_scroll(first, last):
+            scrollbar.set(first, last)
+            if float(last) >= PAGE_PREFETCH_AT:
+                # Agenda a carga fora do callback de rolagem para não reentrar no Treeview
+                self.master.after_idle(load_page)
+        return on_scroll
+
+    def build_tab(self, tab):
+        """Monta o conteúdo da aba (caminho do frame) se ainda não foi montado."""
+        setup = self.tab_builders.pop(tab, None)
+        if setup is not None:
+            setup(self.notebook.nametowidget(tab))
+
+    def tab_built(self, frame):
+        """True se o conteúdo da aba já foi montado (seus widgets existem)."""
+        return str(frame) not in self.tab_builders
+
+    def on_tab_change(self, event=None):
+        """Ação executada ao trocar de aba (e na abertura, para a aba visível)."""
+        tab = str(self.notebook.select())
+        if tab == self.current_tab:
+            return
+        # Consultas ainda pendentes da aba anterior deixam de interessar
+        if self.current_tab is not None:
+            self.queries.cancel(self.current_tab)
+        self.current_tab = tab
+        self.build_tab(tab)
+        selected_tab = self.notebook.tab(tab, "text")
         
         if "Parâmetros" in selected_tab:
             self.refresh_param_lists()
@@ -295,7 +562,6 @@ class VehicleStoreApp:
         elif "Clientes" in selected_tab:
             self.refresh_customer_list()
         elif "Vendas" in selected_tab:
-            self.refresh_sales_dropdowns()
             self.refresh_sales_history()
         elif "Relatórios" in selected_tab:
             self.toggle_report_filters(self.report_type.get())
@@ -308,70 +574,76 @@ class VehicleStoreApp:
     # ... (código refresh_param_lists, add_make, add_model, refresh_param_dropdowns, update_inv_model_dropdown, setup_parameters_tab)
     
     def refresh_param_lists(self):
-        """Recarrega as Treeviews de Marcas e Modelos."""
-        # Limpar Marcas
-        for item in self.make_tree.get_children(): self.make_tree.delete(item)
-        self.cursor.execute("SELECT name FROM makes ORDER BY name ASC")
-        for row in self.cursor.fetchall():
-            self.make_tree.insert("", tk.END, values=row)
-
-        # Limpar Modelos
-        for item in self.model_tree.get_children(): self.model_tree.delete(item)
-        self.cursor.execute("SELECT make_name, model_name FROM models ORDER BY make_name, model_name ASC")
-        for row in self.cursor.fetchall():
-            self.model_tree.insert("", tk.END, values=row)
-            
-        self.refresh_param_dropdowns()
+        """Atualiza as Treeviews de Marcas e Modelos com as linhas alteradas."""
+        # Marcas (os dropdowns do estoque acompanham as alterações)
+        self.sync_tree(
+            MAKES_LISTING, self.make_tree,
+            lambda make: ((make.name,), ()),
+            sort_key=lambda make: (make.name or "",),
+            on_changed=self.refresh_param_dropdowns
+        )
+
+        # Modelos
+        self.sync_tree(
+            MODELS_LISTING, self.model_tree,
+            lambda model: ((model.make_name, model.model_name), ()),
+            sort_key=lambda model: (model.make_name or "", model.model_name or ""),
+            on_changed=self.refresh_param_dropdowns
+        )
 
     def add_make(self):
         """Adiciona uma nova Marca."""
-        make_name = self.make_entry.get().strip().title()
-        if not make_name: return messagebox.showwarning("Atenção", "O campo Marca não pode estar vazio.")
         try:
-            self.cursor.execute("INSERT INTO makes (name) VALUES (?)", (make_name,))
-            self.conn.commit()
-            self.make_entry.delete(0, tk.END)
-            self.refresh_param_lists()
-            messagebox.showinfo("Sucesso", f"Marca '{make_name}' adicionada.")
-        except sqlite3.IntegrityError:
-            messagebox.showerror("Erro", "Esta Marca já existe.")
+            make_name = self.inventory.add_make(self.make_entry.get())
+        except DuplicateError as e:
+            return messagebox.showerror("Erro", str(e))
+        except ValidationError as e:
+            return messagebox.showwarning("Atenção", str(e))
         except sqlite3.Error as e:
-            messagebox.showerror("Erro", f"Erro: {e}")
+            return messagebox.showerror("Erro", f"Erro: {e}")
+        self.make_entry.delete(0, tk.END)
+        self.refresh_param_lists()
+        messagebox.showinfo("Sucesso", f"Marca '{make_name}' adicionada.")
 
     def add_model(self):
         """Adiciona um novo Modelo, vinculado a uma Marca."""
         make_name = self.model_make_var.get()
-        model_name = self.model_entry.get().strip().title()
-        
-        if make_name == "Selecione a Marca" or not model_name: return messagebox.showwarning("Atenção", "Selecione a Marca e digite o Modelo.")
-        
+        if make_name == "Selecione a Marca": make_name = ""
         try:
-            self.cursor.execute("INSERT INTO models (make_name, model_name) VALUES (?, ?)", (make_name, model_name))
-            self.conn.commit()
-            self.model_entry.delete(0, tk.END)
-            self.refresh_param_lists()
-            messagebox.showinfo("Sucesso", f"Modelo '{model_name}' adicionado para a Marca '{make_name}'.")
-        except sqlite3.IntegrityError:
-            messagebox.showerror("Erro", "Este Modelo já existe para esta Marca.")
+            model_name = self.inventory.add_model(make_name, self.model_entry.get())
+        except DuplicateError as e:
+            return messagebox.showerror("Erro", str(e))
+        except ValidationError as e:
+            return messagebox.showwarning("Atenção", str(e))
         except sqlite3.Error as e:
-            messagebox.showerror("Erro", f"Erro: {e}")
+            return messagebox.showerror("Erro", f"Erro: {e}")
+        self.model_entry.delete(0, tk.END)
+        self.refresh_param_lists()
+        messagebox.showinfo("Sucesso", f"Modelo '{model_name}' adicionado para a Marca '{make_name}'.")
 
     def refresh_param_dropdowns(self):
-        """Atualiza os OptionMenus de Marca e Modelo na aba Estoque."""
-        self.cursor.execute("SELECT name FROM makes ORDER BY name ASC")
-        makes = [row[0] for row in self.cursor.fetchall()]
+        """Atualiza os OptionMenus de Marca e Modelo (Parâmetros e Estoque) se o catálogo mudou."""
+        # Com o cache em dia custa só a leitura de table_versions; os menus não são refeitos
+        self.inventory.refresh_catalog()
+        if self.catalog_menus_version == self.catalog.version:
+            return
+        self.catalog_menus_version = self.catalog.version
+        makes = self.catalog.makes
         
         # Atualiza o dropdown na aba Parâmetros para cadastro de modelo
-        menu = self.model_make_menu['menu']
-        menu.delete(0, 'end')
-        if makes:
-            self.model_make_var.set(makes[0])
-            for make in makes:
-                menu.add_command(label=make, command=tk._setit(self.model_make_var, make))
-        else:
-            self.model_make_var.set("Selecione a Marca")
+        if self.tab_built(self.params_frame):
+            menu = self.model_make_menu['menu']
+            menu.delete(0, 'end')
+            if makes:
+                self.model_make_var.set(makes[0])
+                for make in makes:
+                    menu.add_command(label=make, command=tk._setit(self.model_make_var, make))
+            else:
+                self.model_make_var.set("Selecione a Marca")
 
-        # Atualiza o dropdown na aba Estoque
+        # Atualiza o dropdown na aba Estoque (ainda não montada: preenchido quando for)
+        if not self.tab_built(self.inventory_frame):
+            return
         menu_estoque = self.inv_make_menu['menu']
         menu_estoque.delete(0, 'end')
         if makes:
@@ -393,8 +665,8 @@ class VehicleStoreApp:
         self.inv_model_var.set("")
         
         if make_name and make_name != "Selecione a Marca":
-            self.cursor.execute("SELECT model_name FROM models WHERE make_name = ? ORDER BY model_name ASC", (make_name,))
-            models = [row[0] for row in self.cursor.fetchall()]
+            # Lido do cache do catálogo, sem consulta ao banco
+            models = self.catalog.models_of(make_name)
             
             if models:
                 self.inv_model_var.set(models[0])
@@ -448,48 +720,35 @@ class VehicleStoreApp:
         self.model_tree.heading("Modelo", text="Modelo")
         self.model_tree.column("Modelo", width=150, anchor='w')
         self.model_tree.grid(row=2, column=1, padx=5, pady=5, sticky="nwe")
+        # Menu de marcas ainda vazio: a próxima refresh_param_dropdowns o preenche
+        self.catalog_menus_version = None
 
 
     # --- SETUP E LÓGICA DO MÓDULO 2: CADASTRO DE VENDEDORES (Mantido) ---
 
     def refresh_seller_list(self):
-        """Limpa e recarrega a Treeview de Vendedores."""
-        for item in self.seller_tree.get_children(): self.seller_tree.delete(item)
-
-        # Query para incluir is_active
-        self.cursor.execute("SELECT id, name, phone, email, is_active FROM sellers ORDER BY name ASC")
-        sellers = self.cursor.fetchall()
-        for seller in sellers:
-            sid, name, phone, email, is_active = seller
-            status = "Ativo" if is_active else "Inativo"
-            tag = 'inactive' if not is_active else ''
-            self.seller_tree.insert("", tk.END, values=(sid, name, phone, email, status), tags=(tag,))
+        """Atualiza a Treeview de Vendedores com as linhas alteradas."""
+        self.sync_tree(
+            self.sellers.listing, self.seller_tree,
+            format_person_row,
+            sort_key=lambda person: (person.name, person.id)
+        )
 
     def add_seller(self):
         """Adiciona um novo vendedor (ativo por padrão)."""
-        name = self.seller_name_entry.get().strip().title()
-        phone = self.seller_phone_entry.get().strip()
-        email = self.seller_email_entry.get().strip()
-
-        if not name or not email: return messagebox.showwarning("Atenção", "Nome e Email são obrigatórios para o Vendedor.")
-        
         try:
-            # is_active usa o valor default 1 (Ativo)
-            self.cursor.execute(
-                "INSERT INTO sellers (name, phone, email) VALUES (?, ?, ?)", 
-                (name, phone, email)
-            )
-            self.conn.commit()
-            messagebox.showinfo("Sucesso", f"Vendedor '{name}' cadastrado.")
-            self.seller_name_entry.delete(0, tk.END)
-            self.seller_phone_entry.delete(0, tk.END)
-            self.seller_email_entry.delete(0, tk.END)
-            self.refresh_seller_list()
-            self.refresh_sales_dropdowns() # Recarrega dropdown de vendas
-        except sqlite3.IntegrityError:
-            messagebox.showerror("Erro", "Email já cadastrado para outro Vendedor.")
+            seller = self.sellers.add(self.seller_name_entry.get(), self.seller_phone_entry.get(), self.seller_email_entry.get())
+        except DuplicateError as e:
+            return messagebox.showerror("Erro", str(e))
+        except ValidationError:
+            return messagebox.showwarning("Atenção", "Nome e Email são obrigatórios para o Vendedor.")
         except sqlite3.Error as e:
-            messagebox.showerror("Erro", f"Erro: {e}")
+            return messagebox.showerror("Erro", f"Erro: {e}")
+        messagebox.showinfo("Sucesso", f"Vendedor '{seller.name}' cadastrado.")
+        self.seller_name_entry.delete(0, tk.END)
+        self.seller_phone_entry.delete(0, tk.END)
+        self.seller_email_entry.delete(0, tk.END)
+        self.refresh_seller_list()
 
     def toggle_seller_status(self):
         """Ativa/Inativa o vendedor selecionado."""
@@ -510,11 +769,9 @@ class VehicleStoreApp:
 
         if confirmation:
             try:
-                self.cursor.execute("UPDATE sellers SET is_active = ? WHERE id = ?", (new_status, seller_id))
-                self.conn.commit()
+                self.sellers.set_active(seller_id, new_status)
                 messagebox.showinfo("Sucesso", f"Status do vendedor atualizado para {new_status_text}.")
                 self.refresh_seller_list()
-                self.refresh_sales_dropdowns() # Atualiza dropdown de vendas
             except sqlite3.Error as e:
                 messagebox.showerror("Erro", f"Erro ao atualizar status: {e}")
 
@@ -539,6 +796,7 @@ class VehicleStoreApp:
         self.seller_email_entry.grid(row=2, column=1, padx=5, pady=5, sticky='w')
         
         ttk.Button(input_frame, text="Cadastrar Vendedor", command=self.add_seller).grid(row=3, column=0, columnspan=2, pady=10, sticky='we')
+        ttk.Button(input_frame, text="Importar Vendedores (CSV/XLSX)...", command=lambda: self.import_records("sellers", "Vendedores", self.refresh_seller_list)).grid(row=4, column=0, columnspan=2, sticky='we')
         
         # Visualização de Vendedores (Treeview)
         ttk.Label(frame, text="Vendedores Cadastrados:", font=("Arial", 12)).pack(pady=(15, 5), anchor='w')
@@ -580,35 +838,70 @@ class VehicleStoreApp:
             return None
             
     def refresh_inventory_list(self):
-        """Limpa e recarrega a Treeview do estoque com os dados mais recentes."""
-        for item in self.inventory_tree.get_children(): self.inventory_tree.delete(item)
+        """Reinicia a Treeview do estoque com a primeira página de veículos, lida na thread de consultas."""
+        # Sem alterações em vehicles (nem no limite de estoque baixo) a página atual continua válida
+        known_state = self.inventory_state
+        threshold_text = self.stock_threshold_var.get()
+
+        def load(conn, job):
+            state = (table_versions(conn, "vehicles"), threshold_text)
+            if state == known_state:
+                return state, None
+            return state, InventoryService(conn, self.catalog).page()
+
+        def apply(result):
+            state, vehicles = result
+            if vehicles is None:
+                return
+            self.inventory_state = state
+            # A página seguinte pedida para a lista anterior não é mais válida
+            if self.inventory_page_job is not None:
+                self.inventory_page_job.cancel()
+                self.inventory_page_job = None
+            for item in self.inventory_tree.get_children(): self.inventory_tree.delete(item)
+            # Paginação por chave (keyset): guarda a chave da última linha carregada
+            self.inventory_last_key = None
+            self.inventory_exhausted = False
+            self.show_inventory_page(vehicles)
+
+        self.run_query(load, apply, group=self.inventory_frame, key="inventory:first")
+
+    def load_inventory_page(self):
+        """Busca na thread de consultas a próxima página do estoque a partir da última chave carregada (keyset pagination)."""
+        if self.inventory_exhausted or self.inventory_last_key is None:
+            return
+        if self.inventory_page_job is not None and not self.inventory_page_job.cancelled:
+            return  # página anterior ainda em busca
+        state = self.inventory_state
+        last_key = self.inventory_last_key
+
+        def apply(vehicles):
+            self.inventory_page_job = None
+            if self.inventory_state is not state or self.inventory_last_key != last_key:
+                return  # a lista foi recarregada enquanto a página era buscada
+            self.show_inventory_page(vehicles)
+
+        self.inventory_page_job = self.run_query(
+            lambda conn, job: InventoryService(conn, self.catalog).page(last_key),
+            apply, group=self.inventory_frame, key="inventory:next"
+        )
+
+    def show_inventory_page(self, vehicles):
+        """Acrescenta à Treeview do estoque uma página de veículos e guarda a chave da última."""
+        if len(vehicles) < INVENTORY_PAGE_SIZE:
+            self.inventory_exhausted = True
+        if not vehicles:
+            return
+
+        self.inventory_last_key = vehicles[-1].page_key
+
+        # Limite lido uma única vez por página (e não por linha)
+        threshold = self.get_stock_threshold()
+        if threshold is None: threshold = 0
 
-        # Consulta ALTERADA para incluir is_active e sale_date_only
-        self.cursor.execute("SELECT id, make, model, manufacture_year, model_year, color, sale_price, stock, is_active, sale_date_only FROM vehicles ORDER BY is_active DESC, make, model ASC")
-        vehicles = self.cursor.fetchall()
         for vehicle in vehicles:
-            # Desempacota os novos campos
-            vid, make, model, manuf_year, model_year, color, price, stock, is_active, sale_date = vehicle
-            price_formatted = f"R$ {price:.2f}"
-            
-            # ATUALIZADO: Renomeia o status
-            if is_active:
-                status = "Disponível" 
-                display_sale_date = ""
-            else:
-                status = "Vendido"
-                display_sale_date = sale_date if sale_date else "N/A"
-            
-            # Tags para cor
-            tag = 'low_stock' if stock < self.get_stock_threshold() and is_active else 'inactive' if not is_active else ''
-            
-            # Valores ATUALIZADOS com Status e Data Venda
-            self.inventory_tree.insert(
-                "", 
-                tk.END, 
-                values=(vid, make, model, manuf_year, model_year, color, price_formatted, stock, status, display_sale_date), 
-                tags=(tag,)
-            )
+            values, tag = format_inventory_row(vehicle, threshold)
+            self.inventory_tree.insert("", tk.END, values=values, tags=(tag,))
 
     def add_vehicle(self):
         """Adiciona um novo veículo ao estoque (ativo por padrão)."""
@@ -627,39 +920,21 @@ class VehicleStoreApp:
             return messagebox.showwarning("Atenção", "Preencha todos os campos e selecione Marca/Modelo.")
 
         try:
-            manuf_year = int(manuf_year_str)
-            model_year = int(model_year_str)
-            price = float(price_str.replace(',', '.'))
-            stock = int(stock_str)
-            current_year = datetime.now().year
-            
-            # Validação dos anos e outros campos
-            if manuf_year < 1900 or manuf_year > current_year + 1 or model_year < 1900 or model_year > current_year + 1 or price <= 0 or stock < 0:
-                 raise ValueError("Dados inválidos.")
-                 
-            if manuf_year > model_year:
-                 return messagebox.showerror("Erro de Entrada", "O Ano de Fabricação não pode ser maior que o Ano Modelo.")
-                 
-        except ValueError:
-            return messagebox.showerror("Erro de Entrada", "Anos, Preço e Estoque devem ser números válidos.")
-            
-        try:
-            # INSERT ATUALIZADO (is_active usa default 1, sale_date_only é NULL)
-            self.cursor.execute(
-                "INSERT INTO vehicles (make, model, manufacture_year, model_year, color, sale_price, stock) VALUES (?, ?, ?, ?, ?, ?, ?)", 
-                (make, model, manuf_year, model_year, color, price, stock)
-            )
-            self.conn.commit()
-            messagebox.showinfo("Sucesso", f"Veículo {make} {model}/{model_year} adicionado ao estoque.")
-            # Limpa os novos campos
-            self.inv_manuf_year_entry.delete(0, tk.END)
-            self.inv_model_year_entry.delete(0, tk.END)
-            
-            self.inv_price_entry.delete(0, tk.END)
-            self.inv_stock_entry.delete(0, tk.END)
-            self.refresh_inventory_list()
+            # Mesmas regras da importação em lote (validation.py); marca/modelo conferidos no catálogo
+            vehicle = self.inventory.add_vehicle(make, model, manuf_year_str, model_year_str, color, price_str, stock_str)
+        except ValidationError as e:
+            return messagebox.showerror("Erro de Entrada", str(e))
         except sqlite3.Error as e:
-            messagebox.showerror("Erro", f"Erro ao adicionar veículo: {e}")
+            return messagebox.showerror("Erro", f"Erro ao adicionar veículo: {e}")
+
+        messagebox.showinfo("Sucesso", f"Veículo {vehicle.make} {vehicle.model}/{vehicle.model_year} adicionado ao estoque.")
+        # Limpa os novos campos
+        self.inv_manuf_year_entry.delete(0, tk.END)
+        self.inv_model_year_entry.delete(0, tk.END)
+        
+        self.inv_price_entry.delete(0, tk.END)
+        self.inv_stock_entry.delete(0, tk.END)
+        self.refresh_inventory_list()
 
     def toggle_vehicle_status(self):
         """Ativa/Inativa o veículo selecionado."""
@@ -675,8 +950,6 @@ class VehicleStoreApp:
         if current_status_text == "Disponível": # Ativo -> Inativo (Vendido, mas manualmente)
             new_status = 0
             new_status_text = "Vendido"
-            # Define a data de venda como hoje se o estoque estiver zerado ou for inativado manualmente
-            sale_date = datetime.now().strftime("%Y-%m-%d")
             
             confirmation = messagebox.askyesno(
                 "Confirmação de Inativação",
@@ -686,7 +959,6 @@ class VehicleStoreApp:
         else: # Inativo/Vendido -> Ativo (Disponível)
             new_status = 1
             new_status_text = "Disponível"
-            sale_date = None # Limpa a data de venda ao reativar
 
             confirmation = messagebox.askyesno(
                 "Confirmação de Ativação",
@@ -695,21 +967,14 @@ class VehicleStoreApp:
 
         if confirmation:
             try:
-                # Se for ativado (Disponível), garante que o estoque > 0.
-                if new_status == 1:
-                    self.cursor.execute("SELECT stock FROM vehicles WHERE id = ?", (vehicle_id,))
-                    current_stock = self.cursor.fetchone()[0]
-                    if current_stock == 0:
-                        return messagebox.showwarning("Atenção", "Não é possível reativar um veículo com Estoque 0. Ajuste o estoque antes.")
-                
-                # Atualiza o status e a data de venda/limpa a data de venda
-                self.cursor.execute("UPDATE vehicles SET is_active = ?, sale_date_only = ? WHERE id = ?", (new_status, sale_date, vehicle_id))
-                self.conn.commit()
-                messagebox.showinfo("Sucesso", f"Status do veículo atualizado para {new_status_text}.")
-                self.refresh_inventory_list()
-                self.refresh_sales_dropdowns() # Atualiza dropdown de vendas
+                # Inativar registra a data de venda (hoje); reativar a limpa e exige estoque > 0
+                self.inventory.set_vehicle_active(vehicle_id, new_status)
+            except ValidationError as e:
+                return messagebox.showwarning("Atenção", str(e))
             except sqlite3.Error as e:
-                messagebox.showerror("Erro", f"Erro ao atualizar status: {e}")
+                return messagebox.showerror("Erro", f"Erro ao atualizar status: {e}")
+            messagebox.showinfo("Sucesso", f"Status do veículo atualizado para {new_status_text}.")
+            self.refresh_inventory_list()
 
     def setup_inventory_tab(self, frame):
         """Configura a aba de Estoque (Veículos)."""
@@ -763,6 +1028,7 @@ class VehicleStoreApp:
         self.inv_stock_entry.grid(row=3, column=1, padx=5, pady=5, sticky='w')
         
         ttk.Button(input_frame, text="Adicionar Veículo ao Estoque", command=self.add_vehicle).grid(row=4, column=0, columnspan=4, pady=10, sticky='we')
+        ttk.Button(input_frame, text="Importar Veículos (CSV/XLSX)...", command=lambda: self.import_records("vehicles", "Veículos", self.refresh_inventory_list)).grid(row=5, column=0, columnspan=4, sticky='we')
         
         # Visualização do Estoque (Treeview) - ATUALIZADO
         ttk.Label(frame, text="Estoque Atual de Veículos:", font=("Arial", 12)).pack(pady=(15, 5), anchor='w')
@@ -791,9 +1057,15 @@ class VehicleStoreApp:
         self.inventory_tree.tag_configure('low_stock', background='#ffdddd', foreground='red')
         self.inventory_tree.tag_configure('inactive', background='#f0f0f0', foreground='#999999')
 
-        tree_scroll = ttk.Scrollbar(frame, orient="vertical", command=self.inventory_tree.yview)
-        tree_scroll.pack(side='right', fill='y')
-        self.inventory_tree.configure(yscrollcommand=tree_scroll.set)
+        self.inventory_scroll = ttk.Scrollbar(frame, orient="vertical", command=self.inventory_tree.yview)
+        self.inventory_scroll.pack(side='right', fill='y')
+        # A rolagem dispara a carga da próxima página (lista virtualizada)
+        self.inventory_tree.configure(yscrollcommand=self.paged_scroll(self.inventory_scroll, self.load_inventory_page))
+        self.inventory_last_key = None
+        self.inventory_exhausted = True
+        self.inventory_page_job = None
+        # Menus de marca/modelo ainda vazios: a próxima refresh_param_dropdowns os preenche
+        self.catalog_menus_version = None
         
         # Botão para Ativar/Inativar Veículo (agora Ativa/Marca como Vendido)
         ttk.Button(frame, text="Alterar Status do Veículo Selecionado", command=self.toggle_vehicle_status).pack(pady=10)
@@ -802,43 +1074,28 @@ class VehicleStoreApp:
     # --- SETUP E LÓGICA DO MÓDULO 4: CLIENTES (Mantido) ---
     
     def refresh_customer_list(self):
-        """Limpa e recarrega a Treeview de Clientes."""
-        for item in self.customer_tree.get_children(): self.customer_tree.delete(item)
-
-        # Query para incluir is_active
-        self.cursor.execute("SELECT id, name, phone, email, is_active FROM customers ORDER BY name ASC")
-        customers = self.cursor.fetchall()
-        for customer in customers:
-            cid, name, phone, email, is_active = customer
-            status = "Ativo" if is_active else "Inativo"
-            tag = 'inactive' if not is_active else ''
-            self.customer_tree.insert("", tk.END, values=(cid, name, phone, email, status), tags=(tag,))
+        """Atualiza a Treeview de Clientes com as linhas alteradas."""
+        self.sync_tree(
+            self.customers.listing, self.customer_tree,
+            format_person_row,
+            sort_key=lambda person: (person.name, person.id)
+        )
 
     def add_customer(self):
         """Adiciona um novo cliente (ativo por padrão)."""
-        name = self.cust_name_entry.get().strip().title()
-        phone = self.cust_phone_entry.get().strip()
-        email = self.cust_email_entry.get().strip()
-
-        if not name or not email: return messagebox.showwarning("Atenção", "Nome e Email são obrigatórios.")
-        
         try:
-            # is_active usa o valor default 1 (Ativo)
-            self.cursor.execute(
-                "INSERT INTO customers (name, phone, email) VALUES (?, ?, ?)", 
-                (name, phone, email)
-            )
-            self.conn.commit()
-            messagebox.showinfo("Sucesso", f"Cliente '{name}' cadastrado.")
-            self.cust_name_entry.delete(0, tk.END)
-            self.cust_phone_entry.delete(0, tk.END)
-            self.cust_email_entry.delete(0, tk.END)
-            self.refresh_customer_list()
-            self.refresh_sales_dropdowns() # Recarrega dropdown de vendas
-        except sqlite3.IntegrityError:
-            messagebox.showerror("Erro", "Email já cadastrado.")
+            customer = self.customers.add(self.cust_name_entry.get(), self.cust_phone_entry.get(), self.cust_email_entry.get())
+        except DuplicateError as e:
+            return messagebox.showerror("Erro", str(e))
+        except ValidationError:
+            return messagebox.showwarning("Atenção", "Nome e Email são obrigatórios.")
         except sqlite3.Error as e:
-            messagebox.showerror("Erro", f"Erro: {e}")
+            return messagebox.showerror("Erro", f"Erro: {e}")
+        messagebox.showinfo("Sucesso", f"Cliente '{customer.name}' cadastrado.")
+        self.cust_name_entry.delete(0, tk.END)
+        self.cust_phone_entry.delete(0, tk.END)
+        self.cust_email_entry.delete(0, tk.END)
+        self.refresh_customer_list()
 
     def toggle_customer_status(self):
         """Ativa/Inativa o cliente selecionado."""
@@ -859,11 +1116,9 @@ class VehicleStoreApp:
 
         if confirmation:
             try:
-                self.cursor.execute("UPDATE customers SET is_active = ? WHERE id = ?", (new_status, customer_id))
-                self.conn.commit()
+                self.customers.set_active(customer_id, new_status)
                 messagebox.showinfo("Sucesso", f"Status do cliente atualizado para {new_status_text}.")
                 self.refresh_customer_list()
-                self.refresh_sales_dropdowns() # Atualiza dropdown de vendas
             except sqlite3.Error as e:
                 messagebox.showerror("Erro", f"Erro ao atualizar status: {e}")
 
@@ -887,6 +1142,7 @@ class VehicleStoreApp:
         self.cust_email_entry.grid(row=2, column=1, padx=5, pady=5, sticky='w')
         
         ttk.Button(input_frame, text="Cadastrar Cliente", command=self.add_customer).grid(row=3, column=0, columnspan=2, pady=10, sticky='we')
+        ttk.Button(input_frame, text="Importar Clientes (CSV/XLSX)...", command=lambda: self.import_records("customers", "Clientes", self.refresh_customer_list)).grid(row=4, column=0, columnspan=2, sticky='we')
         
         # Visualização de Clientes (Treeview)
         ttk.Label(frame, text="Clientes Cadastrados:", font=("Arial", 12)).pack(pady=(15, 5), anchor='w')
@@ -918,138 +1174,113 @@ class VehicleStoreApp:
     # --- SETUP E LÓGICA DO MÓDULO 5: VENDAS (Mantido) ---
     
     def refresh_sales_history(self):
-        """Limpa e recarrega o histórico de vendas."""
-        for item in self.sales_tree.get_children(): self.sales_tree.delete(item)
+        """Atualiza o histórico de vendas com as vendas novas ou alteradas."""
+        # Nomes de veículo, cliente e vendedor resolvidos pelas chaves
+        self.sync_tree(
+            SALES_LISTING, self.sales_tree,
+            format_sale_row,
+            sort_key=lambda sale: (sale.sale_ts, sale.id),
+            descending=True,
+            page_size=SALES_HISTORY_PAGE_SIZE
+        )
 
-        # Query para incluir o vendedor
-        self.cursor.execute("SELECT sale_date, vehicle_info, customer_name, seller_name, final_price FROM sales ORDER BY sale_date DESC")
-        sales = self.cursor.fetchall()
-        
-        for sale in sales:
-            date_time, vehicle_info, customer_name, seller_name, final_price = sale
-            date_f = date_time.split(' ')[0]
-            price_f = f"R$ {final_price:.2f}"
-            
-            self.sales_tree.insert(
-                "", tk.END, values=(date_f, vehicle_info, customer_name, seller_name, price_f)
-            )
+    def load_sales_page(self):
+        """Carrega a próxima página do histórico de vendas (rolagem perto do fim)."""
+        self.load_tree_page(SALES_LISTING, self.sales_tree, format_sale_row, lambda sale: (sale.sale_ts, sale.id), descending=True)
+
+    def search_for_sale(self, entity, text, deliver):
+        """Busca por prefixo (índice FTS5) de veículos disponíveis ou clientes/vendedores ativos para a venda."""
+        def found(rows):
+            deliver([(row_id, f"{title} ({detail.strip()})" if detail.strip() else title) for _, row_id, title, detail in rows])
+        self.run_query(
+            lambda conn, job: search(conn, text, [entity], only_active=True),
+            found, group=self.sales_frame, key=f"search:{entity}"
+        )
 
-    def refresh_sales_dropdowns(self):
-        """Atualiza os menus de seleção de Veículo, Cliente e Vendedor na aba Vendas."""
-        
-        # 1. Veículos (em estoque E ATIVOS/DISPONÍVEIS)
-        self.cursor.execute("SELECT id, make, model, manufacture_year, model_year, sale_price, stock FROM vehicles WHERE stock > 0 AND is_active = 1 ORDER BY make, model ASC")
-        vehicle_rows = self.cursor.fetchall()
-        self.available_vehicles = {}
-        vehicle_names = []
-        
-        for vid, make, model, manuf_year, model_year, price, stock in vehicle_rows:
-            display_name = f"{make} {model} {manuf_year}/{model_year} (R$ {price:.2f})"
-            self.available_vehicles[display_name] = {'id': vid, 'price': price}
-            vehicle_names.append(display_name)
+    def add_to_cart(self):
+        """Adiciona ao carrinho o veículo, a quantidade e o preço unitário informados."""
+        vehicle_id = self.sale_vehicle_search.selected_key
+        price_str = self.sale_price_entry.get().strip()
+        quantity_str = self.sale_quantity_entry.get().strip() or "1"
 
-        if vehicle_names:
-            self.sale_vehicle_var.set(vehicle_names[0])
-        else:
-            self.sale_vehicle_var.set("Nenhum veículo em estoque")
-            
-        menu_veh = self.sale_vehicle_menu['menu']
-        menu_veh.delete(0, 'end')
-        for name in vehicle_names:
-            menu_veh.add_command(label=name, command=tk._setit(self.sale_vehicle_var, name))
-
-        # 2. Clientes (APENAS ATIVOS)
-        self.cursor.execute("SELECT name FROM customers WHERE is_active = 1 ORDER BY name ASC")
-        customer_names = [row[0] for row in self.cursor.fetchall()]
-        
-        if customer_names:
-            self.sale_customer_var.set(customer_names[0])
-        else:
-            self.sale_customer_var.set("Nenhum Cliente Cadastrado")
-            
-        menu_cust = self.sale_customer_menu['menu']
-        menu_cust.delete(0, 'end')
-        for name in customer_names:
-            menu_cust.add_command(label=name, command=tk._setit(self.sale_customer_var, name))
+        if vehicle_id is None or not price_str:
+            messagebox.showwarning("Atenção", "Selecione o veículo e informe o preço final.")
+            return False
 
-        # 3. Vendedores (APENAS ATIVOS)
-        self.cursor.execute("SELECT name FROM sellers WHERE is_active = 1 ORDER BY name ASC")
-        seller_names = [row[0] for row in self.cursor.fetchall()]
+        try:
+            price = parse_money(price_str)
+            quantity = int(quantity_str)
+            if price <= 0 or quantity <= 0:
+                raise ValueError
+        except ValueError:
+            messagebox.showerror("Erro de Entrada", "Preço de venda final ou quantidade inválidos.")
+            return False
+
+        label = self.sale_vehicle_search.selected_label.split('(')[0].strip()
+        self.cart.append((CartLine(vehicle_id, quantity, price), label))
+        self.cart_tree.insert('', tk.END, values=(label, quantity, format_money(price), format_money(quantity * price)))
+        self.update_cart_total()
+        self.sale_price_entry.delete(0, tk.END)
+        self.sale_quantity_entry.delete(0, tk.END)
+        self.sale_quantity_entry.insert(0, "1")
+        self.sale_vehicle_search.clear()
+        return True
+
+    def remove_from_cart(self):
+        """Remove do carrinho os itens selecionados."""
+        selected = self.cart_tree.selection()
+        if not selected:
+            return messagebox.showwarning("Atenção", "Selecione um item do carrinho.")
+        for item in sorted(selected, key=self.cart_tree.index, reverse=True):
+            del self.cart[self.cart_tree.index(item)]
+            self.cart_tree.delete(item)
+        self.update_cart_total()
+
+    def clear_cart(self):
+        self.cart.clear()
+        self.cart_tree.delete(*self.cart_tree.get_children())
+        self.update_cart_total()
+
+    def update_cart_total(self):
+        total = sum(line.quantity * line.unit_price_cents for line, _ in self.cart)
+        self.cart_total_label.config(text=f"Total do carrinho: {format_money(total)}")
 
-        if seller_names:
-            self.sale_seller_var.set(seller_names[0])
-        else:
-            self.sale_seller_var.set("Nenhum Vendedor Cadastrado")
-        
-        menu_seller = self.sale_seller_menu['menu']
-        menu_seller.delete(0, 'end')
-        for name in seller_names:
-            menu_seller.add_command(label=name, command=tk._setit(self.sale_seller_var, name))
+    def register_sale(self):
+        """Registra a venda de todos os itens do carrinho numa única transação.
 
+        Com o carrinho vazio, vende o veículo preenchido nos campos (quantidade padrão 1).
+        """
+        customer_id = self.sale_customer_search.selected_key
+        seller_id = self.sale_seller_search.selected_key
 
-    def register_sale(self):
-        """Registra uma venda."""
-        vehicle_display = self.sale_vehicle_var.get()
-        customer_name = self.sale_customer_var.get()
-        seller_name = self.sale_seller_var.get()
-        final_price_str = self.sale_price_entry.get().strip()
-        
-        if vehicle_display == "Nenhum veículo em estoque" or customer_name == "Nenhum Cliente Cadastrado" or seller_name == "Nenhum Vendedor Cadastrado" or not final_price_str:
-            return messagebox.showwarning("Atenção", "Selecione o veículo, o cliente, o vendedor e informe o preço final.")
-            
-        try:
-            final_price = float(final_price_str.replace(',', '.'))
-            if final_price <= 0: raise ValueError
-        except ValueError:
-            return messagebox.showerror("Erro de Entrada", "Preço de venda final inválido.")
-            
-        # Obtém dados do veículo
-        vehicle_data = self.available_vehicles.get(vehicle_display)
-        if not vehicle_data:
-            return messagebox.showerror("Erro", "Veículo selecionado não é válido.")
+        if customer_id is None or seller_id is None:
+            return messagebox.showwarning("Atenção", "Selecione o cliente e o vendedor.")
+        if not self.cart and not self.add_to_cart():
+            return
 
-        vehicle_id = vehicle_data['id']
-        
         try:
-            # 1. Atualizar Estoque (deduz 1 unidade)
-            self.cursor.execute("UPDATE vehicles SET stock = stock - 1 WHERE id = ? AND stock > 0", (vehicle_id,))
-            if self.cursor.rowcount == 0:
-                self.conn.rollback()
-                return messagebox.showwarning("Estoque", "Estoque insuficiente para este veículo.")
-                
-            # 2. Registrar Venda
-            vehicle_info_for_sale = vehicle_display.split('(')[0].strip()
-            date_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            self.cursor.execute(
-                "INSERT INTO sales (vehicle_id, vehicle_info, customer_name, seller_name, final_price, sale_date) VALUES (?, ?, ?, ?, ?, ?)", 
-                (vehicle_id, vehicle_info_for_sale, customer_name, seller_name, final_price, date_time)
-            )
-            
-            # 3. Verificar o estoque após a venda e inativar se chegar a zero (LÓGICA ALTERADA)
-            self.cursor.execute("SELECT stock FROM vehicles WHERE id = ?", (vehicle_id,))
-            current_stock = self.cursor.fetchone()[0]
-            
-            if current_stock == 0:
-                sale_date_only = datetime.now().strftime("%Y-%m-%d")
-                # Inativa e registra a data da venda
-                self.cursor.execute("UPDATE vehicles SET is_active = 0, sale_date_only = ? WHERE id = ?", (sale_date_only, vehicle_id))
-                messagebox.showinfo("Estoque Zero", f"O veículo {vehicle_info_for_sale} atingiu estoque 0 e foi marcado como VENDIDO e inativado automaticamente.")
-            
-            self.conn.commit()
-            
-            messagebox.showinfo("Venda Concluída", f"Venda de {vehicle_info_for_sale} (Vendedor: {seller_name}) registrada por R$ {final_price:.2f}.")
-            self.sale_price_entry.delete(0, tk.END)
-            self.refresh_sales_dropdowns()
-            self.refresh_sales_history()
-            self.refresh_inventory_list() # Atualiza estoque na aba de Estoque
-            
-            # Atualiza gráficos após nova venda
-            if self.notebook.tab(self.notebook.select(), "text") == "7. Análise Gráfica":
-                self.plot_analytics()
-            
+            receipt = self.sales.register_cart(customer_id, seller_id, [line for line, _ in self.cart])
+        except OutOfStockError as e:
+            return messagebox.showwarning("Estoque", str(e))
+        except ValidationError as e:
+            return messagebox.showerror("Erro", str(e))
         except sqlite3.Error as e:
-            self.conn.rollback()
-            messagebox.showerror("Erro", f"Erro ao registrar venda: {e}")
+            return messagebox.showerror("Erro", f"Erro ao registrar venda: {e}")
+
+        labels = dict((line.vehicle_id, label) for line, label in self.cart)
+        if receipt.sold_out:
+            sold_out = ", ".join(labels[vehicle_id] for vehicle_id in receipt.sold_out)
+            messagebox.showinfo("Estoque Zero", f"Atingiram estoque 0 e foram marcados como VENDIDOS e inativados automaticamente: {sold_out}.")
+        if len(self.cart) == 1 and receipt.units == 1:
+            message = f"Venda de {self.cart[0][1]} (Vendedor: {receipt.seller_name}) registrada por {format_money(receipt.total_cents)}."
+        else:
+            message = f"Venda de {receipt.units} unidade(s) (Vendedor: {receipt.seller_name}) registrada por {format_money(receipt.total_cents)}."
+        messagebox.showinfo("Venda Concluída", message)
+        self.clear_cart()
+        # Uma única atualização das listas para o carrinho inteiro
+        self.refresh_sales_history()
+        if self.tab_built(self.inventory_frame):
+            self.refresh_inventory_list() # Atualiza estoque na aba de Estoque
 
     def setup_sales_tab(self, frame):
         """Configura a aba de Gestão de Vendas."""
@@ -1058,41 +1289,53 @@ class VehicleStoreApp:
         sale_frame = ttk.LabelFrame(frame, text="Registrar Nova Venda", padding="10")
         sale_frame.pack(fill='x', padx=5, pady=5)
         
-        # Variáveis
-        self.sale_vehicle_var = tk.StringVar(value="Nenhum veículo em estoque")
-        self.sale_customer_var = tk.StringVar(value="Nenhum Cliente Cadastrado")
-        self.sale_seller_var = tk.StringVar(value="Nenhum Vendedor Cadastrado")
-
-        # Linha 0: Veículo
+        # Campos de busca (digite parte do nome, e-mail ou modelo; nada é carregado antes)
         ttk.Label(sale_frame, text="Veículo a ser vendido:").grid(row=0, column=0, padx=5, pady=5, sticky='w')
-        self.sale_vehicle_menu = ttk.OptionMenu(sale_frame, self.sale_vehicle_var, self.sale_vehicle_var.get())
-        self.sale_vehicle_menu.config(width=40)
-        self.sale_vehicle_menu.grid(row=0, column=1, padx=5, pady=5, sticky='w')
+        self.sale_vehicle_search = SearchEntry(sale_frame, lambda text, deliver: self.search_for_sale("vehicles", text, deliver), width=50)
+        self.sale_vehicle_search.grid(row=0, column=1, padx=5, pady=5, sticky='w')
         
         # Linha 1: Cliente
         ttk.Label(sale_frame, text="Cliente Comprador:").grid(row=1, column=0, padx=5, pady=5, sticky='w')
-        self.sale_customer_menu = ttk.OptionMenu(sale_frame, self.sale_customer_var, self.sale_customer_var.get())
-        self.sale_customer_menu.config(width=40)
-        self.sale_customer_menu.grid(row=1, column=1, padx=5, pady=5, sticky='w')
+        self.sale_customer_search = SearchEntry(sale_frame, lambda text, deliver: self.search_for_sale("customers", text, deliver), width=50)
+        self.sale_customer_search.grid(row=1, column=1, padx=5, pady=5, sticky='w')
 
         # Linha 2: Vendedor
         ttk.Label(sale_frame, text="Vendedor:").grid(row=2, column=0, padx=5, pady=5, sticky='w')
-        self.sale_seller_menu = ttk.OptionMenu(sale_frame, self.sale_seller_var, self.sale_seller_var.get())
-        self.sale_seller_menu.config(width=40)
-        self.sale_seller_menu.grid(row=2, column=1, padx=5, pady=5, sticky='w')
+        self.sale_seller_search = SearchEntry(sale_frame, lambda text, deliver: self.search_for_sale("sellers", text, deliver), width=50)
+        self.sale_seller_search.grid(row=2, column=1, padx=5, pady=5, sticky='w')
         
         # Linha 3: Preço Final
         ttk.Label(sale_frame, text="Preço Final de Venda (R$):").grid(row=3, column=0, padx=5, pady=5, sticky='w')
         self.sale_price_entry = ttk.Entry(sale_frame, width=20)
         self.sale_price_entry.grid(row=3, column=1, padx=5, pady=5, sticky='w')
         
-        ttk.Button(sale_frame, text="FINALIZAR VENDA", command=self.register_sale).grid(row=4, column=0, columnspan=2, pady=10, sticky='we')
+        # Linha 4: Quantidade (vendas de frota)
+        ttk.Label(sale_frame, text="Quantidade:").grid(row=4, column=0, padx=5, pady=5, sticky='w')
+        self.sale_quantity_entry = ttk.Entry(sale_frame, width=8)
+        self.sale_quantity_entry.insert(0, "1")
+        self.sale_quantity_entry.grid(row=4, column=1, padx=5, pady=5, sticky='w')
+
+        ttk.Button(sale_frame, text="Adicionar ao Carrinho", command=self.add_to_cart).grid(row=5, column=0, padx=5, pady=5, sticky='we')
+        ttk.Button(sale_frame, text="Remover Item", command=self.remove_from_cart).grid(row=5, column=1, padx=5, pady=5, sticky='w')
+
+        # Carrinho: vários veículos e quantidades gravados numa única venda
+        self.cart = []
+        cart_columns = ("Veículo", "Qtd", "Preço Unit.", "Subtotal")
+        self.cart_tree = ttk.Treeview(sale_frame, columns=cart_columns, show='headings', height=4)
+        for column, width, anchor in zip(cart_columns, (250, 50, 110, 110), ('w', 'center', 'e', 'e')):
+            self.cart_tree.heading(column, text=column)
+            self.cart_tree.column(column, width=width, anchor=anchor)
+        self.cart_tree.grid(row=6, column=0, columnspan=2, padx=5, pady=5, sticky='we')
+        self.cart_total_label = ttk.Label(sale_frame, text=f"Total do carrinho: {format_money(0)}")
+        self.cart_total_label.grid(row=7, column=0, columnspan=2, padx=5, sticky='e')
+
+        ttk.Button(sale_frame, text="FINALIZAR VENDA", command=self.register_sale).grid(row=8, column=0, columnspan=2, pady=10, sticky='we')
 
         # Histórico de Vendas (Treeview)
         ttk.Label(frame, text="Histórico de Transações de Vendas:", font=("Arial", 12)).pack(pady=(15, 5), anchor='w')
 
         # Colunas
-        columns = ("Data", "Veículo", "Cliente", "Vendedor", "Total")
+        columns = ("Data", "Veículo", "Cliente", "Vendedor", "Qtd", "Total")
         self.sales_tree = ttk.Treeview(frame, columns=columns, show='headings')
         self.sales_tree.pack(fill='both', expand=True, padx=5, pady=5)
 
@@ -1104,106 +1347,99 @@ class VehicleStoreApp:
         self.sales_tree.column("Cliente", width=150, anchor='w')
         self.sales_tree.heading("Vendedor", text="Vendedor")
         self.sales_tree.column("Vendedor", width=150, anchor='w')
+        self.sales_tree.heading("Qtd", text="Qtd")
+        self.sales_tree.column("Qtd", width=50, anchor='center')
         self.sales_tree.heading("Total", text="Total Venda")
         self.sales_tree.column("Total", width=100, anchor='e')
 
         tree_scroll_sales = ttk.Scrollbar(frame, orient="vertical", command=self.sales_tree.yview)
         tree_scroll_sales.pack(side='right', fill='y')
-        self.sales_tree.configure(yscrollcommand=tree_scroll_sales.set)
+        self.sales_tree.configure(yscrollcommand=self.paged_scroll(tree_scroll_sales, self.load_sales_page))
 
     # --- SETUP E LÓGICA DO MÓDULO 6: RELATÓRIOS (Mantido) ---
     
-    def fetch_report_data(self, report_type):
-        """Busca os dados do DB baseados no tipo e filtros."""
+    def prepare_report(self, report_type):
+        """Valida os filtros (na thread do Tk) e retorna (colunas, fetch).
+
+        fetch(conn, job) roda na thread de tarefas longas e devolve as linhas como cursor ou
+        iterador (lidas sob demanda pela exportação); (None, None) se os filtros forem inválidos.
+        """
         include_inactive = self.include_inactive_var.get()
-        status_filter_sql = ""
 
         if report_type == "Estoque":
             threshold = self.get_stock_threshold()
             if threshold is None: return None, None
             
-            # Query ATUALIZADA com sale_date_only
-            query = f"SELECT id, make, model, manufacture_year, model_year, color, sale_price, stock, is_active, sale_date_only FROM vehicles WHERE stock <= ? ORDER BY stock ASC"
-            self.cursor.execute(query, (threshold,))
-            data = self.cursor.fetchall()
-            
             # Colunas ATUALIZADAS com Status e Data Venda
             columns = ["ID", "Marca", "Modelo", "Ano Fab.", "Ano Mod.", "Cor", "Preço de Venda (R$)", "Estoque", "Status", "Data Venda"]
-            
-            processed_data = []
-            for row in data:
-                vid, make, model, manuf_year, model_year, color, price, stock, is_active, sale_date = row
-                
-                # Aplica o filtro de inativos E a lógica de status
-                if not include_inactive and not is_active:
-                    continue # Pula inativos se o checkbox não estiver marcado
-                
-                status_text = "Disponível" if is_active else "Vendido"
-                display_sale_date = sale_date if not is_active and sale_date else "" # Mostra data só se Vendido
-                
-                processed_data.append((
-                    vid, make, model, manuf_year, model_year, color, price, stock, status_text, display_sale_date
-                ))
-                
-            return processed_data, columns
+            return columns, lambda conn, job: ReportService(conn).inventory_report(threshold, include_inactive)
 
         elif report_type == "Vendas":
             start_date = self.start_date_var.get().strip()
             end_date = self.end_date_var.get().strip()
             
             try:
-                datetime.strptime(start_date, "%Y-%m-%d")
-                datetime.strptime(end_date, "%Y-%m-%d")
+                # Período convertido em faixa de epoch: do início do dia inicial ao fim do dia final
+                start_ts = int(datetime.strptime(start_date, "%Y-%m-%d").timestamp())
+                end_ts = int((datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1)).timestamp()) - 1
             except ValueError:
                 messagebox.showerror("Erro de Filtro", "Formato de data inválido. Use AAAA-MM-DD.")
                 return None, None
 
-            # Query para incluir vendedor
-            query = """
-                SELECT sale_date, vehicle_info, customer_name, seller_name, final_price 
-                FROM sales 
-                WHERE sale_date BETWEEN ? AND ? || ' 23:59:59' 
-                ORDER BY sale_date DESC
-            """
-            self.cursor.execute(query, (start_date, end_date))
-            data = self.cursor.fetchall()
             # Colunas
-            columns = ["Data/Hora Venda", "Veículo", "Cliente", "Vendedor", "Total Venda (R$)"]
-            return data, columns
+            columns = ["Data/Hora Venda", "Veículo", "Cliente", "Vendedor", "Qtd", "Total Venda (R$)"]
+            return columns, lambda conn, job: ReportService(conn).sales_report(start_ts, end_ts)
+
+        elif report_type == "Resumo de Vendas":
+            try:
+                start_day = parse_day_key(self.start_date_var.get())
+                end_day = parse_day_key(self.end_date_var.get())
+            except ValueError:
+                messagebox.showerror("Erro de Filtro", "Formato de data inválido. Use AAAA-MM-DD.")
+                return None, None
+
+            columns = ["Data", "Vendedor", "Marca", "Nº de Vendas", "Faturamento (R$)"]
+            return columns, lambda conn, job: ReportService(conn).sales_summary(start_day, end_day)
             
         return None, None
 
 
     def generate_report(self):
-        """Gera o relatório em XLSX com base na seleção e filtros."""
-        if pd is None:
-            messagebox.showerror("Erro de Dependência", "Para gerar relatórios Excel, você precisa instalar as bibliotecas pandas e openpyxl:\nExecute: pip install pandas openpyxl")
-            return
-            
+        """Exporta o relatório (XLSX, CSV ou Parquet) lendo e gravando as linhas em blocos, em segundo plano."""
         report_type = self.report_type.get()
-        data, columns = self.fetch_report_data(report_type)
-        
-        if data is None: return
-        if not data:
-            return messagebox.showinfo("Relatório Vazio", f"Nenhum dado encontrado para o relatório de {report_type}.")
+        columns, fetch = self.prepare_report(report_type)
+        if fetch is None: return
 
         default_filename = f"Relatorio_{report_type}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         file_path = filedialog.asksaveasfilename(
             defaultextension=".xlsx",
             initialfile=default_filename,
-            filetypes=[("Excel files", "*.xlsx")],
-            title="Salvar Relatório Excel"
+            filetypes=[(f"{name} files", f"*{extension}") for extension, (name, _) in EXPORT_FORMATS.items()],
+            title="Salvar Relatório"
         )
         
         if not file_path: return
 
-        try:
-            df = pd.DataFrame(data, columns=columns)
-            df.to_excel(file_path, index=False, sheet_name=report_type)
-            messagebox.showinfo("Sucesso", f"Relatório de {report_type} salvo com sucesso em:\n{file_path}")
-            
-        except Exception as e:
-            messagebox.showerror("Erro ao Salvar", f"Ocorreu um erro ao salvar o arquivo: {e}")
+        library = missing_dependency(file_path)
+        if library is not None:
+            messagebox.showerror("Erro de Dependência", f"Para gerar este formato de relatório, você precisa instalar a biblioteca {library}:\nExecute: pip install {library}")
+            return
+
+        def export(conn, job):
+            job.set_message(f"Exportando {report_type}...")
+            return export_rows(
+                fetch(conn, job), columns, file_path, sheet_name=report_type,
+                progress=lambda written: job.set_message(f"{written} linhas gravadas...")
+            )
+
+        def done(written):
+            if not written:
+                return messagebox.showinfo("Relatório Vazio", f"Nenhum dado encontrado para o relatório de {report_type}.")
+            messagebox.showinfo("Sucesso", f"Relatório de {report_type} salvo com sucesso ({written} linhas) em:\n{file_path}")
+
+        # Thread de tarefas longas: não é cancelada ao trocar de aba (o arquivo já foi escolhido),
+        # só pelo botão Cancelar, e não atrasa as consultas das abas
+        self.run_long_job(export, done, error_title="Erro ao Salvar")
 
     def setup_reports_tab(self, frame):
         """Configura os widgets para a aba de Relatórios."""
@@ -1213,7 +1449,7 @@ class VehicleStoreApp:
         type_frame.pack(fill='x', padx=5, pady=5)
         
         ttk.Label(type_frame, text="Tipo de Relatório:").grid(row=0, column=0, padx=5, pady=5, sticky='w')
-        report_options = ["Estoque", "Vendas"]
+        report_options = ["Estoque", "Vendas", "Resumo de Vendas"]
         
         ttk.OptionMenu(type_frame, self.report_type, self.report_type.get(), *report_options, command=self.toggle_report_filters).grid(row=0, column=1, padx=5, pady=5, sticky='we')
         
@@ -1224,7 +1460,7 @@ class VehicleStoreApp:
         self.toggle_report_filters(self.report_type.get())
 
         # Botão Gerar
-        ttk.Button(frame, text="GERAR RELATÓRIO (XLSX)", command=self.generate_report).pack(pady=20, fill='x', padx=5)
+        ttk.Button(frame, text="GERAR RELATÓRIO (XLSX/CSV/Parquet)", command=self.generate_report).pack(pady=20, fill='x', padx=5)
 
     def toggle_report_filters(self, report_type):
         """Alterna os campos de filtro baseados no tipo de relatório selecionado."""
@@ -1245,7 +1481,7 @@ class VehicleStoreApp:
                 variable=self.include_inactive_var
             ).grid(row=1, column=0, columnspan=3, padx=5, pady=10, sticky='w')
 
-        elif report_type == "Vendas":
+        elif report_type in ("Vendas", "Resumo de Vendas"):
             self.filters_frame.config(text="Filtros de Vendas por Período (AAAA-MM-DD)")
 
             ttk.Label(self.filters_frame, text="Data Inicial:").grid(row=0, column=0, padx=5, pady=5, sticky='w')
@@ -1260,162 +1496,202 @@ class VehicleStoreApp:
     
     def setup_analytics_tab(self, frame):
         """Configura a aba de Análise Gráfica."""
+        # Filtros (período, granularidade, marca e vendedor); datas vazias = sem limite
+        filters = ttk.LabelFrame(frame, text="Filtros", padding="5")
+        filters.pack(fill='x', padx=5, pady=5)
+
+        ttk.Label(filters, text="De (AAAA-MM-DD):").grid(row=0, column=0, padx=5, pady=2, sticky='w')
+        self.analytics_start_var = tk.StringVar()
+        ttk.Entry(filters, width=12, textvariable=self.analytics_start_var).grid(row=0, column=1, padx=5, pady=2, sticky='w')
+        ttk.Label(filters, text="Até:").grid(row=0, column=2, padx=5, pady=2, sticky='w')
+        self.analytics_end_var = tk.StringVar()
+        ttk.Entry(filters, width=12, textvariable=self.analytics_end_var).grid(row=0, column=3, padx=5, pady=2, sticky='w')
+
+        ttk.Label(filters, text="Agrupar por:").grid(row=0, column=4, padx=5, pady=2, sticky='w')
+        self.analytics_granularity_var = tk.StringVar(value="Mês")
+        ttk.Combobox(filters, textvariable=self.analytics_granularity_var, values=list(ANALYTICS_GRANULARITIES),
+                     state='readonly', width=10).grid(row=0, column=5, padx=5, pady=2, sticky='w')
+
+        ttk.Label(filters, text="Marca:").grid(row=1, column=0, padx=5, pady=2, sticky='w')
+        self.analytics_make_var = tk.StringVar(value=ALL_MAKES)
+        self.analytics_make_combo = ttk.Combobox(filters, textvariable=self.analytics_make_var, values=[ALL_MAKES], state='readonly', width=15)
+        self.analytics_make_combo.grid(row=1, column=1, padx=5, pady=2, sticky='w')
+
+        # Vendedor: busca por prefixo; vazio = todos
+        ttk.Label(filters, text="Vendedor:").grid(row=1, column=2, padx=5, pady=2, sticky='w')
+        self.analytics_seller_search = SearchEntry(filters, self.search_analytics_seller, width=25)
+        self.analytics_seller_search.grid(row=1, column=3, columnspan=2, padx=5, pady=2, sticky='w')
+
+        ttk.Button(filters, text="Aplicar", command=self.plot_analytics).grid(row=1, column=5, padx=5, pady=2, sticky='we')
+
         # Frame para conter a área do gráfico e o toolbar
         self.plot_container = ttk.Frame(frame)
         self.plot_container.pack(fill='both', expand=True, padx=5, pady=5)
         
-        ttk.Label(self.plot_container, text="Clique na aba para carregar gráficos ou instale dependências (pandas, matplotlib)...").pack(pady=20)
-        
-        # Inicialização do contêiner do Matplotlib (será preenchido em plot_analytics)
-        self.matplotlib_canvas = None
+        ttk.Label(self.plot_container, text="Clique na aba para carregar gráficos ou instale a dependência (matplotlib)...").pack(pady=20)
+
+    def search_analytics_seller(self, text, deliver):
+        """Busca de vendedores (ativos ou não) para o filtro da análise."""
+        def found(rows):
+            deliver([(row_id, title) for _, row_id, title, _ in rows])
+        self.run_query(lambda conn, job: search(conn, text, ["sellers"]), found, group=self.analytics_frame, key="search:analytics")
+
+    def refresh_analytics_makes(self):
+        """Marcas do filtro da análise, do cache do catálogo."""
+        self.inventory.refresh_catalog()
+        self.analytics_make_combo.config(values=[ALL_MAKES, *self.catalog.makes])
+
+    def analytics_filters(self):
+        """Lê os filtros da aba (thread do Tk); None (com o aviso exibido) se algum for inválido."""
+        try:
+            start_day = parse_day_key(self.analytics_start_var.get()) if self.analytics_start_var.get().strip() else None
+            end_day = parse_day_key(self.analytics_end_var.get()) if self.analytics_end_var.get().strip() else None
+        except ValueError:
+            messagebox.showerror("Erro de Filtro", "Formato de data inválido. Use AAAA-MM-DD.")
+            return None
+        if start_day is not None and end_day is not None and start_day > end_day:
+            messagebox.showerror("Erro de Filtro", "A data inicial deve ser anterior à final.")
+            return None
+        make = self.analytics_make_var.get()
+        # Texto apagado na busca = todos os vendedores
+        seller_id = None
+        if self.analytics_seller_search.text_var.get().strip():
+            seller_id = self.analytics_seller_search.selected_key
+            if seller_id is None:
+                messagebox.showwarning("Atenção", "Escolha o vendedor na lista de sugestões ou apague o texto.")
+                return None
+        return AnalyticsFilter(
+            start_day, end_day, ANALYTICS_GRANULARITIES[self.analytics_granularity_var.get()],
+            None if make == ALL_MAKES else make, seller_id
+        )
 
     def plot_analytics(self):
-        """Gera e exibe os 4 gráficos de análise de dados."""
-        if plt is None or pd is None:
+        """Busca os dados em segundo plano e então atualiza os 4 gráficos de análise."""
+        if load_chart_backend() is None:
             # Garante que a mensagem de erro da dependência seja exibida se estiver faltando
             for widget in self.plot_container.winfo_children(): widget.destroy()
-            ttk.Label(self.plot_container, text="ERRO: As bibliotecas pandas e/ou matplotlib não foram carregadas.\nInstale com 'pip install pandas matplotlib'").pack(pady=20)
+            ttk.Label(self.plot_container, text="ERRO: A biblioteca matplotlib não foi carregada.\nInstale com 'pip install matplotlib'").pack(pady=20)
             return
 
-        # Limpa o contêiner anterior
-        for widget in self.plot_container.winfo_children():
-            widget.destroy()
-        
-        # Cria a figura (2 linhas, 2 colunas)
-        fig, axes = plt.subplots(2, 2, figsize=(10, 6))
-        fig.suptitle('Análise de Dados de Vendas e Estoque de Veículos', fontsize=14)
-        
-        # --- Consulta de Dados ---
-        
-        # 1. Dados de Vendas (para Vendas por Mês e Vendas por Vendedor)
-        self.cursor.execute("SELECT sale_date, seller_name, final_price FROM sales")
-        sales_data = self.cursor.fetchall()
-        df_sales = pd.DataFrame(sales_data, columns=['sale_date', 'seller_name', 'final_price'])
-        
-        # 2. Dados de Estoque (para Estoque por Marca e Preço)
-        self.cursor.execute("SELECT make, stock, sale_price FROM vehicles WHERE is_active = 1")
-        stock_data = self.cursor.fetchall()
-        df_stock = pd.DataFrame(stock_data, columns=['make', 'stock', 'sale_price'])
+        self.refresh_analytics_makes()
+        filters = self.analytics_filters()
+        if filters is None:
+            return
+        known_version = self.analytics_version
+
+        def fetch(conn, job):
+            reports = ReportService(conn)
+            version = (reports.analytics_version(), filters)
+            return version, None if version == known_version else reports.analytics_data(filters)
+        self.run_query(fetch, self.draw_analytics, group=self.analytics_frame, key="analytics")
+
+    def draw_analytics(self, result):
+        """Atualiza os gráficos com os dados já consultados (thread do Tk); None se nada mudou."""
+        version, data = result
+        if data is None:
+            return
 
-        
-        # --- GRÁFICO 1: Vendas por Mês (Linha) ---
-        ax1 = axes[0, 0]
-        if not df_sales.empty:
-            df_sales['sale_date'] = pd.to_datetime(df_sales['sale_date'])
-            df_sales['month_year'] = df_sales['sale_date'].dt.to_period('M')
-            sales_by_month = df_sales.groupby('month_year').size()
-            
-            sales_by_month.plot(kind='line', ax=ax1, marker='o', color='skyblue')
-            ax1.set_title('1. Vendas por Mês', fontsize=10)
-            ax1.set_xlabel('Mês/Ano', fontsize=8)
-            ax1.set_ylabel('Nº de Vendas', fontsize=8)
-            ax1.tick_params(axis='x', rotation=45, labelsize=7)
-            ax1.grid(axis='y', linestyle='--')
-        else:
-            ax1.text(0.5, 0.5, 'Sem dados de Vendas', ha='center', va='center', fontsize=10)
+        if self.analytics_chart is None:
+            # Primeiro desenho: troca o aviso pela figura, o canvas e a barra de ferramentas
+            for widget in self.plot_container.winfo_children():
+                widget.destroy()
+            AnalyticsChart, FigureCanvasTkAgg, NavigationToolbar2Tk = load_chart_backend()
+            self.analytics_chart = AnalyticsChart()
+            self.matplotlib_canvas = FigureCanvasTkAgg(self.analytics_chart.figure, master=self.plot_container)
+            self.matplotlib_canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+            # Barra de Ferramentas (Zoom, Pan, Salvar)
+            NavigationToolbar2Tk(self.matplotlib_canvas, self.plot_container).update()
+
+        self.analytics_chart.update(data, version[1].granularity)
+        self.analytics_version = version
+        self.matplotlib_canvas.draw_idle()
+
+    def close_analytics(self):
+        """Libera a figura e o canvas da análise gráfica."""
+        if self.analytics_chart is not None:
+            self.matplotlib_canvas.get_tk_widget().destroy()
+            self.analytics_chart.close()
+            self.analytics_chart = self.matplotlib_canvas = self.analytics_version = None
+        
+    # --- MÓDULO 8: BUSCA GERAL ---
+
+    def run_global_search(self, event=None):
+        """Busca o texto digitado em veículos, clientes, vendedores e vendas (índice FTS5)."""
+        text = self.global_search_entry.get()
+        label = self.global_search_entity.get()
+        entities = [entity for entity, entity_label in ENTITY_LABELS.items() if entity_label == label] or None
+
+        def show(rows):
+            self.global_search_tree.delete(*self.global_search_tree.get_children())
+            for entity, row_id, title, detail in rows:
+                self.global_search_tree.insert('', 'end', values=(ENTITY_LABELS[entity], row_id, title, detail))
+
+        self.run_query(
+            lambda conn, job: search(conn, text, entities, limit=GLOBAL_SEARCH_LIMIT),
+            show, group=self.search_frame, key="search:global"
+        )
 
-        # --- GRÁFICO 2: Estoque Disponível por Marca (Barra) ---
-        ax2 = axes[0, 1]
-        if not df_stock.empty:
-            stock_by_make = df_stock.groupby('make')['stock'].sum().sort_values(ascending=False)
-            
-            stock_by_make.plot(kind='bar', ax=ax2, color='lightcoral')
-            ax2.set_title('2. Estoque Disponível por Marca', fontsize=10)
-            ax2.set_xlabel('Marca', fontsize=8)
-            ax2.set_ylabel('Qtde. em Estoque', fontsize=8)
-            ax2.tick_params(axis='x', rotation=45, labelsize=7)
-            ax2.grid(axis='y', linestyle='--')
-        else:
-            ax2.text(0.5, 0.5, 'Sem veículos Disponíveis', ha='center', va='center', fontsize=10)
+    def setup_search_tab(self, frame):
+        """Configura a aba de Busca Geral."""
+        input_frame = ttk.LabelFrame(frame, text="Buscar em Veículos, Clientes, Vendedores e Vendas", padding="10")
+        input_frame.pack(fill='x', padx=5, pady=5)
 
+        ttk.Label(input_frame, text="Texto:").grid(row=0, column=0, padx=5, pady=5, sticky='w')
+        self.global_search_entry = ttk.Entry(input_frame, width=50)
+        self.global_search_entry.grid(row=0, column=1, padx=5, pady=5, sticky='w')
+        self.global_search_entry.bind("<KeyRelease>", self.run_global_search)
 
-        # --- GRÁFICO 3: Top 5 Vendedores (Barra Horizontal) ---
-        ax3 = axes[1, 0]
-        if not df_sales.empty:
-            sales_by_seller = df_sales.groupby('seller_name').size().nlargest(5)
-            
-            sales_by_seller.plot(kind='barh', ax=ax3, color='lightgreen')
-            ax3.set_title('3. Top 5 Vendedores (Nº de Vendas)', fontsize=10)
-            ax3.set_xlabel('Nº de Vendas', fontsize=8)
-            ax3.set_ylabel('Vendedor', fontsize=8)
-            ax3.tick_params(axis='y', labelsize=8)
-            ax3.grid(axis='x', linestyle='--')
-        else:
-            ax3.text(0.5, 0.5, 'Sem dados de Vendedores', ha='center', va='center', fontsize=10)
+        ttk.Label(input_frame, text="Tipo:").grid(row=0, column=2, padx=5, pady=5, sticky='w')
+        self.global_search_entity = ttk.Combobox(input_frame, values=["Todos"] + list(ENTITY_LABELS.values()), state='readonly', width=12)
+        self.global_search_entity.set("Todos")
+        self.global_search_entity.grid(row=0, column=3, padx=5, pady=5, sticky='w')
+        self.global_search_entity.bind("<<ComboboxSelected>>", self.run_global_search)
 
-        # --- GRÁFICO 4: Distribuição de Preço (Histograma) ---
-        ax4 = axes[1, 1]
-        if not df_stock.empty and not df_stock['sale_price'].empty:
-            # Garante que o número de bins é apropriado para a quantidade de dados
-            num_bins = min(10, len(df_stock['sale_price'].unique())) if len(df_stock) > 1 else 1
-            
-            ax4.hist(df_stock['sale_price'], bins=num_bins, color='gold', edgecolor='black')
-            ax4.set_title('4. Distribuição de Preços (Estoque Disponível)', fontsize=10)
-            ax4.set_xlabel('Preço (R$)', fontsize=8)
-            ax4.set_ylabel('Frequência', fontsize=8)
-            ax4.ticklabel_format(style='plain', axis='x')
-            ax4.tick_params(axis='x', rotation=45, labelsize=7)
-        else:
-            ax4.text(0.5, 0.5, 'Sem dados de Preço para Estoque', ha='center', va='center', fontsize=10)
+        ttk.Label(frame, text="Resultados (mais relevantes primeiro):", font=("Arial", 12)).pack(pady=(15, 5), anchor='w')
 
-        # Ajusta o layout para evitar sobreposição
-        fig.tight_layout(rect=[0, 0.03, 1, 0.95])
+        columns = ("Tipo", "ID", "Descrição", "Detalhe")
+        self.global_search_tree = ttk.Treeview(frame, columns=columns, show='headings')
+        self.global_search_tree.pack(fill='both', expand=True, padx=5, pady=5)
 
-        # --- Embedding Matplotlib na Aba Tkinter ---
-        
-        # Cria o Canvas do Matplotlib
-        self.matplotlib_canvas = FigureCanvasTkAgg(fig, master=self.plot_container)
-        canvas_widget = self.matplotlib_canvas.get_tk_widget()
-        canvas_widget.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
-
-        # Adiciona a Barra de Ferramentas (Zoom, Pan, Salvar)
-        toolbar = NavigationToolbar2Tk(self.matplotlib_canvas, self.plot_container)
-        toolbar.update()
-        self.matplotlib_canvas.draw()
-        
-    # --- NOVO MÓDULO 8: GESTÃO DE USUÁRIOS (ADMIN) ---
+        for col in columns:
+            self.global_search_tree.heading(col, text=col)
 
-    def refresh_user_list(self):
-        """Limpa e recarrega a Treeview de Usuários."""
-        for item in self.user_tree.get_children(): self.user_tree.delete(item)
+        self.global_search_tree.column("Tipo", width=80, anchor='center')
+        self.global_search_tree.column("ID", width=60, anchor='center')
+        self.global_search_tree.column("Descrição", width=250, anchor='w')
+        self.global_search_tree.column("Detalhe", width=350, anchor='w')
+
+        tree_scroll = ttk.Scrollbar(frame, orient="vertical", command=self.global_search_tree.yview)
+        tree_scroll.pack(side='right', fill='y')
+        self.global_search_tree.configure(yscrollcommand=tree_scroll.set)
 
-        self.cursor.execute("SELECT id, username, name, role FROM users ORDER BY role DESC, username ASC")
-        users = self.cursor.fetchall()
-        for user in users:
-            uid, username, name, role = user
-            tag = 'admin' if role == 'Admin' else 'user'
-            self.user_tree.insert("", tk.END, values=(uid, username, name, role), tags=(tag,))
+    # --- NOVO MÓDULO 9: GESTÃO DE USUÁRIOS (ADMIN) ---
+
+    def refresh_user_list(self):
+        """Recarrega a Treeview de Usuários somente se a tabela mudou (lista pequena, sem diff por linha)."""
+        self.sync_tree(
+            USERS_LISTING, self.user_tree,
+            lambda user: (user, ('admin' if user.role == 'Admin' else 'user',))
+        )
 
     def add_user(self):
         """Adiciona um novo usuário (padrão 'Usuário')."""
-        username = self.user_username_entry.get().strip()
-        name = self.user_name_entry.get().strip().title()
-        password = self.user_password_entry.get().strip()
-
-        if not username or not password or not name:
-            return messagebox.showwarning("Atenção", "Todos os campos de cadastro são obrigatórios.")
-        
-        hashed_password = hash_password(password)
-        
         try:
             # Novo usuário é sempre criado com perfil "Usuário"
-            self.cursor.execute(
-                "INSERT INTO users (username, hashed_password, role, name) VALUES (?, ?, ?, ?)", 
-                (username, hashed_password, 'Usuário', name)
-            )
-            self.conn.commit()
-            messagebox.showinfo("Sucesso", f"Usuário '{username}' ({name}) cadastrado com perfil 'Usuário'.")
-            
-            # Limpa campos
-            self.user_username_entry.delete(0, tk.END)
-            self.user_name_entry.delete(0, tk.END)
-            self.user_password_entry.delete(0, tk.END)
-            self.refresh_user_list()
-            
-        except sqlite3.IntegrityError:
-            messagebox.showerror("Erro", "Nome de usuário já existe. Escolha outro.")
+            user = self.users.add_user(self.user_username_entry.get(), self.user_name_entry.get(), self.user_password_entry.get())
+        except DuplicateError as e:
+            return messagebox.showerror("Erro", str(e))
+        except ValidationError as e:
+            return messagebox.showwarning("Atenção", str(e))
         except sqlite3.Error as e:
-            messagebox.showerror("Erro", f"Erro: {e}")
+            return messagebox.showerror("Erro", f"Erro: {e}")
+        messagebox.showinfo("Sucesso", f"Usuário '{user.username}' ({user.name}) cadastrado com perfil 'Usuário'.")
+        
+        # Limpa campos
+        self.user_username_entry.delete(0, tk.END)
+        self.user_name_entry.delete(0, tk.END)
+        self.user_password_entry.delete(0, tk.END)
+        self.refresh_user_list()
 
     def setup_admin_tab(self, frame):
         """Configura a aba de Gestão de Usuários (Apenas Admin)."""
@@ -1461,9 +1737,83 @@ class VehicleStoreApp:
         tree_scroll.pack(side='right', fill='y')
         self.user_tree.configure(yscrollcommand=tree_scroll.set)
 
+# --- SESSÕES (LOGIN E LOGOUT NA MESMA JANELA) ---
+
+class SessionManager:
+    """Alterna a tela de login e a aplicação numa única raiz Tk, com um único mainloop.
+
+    A conexão de escrita, a thread de consultas e a de tarefas longas (cada uma com
+    sua conexão de leitura) e os caches do processo (catálogo, gráficos) atravessam as sessões; a troca de tela
+    destrói só o frame da tela anterior. close() libera tudo ao fechar a janela.
+    """
+
+    def __init__(self, root, path=DB_PATH):
+        self.root = root
+        self.db = get_connection_manager(path)
+        self.queries = QueryExecutor(root, path)
+        # Importações e exportações em thread própria, para não segurar as consultas das abas
+        self.long_jobs = QueryExecutor(root, path)
+        self.users = UserService(self.db.writer)
+        self.frame = None
+        self.login = None
+        self.app = None
+        self.prewarm_scheduled = False
+        root.protocol("WM_DELETE_WINDOW", self.close)
+        self.setup_db()
+        self.show_login()
+
+    def setup_db(self):
+        """Aplica as migrações do esquema, insere o admin padrão e limpa o change_log, uma vez por processo (não a cada login)."""
+        try:
+            if self.users.setup():
+                messagebox.showinfo("Configuração Inicial", "Perfil de Admin criado: user='admin', senha='admin'.")
+            prune_change_log(self.db.writer)
+        except sqlite3.Error as e:
+            messagebox.showerror("Erro de DB", f"Falha ao criar as tabelas: {e}")
+
+    def show_login(self):
+        """Troca a tela atual (aplicação ou nada) pela tela de login."""
+        self.login = LoginWindow(self._new_frame(), self.users, self.start_session)
+
+    def start_session(self, user):
+        """Troca a tela de login pela aplicação do usuário autenticado."""
+        self.app = VehicleStoreApp(self._new_frame(), user.id, user.role, user.name, self)
+        if not self.prewarm_scheduled:
+            # Gráficos e exportação importam suas bibliotecas em segundo plano, depois que a janela já abriu
+            self.prewarm_scheduled = True
+            self.root.after(PREWARM_DELAY_MS, self.start_prewarm)
+
+    def start_prewarm(self):
+        """Pré-carrega matplotlib e as bibliotecas de exportação numa thread daemon (o uso não depende disso)."""
+        threading.Thread(target=prewarm_imports, name="prewarm-imports", daemon=True).start()
+
+    def _new_frame(self):
+        """Fecha a tela atual e devolve um frame vazio para a próxima."""
+        self._close_view()
+        self.frame = ttk.Frame(self.root)
+        self.frame.pack(fill='both', expand=True)
+        return self.frame
+
+    def _close_view(self):
+        if self.app is not None:
+            self.app.close()
+        if self.frame is not None:
+            self.frame.destroy()
+        self.frame = self.login = self.app = None
+
+    def close(self):
+        """Fecha a tela atual, as threads de consultas e de tarefas longas e as conexões, e então a janela."""
+        self._close_view()
+        # A consulta em andamento é interrompida pelo cancelamento e a importação para no fim do
+        # bloco atual; a espera é curta
+        self.queries.close(wait=True)
+        self.long_jobs.close(wait=True)
+        self.db.close()
+        self.root.destroy()
+
 # --- EXECUÇÃO DO APLICATIVO ---
 
 if __name__ == "__main__":
     root = tk.Tk()
-    LoginWindow(root)
+    SessionManager(root)
     root.mainloop()
@@ -0,0 +1 @@
+"""Benchmarks e verificações de desempenho (executar a partir da raiz do projeto)."""
@@ -0,0 +1,147 @@
+"""Memória da aba de Análise Gráfica ao longo de muitas trocas de aba.
+
+Repete o caminho de plot_analytics/draw_analytics sem interface gráfica (canvas
+Agg no lugar do FigureCanvasTkAgg): a cada troca consulta as versões das
+tabelas e, só quando mudaram, os dados e a atualização da figura persistente
+(charts.AnalyticsChart). A cada --change-every trocas uma venda é registrada.
+Depois do aquecimento mede memória Python (tracemalloc), RSS do processo e
+objetos vivos; o crescimento até o fim deve ficar perto de zero. --legacy
+reproduz o desenho anterior (plt.subplots a cada troca, sem fechar a figura)
+para comparação. Imprime o resultado em JSON.
+
+Uso:
+    python -m benchmarks.analytics_memory --switches 1000
+    python -m benchmarks.analytics_memory --switches 200 --legacy
+"""
+import argparse
+import gc
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+import matplotlib
+matplotlib.use("Agg")
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from benchmarks.export_memory import build_database
+from charts import AnalyticsChart
+from services import ReportService, SalesService
+
+# Trocas de aba antes da primeira medição (caches do Matplotlib e do SQLite já aquecidos)
+WARMUP_SWITCHES = 100
+# Crescimento aceito entre a medição após o aquecimento e a final
+MAX_GROWTH_KIB = 512
+
+
+def rss_kib():
+    """Memória residente do processo (Linux); None em outros sistemas."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError):
+        return None
+
+
+def snapshot():
+    gc.collect()
+    return {"python_kib": tracemalloc.get_traced_memory()[0] // 1024, "rss_kib": rss_kib(), "objects": len(gc.get_objects())}
+
+
+class PersistentView:
+    """O que a aba faz agora: figura única, atualizada só quando a versão dos dados muda."""
+
+    def __init__(self):
+        self.chart = AnalyticsChart()
+        self.canvas = FigureCanvasAgg(self.chart.figure)
+        self.version = None
+        self.draws = 0
+
+    def switch(self, conn):
+        reports = ReportService(conn)
+        version = reports.analytics_version()
+        if version == self.version:
+            return
+        self.chart.update(reports.analytics_data())
+        self.version = version
+        self.canvas.draw()
+        self.draws += 1
+
+    def close(self):
+        self.chart.close()
+
+
+class LegacyView:
+    """Desenho anterior: figura nova do pyplot a cada troca de aba, nunca fechada."""
+
+    def __init__(self):
+        import matplotlib.pyplot as plt
+        self.plt = plt
+        self.draws = 0
+
+    def switch(self, conn):
+        data = ReportService(conn).analytics_data()
+        fig, axes = self.plt.subplots(2, 2, figsize=(10, 6))
+        axes[0, 0].plot([label for label, _ in data.sales_by_period], [total for _, total in data.sales_by_period], marker='o')
+        axes[0, 1].bar([make for make, _ in data.stock_by_make], [total for _, total in data.stock_by_make])
+        axes[1, 0].barh([name for name, _ in data.sales_by_seller], [total for _, total in data.sales_by_seller])
+        axes[1, 1].bar([low for low, _, _ in data.price_bins], [count for _, _, count in data.price_bins], align='edge')
+        fig.tight_layout(rect=[0, 0.03, 1, 0.95])
+        FigureCanvasAgg(fig).draw()
+        self.draws += 1
+
+    def close(self):
+        self.plt.close('all')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--switches", type=int, default=1000, help="trocas de aba medidas (após o aquecimento)")
+    parser.add_argument("--sales", type=int, default=20000, help="vendas do banco temporário")
+    parser.add_argument("--change-every", type=int, default=10, help="trocas entre duas vendas novas")
+    parser.add_argument("--legacy", action="store_true", help="figura nova do pyplot a cada troca (desenho anterior)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = build_database(os.path.join(tmp, "bench.db"), args.sales)
+        sales = SalesService(conn)
+        view = LegacyView() if args.legacy else PersistentView()
+        tracemalloc.start()
+        started = time.perf_counter()
+        baseline = None
+        for i in range(WARMUP_SWITCHES + args.switches):
+            if i == WARMUP_SWITCHES:
+                baseline = snapshot()
+            if i % args.change_every == 0:
+                # Cada venda muda a versão de sales e vehicles (e reduz o estoque de um veículo)
+                vehicle_id = conn.execute("SELECT id FROM vehicles WHERE stock > 0 LIMIT 1").fetchone()
+                if vehicle_id is None:
+                    conn.execute("UPDATE vehicles SET stock = 1, is_active = 1, sale_date_only = NULL")
+                    conn.commit()
+                    vehicle_id = (1,)
+                sales.register_sale(vehicle_id[0], 1, 1, 5_000_000)
+            view.switch(conn)
+        elapsed = time.perf_counter() - started
+        final = snapshot()
+        tracemalloc.stop()
+        view.close()
+        conn.close()
+
+    growth = {key: final[key] - baseline[key] for key in final if final[key] is not None and baseline[key] is not None}
+    result = {
+        "mode": "legacy" if args.legacy else "persistent",
+        "switches": args.switches,
+        "draws": view.draws,
+        "seconds": round(elapsed, 2),
+        "after_warmup": baseline,
+        "final": final,
+        "growth": growth,
+        "steady": growth["python_kib"] <= MAX_GROWTH_KIB,
+    }
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    return 0 if result["steady"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
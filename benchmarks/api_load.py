@@ -0,0 +1,251 @@
+"""Teste de carga do servidor HTTP (api_server.py) em localhost.
+
+Sobe o servidor num processo à parte sobre uma cópia de um banco sintético
+(benchmarks.datagen, com cache como em benchmarks.run) e dispara clientes
+asyncio com keep-alive durante --duration segundos, numa mistura de feed de
+estoque paginado, consulta de veículo, relatórios e vendas. Ao mesmo tempo,
+--desktop processos fazem o papel dos terminais da loja: registram vendas e
+leem páginas do estoque pelos serviços, direto no arquivo, contando os erros
+"database is locked". Imprime um resumo em JSON (requisições por segundo e
+latências por rota).
+
+Uso:
+    python -m benchmarks.api_load --sales 100000 --clients 32 --duration 10 --desktop 2
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.run import cached_database
+from database import connect
+from services import InventoryService, OutOfStockError, SalesService
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Rota -> peso na mistura de requisições dos clientes
+MIX = {
+    "estoque (página)": 50,
+    "veículo": 15,
+    "relatório de vendas": 10,
+    "resumo de vendas": 5,
+    "estoque baixo": 5,
+    "venda": 15,
+}
+# Páginas seguidas do feed de estoque antes de recomeçar do início
+FEED_PAGES = 5
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def sample_ids(path):
+    """Veículos à venda, clientes e vendedores ativos usados nas requisições."""
+    conn = connect(path, read_only=True)
+    try:
+        ids = lambda sql: [row[0] for row in conn.execute(sql)]
+        return (
+            ids("SELECT id FROM vehicles WHERE is_active = 1 AND stock > 0 LIMIT 5000"),
+            ids("SELECT id FROM customers WHERE is_active = 1 LIMIT 1000"),
+            ids("SELECT id FROM sellers WHERE is_active = 1"),
+        )
+    finally:
+        conn.close()
+
+
+async def request(reader, writer, method, target, payload=None):
+    """Envia uma requisição HTTP/1.1 na conexão aberta e retorna (status, corpo JSON)."""
+    body = b"" if payload is None else json.dumps(payload).encode("utf-8")
+    writer.write(
+        f"{method} {target} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def client(port, deadline, ids, results, rng):
+    """Um cliente: requisições em sequência na mesma conexão até o prazo."""
+    vehicle_ids, customer_ids, seller_ids = ids
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    routes = list(MIX)
+    weights = list(MIX.values())
+    cursor = None
+    pages = 0
+    try:
+        while time.perf_counter() < deadline:
+            route = rng.choices(routes, weights)[0]
+            if route == "estoque (página)":
+                target = "/api/vehicles?limit=100" + (f"&after={cursor}" if cursor else "")
+                args = ("GET", target)
+            elif route == "veículo":
+                args = ("GET", f"/api/vehicles/{rng.choice(vehicle_ids)}")
+            elif route == "relatório de vendas":
+                args = ("GET", "/api/reports/sales?limit=100")
+            elif route == "resumo de vendas":
+                args = ("GET", "/api/reports/sales-summary")
+            elif route == "estoque baixo":
+                args = ("GET", "/api/reports/low-stock?threshold=2&limit=100")
+            else:
+                args = ("POST", "/api/sales", {
+                    "vehicle_id": rng.choice(vehicle_ids), "customer_id": rng.choice(customer_ids),
+                    "seller_id": rng.choice(seller_ids), "final_price_cents": 5_000_000,
+                })
+            started = time.perf_counter()
+            status, body = await request(reader, writer, *args)
+            results.append((route, status, (time.perf_counter() - started) * 1000))
+            if route == "estoque (página)":
+                pages += 1
+                cursor = body.get("next") if pages < FEED_PAGES else None
+                if cursor is None:
+                    pages = 0
+    finally:
+        writer.close()
+
+
+def desktop_terminal(path, ids, deadline, seed, results):
+    """Terminal da loja: vendas e páginas do estoque direto no banco, como a aplicação Tk."""
+    vehicle_ids, customer_ids, seller_ids = ids
+    rng = random.Random(seed)
+    conn = connect(path)
+    sales = SalesService(conn)
+    inventory = InventoryService(conn)
+    done = locked = out_of_stock = 0
+    while time.time() < deadline:
+        try:
+            sales.register_sale(rng.choice(vehicle_ids), rng.choice(customer_ids), rng.choice(seller_ids), 5_000_000)
+            done += 1
+            inventory.page()
+        except OutOfStockError:
+            out_of_stock += 1
+        except sqlite3.OperationalError as e:
+            if "locked" not in str(e):
+                raise
+            locked += 1
+        time.sleep(0.05)
+    conn.close()
+    results.put({"sales": done, "out_of_stock": out_of_stock, "locked_errors": locked})
+
+
+def summarize(results, duration):
+    """Requisições por segundo, status e latências (ms) por rota."""
+    routes = {}
+    for route, status, elapsed in results:
+        entry = routes.setdefault(route, {"count": 0, "status": {}, "latencies": []})
+        entry["count"] += 1
+        entry["status"][str(status)] = entry["status"].get(str(status), 0) + 1
+        entry["latencies"].append(elapsed)
+    for entry in routes.values():
+        latencies = sorted(entry.pop("latencies"))
+        entry["p50_ms"] = round(statistics.median(latencies), 2)
+        entry["p95_ms"] = round(latencies[int(len(latencies) * 0.95)], 2)
+        entry["max_ms"] = round(latencies[-1], 2)
+    return {
+        "requests": len(results),
+        "requests_per_s": round(len(results) / duration, 1),
+        "server_errors": sum(1 for _, status, _ in results if status >= 500),
+        "routes": routes,
+    }
+
+
+async def run_clients(port, clients, duration, ids, seed):
+    results = []
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*(client(port, deadline, ids, results, random.Random(seed + i)) for i in range(clients)))
+    return results
+
+
+def wait_for_server(port, process, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("O servidor da API terminou antes de aceitar conexões.")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("O servidor da API não respondeu a tempo.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sales", type=int, default=100_000, help="vendas do banco sintético")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "vehicle_bench"),
+                        help="cache dos bancos gerados (padrão: %(default)s)")
+    parser.add_argument("--clients", type=int, default=32, help="conexões HTTP simultâneas")
+    parser.add_argument("--readers", type=int, default=4, help="conexões de leitura do servidor")
+    parser.add_argument("--desktop", type=int, default=2, help="terminais desktop gravando ao mesmo tempo")
+    parser.add_argument("--duration", type=float, default=10, help="segundos de carga")
+    args = parser.parse_args()
+
+    source = cached_database(args.sales, args.seed, args.data_dir)
+    with tempfile.TemporaryDirectory() as tmp:
+        # As vendas alteram o banco: a carga roda sobre uma cópia
+        path = os.path.join(tmp, "api.db")
+        shutil.copyfile(source, path)
+        ids = sample_ids(path)
+
+        port = free_port()
+        server = subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, "api_server.py"), "--db", path, "--port", str(port), "--readers", str(args.readers)],
+            cwd=ROOT, stdout=subprocess.DEVNULL
+        )
+        try:
+            wait_for_server(port, server)
+            desktop_results = multiprocessing.Queue()
+            terminals = [
+                multiprocessing.Process(target=desktop_terminal, args=(path, ids, time.time() + args.duration, args.seed + 1000 + i, desktop_results))
+                for i in range(args.desktop)
+            ]
+            for terminal in terminals:
+                terminal.start()
+            results = asyncio.run(run_clients(port, args.clients, args.duration, ids, args.seed))
+            desktop = [desktop_results.get() for _ in terminals]
+            for terminal in terminals:
+                terminal.join()
+        finally:
+            server.terminate()
+            server.wait()
+
+    report = {
+        "sales": args.sales,
+        "clients": args.clients,
+        "readers": args.readers,
+        "duration_s": args.duration,
+        "api": summarize(results, args.duration),
+        "desktop": {
+            "terminals": args.desktop,
+            "sales": sum(d["sales"] for d in desktop),
+            "out_of_stock": sum(d["out_of_stock"] for d in desktop),
+            "locked_errors": sum(d["locked_errors"] for d in desktop),
+        },
+    }
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""Teste de carga com N terminais concorrentes sobre o mesmo arquivo de banco.
+
+Cada terminal é um processo que registra vendas em laço com
+SalesService.register_sale (BEGIN IMMEDIATE + baixa com RETURNING, o mesmo
+caminho da tela de vendas; --legacy usa o UPDATE + INSERT do app antigo); alguns terminais executam o relatório de vendas continuamente,
+como durante uma exportação. Ao final imprime um resumo em JSON com vendas,
+relatórios e erros "database is locked".
+
+Uso:
+    python -m benchmarks.concurrency --terminals 8 --reporters 2 --duration 10
+    python -m benchmarks.concurrency --legacy   # journal padrão, sem o ConnectionManager
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+
+from database import DB_PATH, connect
+from migrations import migrate
+from services import SalesService
+
+SEED_VEHICLES = 50
+SEED_STOCK = 1_000_000
+
+
+def prepare_database(path, legacy):
+    """Copia o banco de exemplo e garante estoque suficiente para toda a carga."""
+    shutil.copyfile(DB_PATH, path)
+    conn = sqlite3.connect(path)
+    migrate(conn)
+    conn.execute("PRAGMA journal_mode = DELETE" if legacy else "PRAGMA journal_mode = WAL")
+    conn.executemany(
+        "INSERT INTO vehicles (make, model, manufacture_year, model_year, color, sale_price_cents, stock) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [("Bench", f"Modelo {i}", 2024, 2024, "Preto", 10_000_000, SEED_STOCK) for i in range(SEED_VEHICLES)]
+    )
+    conn.commit()
+    vehicle_ids = [row[0] for row in conn.execute("SELECT id FROM vehicles WHERE make = 'Bench'")]
+    customer_id = conn.execute("INSERT INTO customers (name, email) VALUES ('Cliente Bench', 'cliente@bench')").lastrowid
+    seller_id = conn.execute("INSERT INTO sellers (name, email) VALUES ('Vendedor Bench', 'vendedor@bench')").lastrowid
+    conn.commit()
+    conn.close()
+    return vehicle_ids, customer_id, seller_id
+
+
+def open_connection(path, legacy, read_only=False):
+    """Conexão como o app antigo (sqlite3.connect puro) ou pelo módulo database."""
+    if legacy:
+        return sqlite3.connect(path)
+    return connect(path, read_only=read_only)
+
+
+def legacy_sale(conn, vehicle_id, customer_id, seller_id, final_price_cents):
+    """Venda como no app antigo: UPDATE de estoque + INSERT em transação adiada."""
+    cursor = conn.cursor()
+    cursor.execute("UPDATE vehicles SET stock = stock - 1 WHERE id = ? AND stock > 0", (vehicle_id,))
+    now = datetime.now()
+    cursor.execute(
+        "INSERT INTO sales (vehicle_id, customer_id, seller_id, final_price_cents, sale_ts, sale_day) VALUES (?, ?, ?, ?, ?, ?)",
+        (vehicle_id, customer_id, seller_id, final_price_cents, int(now.timestamp()), int(now.strftime("%Y%m%d")))
+    )
+    conn.commit()
+
+
+def sales_terminal(path, legacy, vehicle_ids, customer_id, seller_id, deadline, results):
+    """Registra vendas até o prazo (register_sale, ou a sequência antiga com --legacy)."""
+    conn = open_connection(path, legacy)
+    register_sale = (lambda *args: legacy_sale(conn, *args)) if legacy else SalesService(conn).register_sale
+    sales = locked = 0
+    latencies = []
+    i = os.getpid()
+    while time.time() < deadline:
+        vehicle_id = vehicle_ids[i % len(vehicle_ids)]
+        i += 1
+        started = time.perf_counter()
+        try:
+            register_sale(vehicle_id, customer_id, seller_id, 10_000_000)
+            sales += 1
+            latencies.append(time.perf_counter() - started)
+        except sqlite3.OperationalError as e:
+            # register_sale já desfaz a transação; a sequência antiga não
+            if conn.in_transaction:
+                conn.rollback()
+            if "locked" not in str(e):
+                raise
+            locked += 1
+    conn.close()
+    results.put({"role": "sales", "ops": sales, "locked": locked, "latencies": latencies})
+
+
+def report_terminal(path, legacy, deadline, results):
+    """Executa o relatório de vendas do mês (leitura longa) até o prazo."""
+    conn = open_connection(path, legacy, read_only=True)
+    cursor = conn.cursor()
+    reports = locked = 0
+    month_start = int(datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0).timestamp())
+    now_ts = int(time.time())
+    while time.time() < deadline:
+        try:
+            cursor.execute(
+                "SELECT s.sale_ts, v.make, v.model, c.name, se.name, s.final_price_cents FROM sales s "
+                "LEFT JOIN vehicles v ON v.id = s.vehicle_id LEFT JOIN customers c ON c.id = s.customer_id "
+                "LEFT JOIN sellers se ON se.id = s.seller_id "
+                "WHERE s.sale_ts BETWEEN ? AND ? ORDER BY s.sale_ts DESC",
+                (month_start, now_ts)
+            )
+            # Consome linha a linha, mantendo o snapshot aberto como numa exportação
+            for _ in cursor:
+                pass
+            reports += 1
+        except sqlite3.OperationalError as e:
+            if "locked" not in str(e):
+                raise
+            locked += 1
+    conn.close()
+    results.put({"role": "report", "ops": reports, "locked": locked, "latencies": []})
+
+
+def percentile(values, fraction):
+    """Percentil simples (sem interpolação)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--terminals", type=int, default=8, help="terminais registrando vendas")
+    parser.add_argument("--reporters", type=int, default=2, help="terminais exportando relatórios")
+    parser.add_argument("--duration", type=float, default=10.0, help="duração em segundos")
+    parser.add_argument("--legacy", action="store_true", help="usa sqlite3.connect puro (rollback journal)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        vehicle_ids, customer_id, seller_id = prepare_database(path, args.legacy)
+        results = multiprocessing.Queue()
+        deadline = time.time() + args.duration
+        processes = [
+            multiprocessing.Process(target=sales_terminal, args=(path, args.legacy, vehicle_ids, customer_id, seller_id, deadline, results))
+            for _ in range(args.terminals)
+        ] + [
+            multiprocessing.Process(target=report_terminal, args=(path, args.legacy, deadline, results))
+            for _ in range(args.reporters)
+        ]
+        for process in processes:
+            process.start()
+        collected = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+
+    sales = [r for r in collected if r["role"] == "sales"]
+    reports = [r for r in collected if r["role"] == "report"]
+    latencies = [lat for r in sales for lat in r["latencies"]]
+    summary = {
+        "mode": "legacy" if args.legacy else "wal",
+        "terminals": args.terminals,
+        "reporters": args.reporters,
+        "duration_s": args.duration,
+        "sales": sum(r["ops"] for r in sales),
+        "sales_per_s": round(sum(r["ops"] for r in sales) / args.duration, 1),
+        "sale_p50_ms": round(percentile(latencies, 0.5) * 1000, 2) if latencies else None,
+        "sale_p99_ms": round(percentile(latencies, 0.99) * 1000, 2) if latencies else None,
+        "reports": sum(r["ops"] for r in reports),
+        "locked_errors": sum(r["locked"] for r in collected),
+    }
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
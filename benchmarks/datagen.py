@@ -0,0 +1,243 @@
+"""Gerador de bancos sintéticos com volumes e distribuições de uma revenda real.
+
+Marcas e modelos seguem uma participação de mercado desigual (poucas marcas
+concentram as vendas), vendedores têm desempenhos bem diferentes entre si,
+clientes compram mais de uma vez e as vendas têm sazonalidade (dezembro forte,
+fevereiro fraco, domingos quase sem vendas). As vendas são gravadas em ordem
+cronológica, como aconteceria na aplicação. O resultado depende só dos
+parâmetros e da semente, então o mesmo banco pode ser recriado para comparar
+medições entre commits.
+
+Os triggers são desligados durante a carga; o resumo diário (sales_daily), o
+índice de busca e as estatísticas do planejador são recalculados no final.
+
+Uso:
+    python -m benchmarks.datagen --sales 1000000 --out vendas_1m.db
+"""
+import argparse
+import json
+import os
+import random
+import time
+from datetime import date, datetime, timedelta
+
+from database import connect
+from migrations import TRACKED_TABLES, migrate, refresh_statistics
+from rollups import rebuild_sales_daily
+from search import rebuild_search_index
+
+# Muda quando a forma dos dados gerados muda (invalida bancos guardados em cache)
+DATAGEN_VERSION = 1
+# Linhas gravadas por executemany/transação
+LOAD_BATCH_SIZE = 50_000
+
+# Marca -> (participação nas vendas, preço base em reais, modelos do mais ao menos vendido)
+MAKES = {
+    "Fiat": (22, 90_000, ["Strada", "Argo", "Mobi", "Toro", "Pulse", "Cronos", "Fastback"]),
+    "Volkswagen": (16, 110_000, ["Polo", "T-Cross", "Nivus", "Saveiro", "Virtus", "Taos", "Amarok"]),
+    "Chevrolet": (14, 105_000, ["Onix", "Onix Plus", "Tracker", "S10", "Montana", "Spin"]),
+    "Toyota": (9, 170_000, ["Corolla Cross", "Hilux", "Corolla", "Yaris", "SW4"]),
+    "Hyundai": (8, 115_000, ["HB20", "Creta", "HB20S", "Tucson"]),
+    "Jeep": (6, 180_000, ["Compass", "Renegade", "Commander"]),
+    "Renault": (6, 95_000, ["Kwid", "Duster", "Oroch", "Sandero", "Logan"]),
+    "Honda": (5, 150_000, ["HR-V", "City", "Civic", "WR-V"]),
+    "Nissan": (3, 130_000, ["Kicks", "Versa", "Frontier", "Sentra"]),
+    "Ford": (3, 250_000, ["Ranger", "Territory", "Maverick", "Bronco"]),
+    "BYD": (2, 200_000, ["Dolphin", "Song Plus", "Seal", "Yuan Plus"]),
+    "Peugeot": (2, 110_000, ["208", "2008", "3008"]),
+    "Citroën": (1, 95_000, ["C3", "C4 Cactus", "Aircross"]),
+    "Mitsubishi": (1, 220_000, ["L200", "Outlander", "Eclipse Cross"]),
+    "BMW": (1, 380_000, ["320i", "X1", "X3"]),
+}
+# Cor -> participação
+COLORS = {"Branco": 34, "Preto": 24, "Prata": 20, "Cinza": 13, "Vermelho": 4, "Azul": 3, "Verde": 1, "Amarelo": 1}
+# Peso das vendas por mês (janeiro..dezembro) e por dia da semana (segunda..domingo)
+MONTH_WEIGHTS = [0.85, 0.75, 0.95, 0.9, 1.0, 0.95, 1.0, 1.05, 1.0, 1.05, 1.1, 1.4]
+WEEKDAY_WEIGHTS = [1.0, 1.0, 1.0, 1.05, 1.2, 1.3, 0.15]
+# Horário comercial (horas)
+OPEN_HOUR, CLOSE_HOUR = 9, 19
+
+FIRST_NAMES = [
+    "Ana", "Maria", "Juliana", "Fernanda", "Patrícia", "Camila", "Aline", "Beatriz", "Larissa", "Gabriela",
+    "João", "José", "Carlos", "Paulo", "Lucas", "Marcos", "Rafael", "Pedro", "Bruno", "Gustavo",
+]
+LAST_NAMES = [
+    "Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves", "Pereira", "Lima", "Gomes",
+    "Costa", "Ribeiro", "Martins", "Carvalho", "Almeida", "Lopes", "Soares", "Fernandes", "Vieira", "Barbosa",
+]
+
+
+def default_counts(sales):
+    """Quantidades de veículos, clientes e vendedores proporcionais às vendas."""
+    return {
+        "vehicles": max(200, sales // 20),
+        "customers": max(100, sales // 3),
+        "sellers": max(10, min(400, sales // 2500)),
+    }
+
+
+def _cumulative(weights):
+    total = 0
+    result = []
+    for weight in weights:
+        total += weight
+        result.append(total)
+    return result
+
+
+def _person(rng, i, kind):
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.choice(LAST_NAMES)}"
+    return name, f"(11) 9{rng.randrange(10 ** 8):08d}", f"{kind}{i}@exemplo.com.br"
+
+
+def _batches(rows, size=LOAD_BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _load(conn, sql, rows):
+    for batch in _batches(rows):
+        conn.executemany(sql, batch)
+        conn.commit()
+
+
+def _vehicles(rng, count, current_year):
+    """Veículos em estoque e já vendidos; as marcas/modelos mais vendidos aparecem mais."""
+    makes = list(MAKES)
+    make_weights = _cumulative(MAKES[make][0] for make in makes)
+    colors = list(COLORS)
+    color_weights = _cumulative(COLORS.values())
+    for _ in range(count):
+        make = rng.choices(makes, cum_weights=make_weights)[0]
+        _, base_price, models = MAKES[make]
+        # Modelos seguem uma lei de Zipf dentro da marca
+        model_index = min(int(rng.paretovariate(1.2)) - 1, len(models) - 1)
+        model_year = rng.randint(current_year - 8, current_year + 1)
+        manufacture_year = model_year - (1 if rng.random() < 0.3 else 0)
+        age_factor = 0.9 ** (current_year - model_year) if model_year <= current_year else 1.05
+        price_cents = int(base_price * (1 + 0.15 * model_index) * age_factor * rng.uniform(0.9, 1.1)) * 100 + rng.choice((0, 90, 99))
+        sold = rng.random() < 0.35
+        stock = 0 if sold else rng.choice((1, 1, 1, 2, 2, 3, 5, 8))
+        sale_date = (date(current_year, 1, 1) + timedelta(days=rng.randrange(365))).isoformat() if sold else None
+        yield (make, models[model_index], manufacture_year, model_year,
+               rng.choices(colors, cum_weights=color_weights)[0], price_cents, stock, 0 if sold else 1, sale_date)
+
+
+def _sales(rng, count, years, vehicles, customers, sellers, vehicle_prices, seller_weights):
+    """Vendas em ordem cronológica nos últimos `years` anos, com sazonalidade.
+
+    Os veículos são sorteados de modo uniforme: a participação de cada marca/modelo
+    já está na composição do cadastro de veículos.
+    """
+    last_day = date.today()
+    first_day = last_day - timedelta(days=365 * years)
+    days = [first_day + timedelta(days=i) for i in range((last_day - first_day).days + 1)]
+    day_weights = [MONTH_WEIGHTS[day.month - 1] * WEEKDAY_WEIGHTS[day.weekday()] for day in days]
+    scale = count / sum(day_weights)
+    vehicle_ids = range(1, vehicles + 1)
+    seller_ids = range(1, sellers + 1)
+
+    produced = 0
+    carry = 0.0
+    for index, day in enumerate(days):
+        # Quantidade do dia proporcional ao peso; a fração acumulada vai para os dias seguintes
+        expected = day_weights[index] * scale + carry
+        today = count - produced if index == len(days) - 1 else int(expected)
+        carry = expected - today
+        if today <= 0:
+            continue
+        opening = int(time.mktime(datetime(day.year, day.month, day.day, OPEN_HOUR).timetuple()))
+        day_key = day.year * 10000 + day.month * 100 + day.day
+        timestamps = sorted(opening + rng.randrange((CLOSE_HOUR - OPEN_HOUR) * 3600) for _ in range(today))
+        chosen_vehicles = rng.choices(vehicle_ids, k=today)
+        chosen_sellers = rng.choices(seller_ids, cum_weights=seller_weights, k=today)
+        for ts, vehicle_id, seller_id in zip(timestamps, chosen_vehicles, chosen_sellers):
+            # Clientes recentes voltam a comprar; descontos de até 8% sobre o preço de tabela
+            customer_id = min(customers, int(rng.triangular(1, customers + 1, customers * produced / count + 1)))
+            price_cents = int(vehicle_prices[vehicle_id - 1] * rng.uniform(0.92, 1.0))
+            yield vehicle_id, customer_id, seller_id, price_cents, ts, day_key
+        produced += today
+
+
+def generate(path, sales, vehicles=None, customers=None, sellers=None, years=5, seed=42, progress=None):
+    """Cria em path um banco migrado com os cadastros e as vendas sintéticas; retorna as quantidades."""
+    counts = default_counts(sales)
+    counts.update({key: value for key, value in (("vehicles", vehicles), ("customers", customers), ("sellers", sellers)) if value})
+    rng = random.Random(seed)
+    report = progress or (lambda step: None)
+    current_year = date.today().year
+
+    conn = connect(path)
+    migrate(conn)
+    # Carga sem triggers (recriados no final, com os dados derivados recalculados)
+    triggers = conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger'").fetchall()
+    for name, _ in triggers:
+        conn.execute(f"DROP TRIGGER {name}")
+    conn.commit()
+
+    report("cadastros")
+    conn.executemany("INSERT INTO makes (name) VALUES (?)", [(make,) for make in MAKES])
+    conn.executemany(
+        "INSERT INTO models (make_name, model_name) VALUES (?, ?)",
+        [(make, model) for make, (_, _, models) in MAKES.items() for model in models]
+    )
+    vehicle_rows = list(_vehicles(rng, counts["vehicles"], current_year))
+    _load(conn, "INSERT INTO vehicles (make, model, manufacture_year, model_year, color, sale_price_cents, stock, is_active, sale_date_only) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", vehicle_rows)
+    _load(conn, "INSERT INTO customers (name, phone, email, is_active) VALUES (?, ?, ?, ?)",
+          (_person(rng, i, "cliente") + (0 if rng.random() < 0.02 else 1,) for i in range(counts["customers"])))
+    _load(conn, "INSERT INTO sellers (name, phone, email, is_active) VALUES (?, ?, ?, ?)",
+          (_person(rng, i, "vendedor") + (0 if rng.random() < 0.1 else 1,) for i in range(counts["sellers"])))
+
+    report("vendas")
+    seller_weights = _cumulative(rng.lognormvariate(0, 0.6) for _ in range(counts["sellers"]))
+    vehicle_prices = [row[5] for row in vehicle_rows]
+    _load(conn, "INSERT INTO sales (vehicle_id, customer_id, seller_id, final_price_cents, sale_ts, sale_day) VALUES (?, ?, ?, ?, ?, ?)",
+          _sales(rng, sales, years, counts["vehicles"], counts["customers"], counts["sellers"], vehicle_prices, seller_weights))
+
+    report("resumo diário")
+    rebuild_sales_daily(conn)
+    report("índice de busca")
+    conn.execute("BEGIN IMMEDIATE")
+    rebuild_search_index(conn)
+    for _, sql in triggers:
+        conn.execute(sql)
+    # Versão 1 em todas as tabelas: as telas fazem a carga completa na primeira vez
+    conn.executemany("UPDATE table_versions SET version = 1 WHERE table_name = ?", [(table,) for table in TRACKED_TABLES])
+    conn.commit()
+    report("estatísticas")
+    refresh_statistics(conn)
+    conn.commit()
+    conn.close()
+    counts["sales"] = sales
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sales", type=int, default=10_000)
+    parser.add_argument("--vehicles", type=int)
+    parser.add_argument("--customers", type=int)
+    parser.add_argument("--sellers", type=int)
+    parser.add_argument("--years", type=int, default=5, help="período coberto pelas vendas (até hoje)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", required=True, help="arquivo do banco gerado (não pode existir)")
+    args = parser.parse_args()
+
+    if os.path.exists(args.out):
+        parser.error(f"{args.out} já existe")
+    started = time.perf_counter()
+    counts = generate(args.out, args.sales, args.vehicles, args.customers, args.sellers, args.years, args.seed,
+                      progress=lambda step: print(f"  {step}..."))
+    counts["seconds"] = round(time.perf_counter() - started, 1)
+    print(json.dumps(counts, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Memória usada pela exportação em fluxo de relatórios.
+
+Cria um banco temporário com N vendas, exporta o relatório de vendas em cada
+formato disponível e mede o pico de memória alocada (tracemalloc) e o tempo.
+O pico deve ficar praticamente constante quando N cresce. Imprime o
+resultado em JSON.
+
+Uso:
+    python -m benchmarks.export_memory --sales 500000
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from database import connect
+from exports import EXPORT_FORMATS, export_rows, missing_dependency
+from migrations import migrate
+
+REPORT_SQL = """
+    SELECT datetime(s.sale_ts, 'unixepoch', 'localtime'), v.make || ' ' || v.model, c.name, se.name,
+           s.final_price_cents / 100.0
+    FROM sales s
+    LEFT JOIN vehicles v ON v.id = s.vehicle_id
+    LEFT JOIN customers c ON c.id = s.customer_id
+    LEFT JOIN sellers se ON se.id = s.seller_id
+    ORDER BY s.sale_ts DESC
+"""
+REPORT_COLUMNS = ["Data/Hora Venda", "Veículo", "Cliente", "Vendedor", "Total Venda (R$)"]
+
+
+def build_database(path, sales):
+    """Banco com 50 veículos, 100 clientes, 10 vendedores e N vendas."""
+    conn = connect(path)
+    migrate(conn)
+    conn.executemany(
+        "INSERT INTO vehicles (make, model, manufacture_year, model_year, color, sale_price_cents, stock) VALUES (?, ?, 2020, 2021, 'Preto', ?, 1)",
+        [(f"Marca {i % 5}", f"Modelo {i}", 5000000 + i) for i in range(50)]
+    )
+    conn.executemany("INSERT INTO customers (name) VALUES (?)", [(f"Cliente {i}",) for i in range(100)])
+    conn.executemany("INSERT INTO sellers (name) VALUES (?)", [(f"Vendedor {i}",) for i in range(10)])
+    start = 1577836800  # 2020-01-01
+    conn.executemany(
+        "INSERT INTO sales (vehicle_id, customer_id, seller_id, final_price_cents, sale_ts, sale_day) VALUES (?, ?, ?, ?, ?, 20200101)",
+        ((random.randint(1, 50), random.randint(1, 100), random.randint(1, 10), 5000000, start + i * 60) for i in range(sales))
+    )
+    conn.commit()
+    return conn
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sales", type=int, default=200000)
+    args = parser.parse_args()
+
+    results = {"sales": args.sales, "formats": {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = build_database(os.path.join(tmp, "bench.db"), args.sales)
+        for extension in EXPORT_FORMATS:
+            path = os.path.join(tmp, f"relatorio{extension}")
+            if missing_dependency(path):
+                results["formats"][extension] = "biblioteca ausente"
+                continue
+            tracemalloc.start()
+            started = time.perf_counter()
+            written = export_rows(conn.execute(REPORT_SQL), REPORT_COLUMNS, path, sheet_name="Vendas")
+            elapsed = time.perf_counter() - started
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            results["formats"][extension] = {
+                "rows": written,
+                "seconds": round(elapsed, 2),
+                "peak_mib": round(peak / 2 ** 20, 2),
+                "file_mib": round(os.path.getsize(path) / 2 ** 20, 2),
+            }
+        conn.close()
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Vazão da importação em lote de veículos e clientes.
+
+Gera arquivos CSV (e XLSX, se o openpyxl estiver instalado) com N linhas,
+1% delas inválidas, importa cada um num banco temporário e mede as linhas
+por segundo, incluindo validação, triggers de versão e índice de busca.
+Imprime o resultado em JSON.
+
+Uso:
+    python -m benchmarks.import_throughput --rows 100000
+"""
+import argparse
+import csv
+import json
+import os
+import tempfile
+import time
+
+from database import connect
+from imports import import_file, missing_dependency
+from migrations import migrate
+
+try:
+    from openpyxl import Workbook
+except ImportError:
+    Workbook = None
+
+MAKES = {"Fiat": ["Argo", "Mobi", "Toro"], "Volkswagen": ["Gol", "Polo", "T-Cross"], "Chevrolet": ["Onix", "Tracker"]}
+FILES = {
+    "vehicles": ["Marca", "Modelo", "Ano Fabricação", "Ano Modelo", "Cor", "Preço", "Estoque"],
+    "customers": ["Nome", "Telefone", "Email"],
+}
+
+
+def sample_row(entity, i):
+    """Linha de exemplo; uma em cada 100 é inválida (ano fora da faixa / email repetido)."""
+    if entity == "vehicles":
+        make = list(MAKES)[i % len(MAKES)]
+        models = MAKES[make]
+        year = 1800 if i % 100 == 99 else 2015 + i % 10
+        return [make, models[i % len(models)], year, year + 1 if year < 2024 else year, "Preto", f"{50000 + i % 900},50", i % 7]
+    email = "repetido@exemplo.com" if i % 100 == 99 else f"cliente{i}@exemplo.com"
+    return [f"cliente {i}", f"(11) 9{i:08d}", email]
+
+
+def write_file(path, entity, rows):
+    if path.endswith(".csv"):
+        with open(path, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.writer(f, delimiter=";")
+            writer.writerow(FILES[entity])
+            writer.writerows(sample_row(entity, i) for i in range(rows))
+    else:
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        sheet.append(FILES[entity])
+        for i in range(rows):
+            sheet.append(sample_row(entity, i))
+        workbook.save(path)
+
+
+def build_database(path):
+    conn = connect(path)
+    migrate(conn)
+    conn.executemany("INSERT INTO makes (name) VALUES (?)", [(make,) for make in MAKES])
+    conn.executemany(
+        "INSERT INTO models (make_name, model_name) VALUES (?, ?)",
+        [(make, model) for make, models in MAKES.items() for model in models]
+    )
+    conn.commit()
+    return conn
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args()
+
+    results = {"rows": args.rows, "imports": {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        for extension in (".csv", ".xlsx"):
+            if Workbook is None and extension == ".xlsx" or missing_dependency(f"x{extension}"):
+                results["imports"][extension] = "biblioteca ausente"
+                continue
+            for entity in FILES:
+                path = os.path.join(tmp, f"{entity}{extension}")
+                write_file(path, entity, args.rows)
+                conn = build_database(os.path.join(tmp, f"{entity}{extension}.db"))
+                started = time.perf_counter()
+                imported, rejected = import_file(conn, entity, path)
+                elapsed = time.perf_counter() - started
+                conn.close()
+                results["imports"][f"{entity}{extension}"] = {
+                    "imported": imported,
+                    "rejected": rejected,
+                    "seconds": round(elapsed, 2),
+                    "rows_per_second": round(args.rows / elapsed),
+                }
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
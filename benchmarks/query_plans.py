@@ -0,0 +1,201 @@
+"""Verificação de regressão dos planos de consulta (EXPLAIN QUERY PLAN).
+
+Executa as chamadas reais dos serviços (services.py, search.py, catalog.py)
+num banco criado com migrations.migrate (com estoque, cadastros, vendas de
+exemplo e estatísticas), registra com set_trace_callback o SQL que cada uma
+executou e roda EXPLAIN QUERY PLAN sobre cada instrução. Assim o teste
+acompanha o SQL da aplicação sem cópias. Falha (código de saída 1) se alguma
+instrução varrer uma tabela inteira sem índice ou precisar de uma B-tree
+temporária, exceto as linhas de plano aceitas em APP_CALLS, cada uma com o
+motivo ao lado.
+
+Uso:
+    python -m benchmarks.query_plans
+"""
+import sqlite3
+import sys
+
+from catalog import Catalog
+from migrations import migrate, prune_change_log, refresh_statistics, table_versions
+from search import search
+from services import (
+    MAKES_LISTING, MODELS_LISTING, SALES_LISTING, USERS_LISTING, AnalyticsFilter, CartLine, InventoryService,
+    OutOfStockError, PeopleService, ReportService, SalesService, UserService, ValidationError, fetch_changes,
+    fetch_page, people_listing,
+)
+
+# Vendas de exemplo: 1 ano de vendas, uma a cada SALE_INTERVAL segundos
+SALES_START_TS = 1704067200  # 2024-01-01
+SALE_INTERVAL = 3600
+
+
+def listing_calls(listing):
+    """Carga completa e atualização incremental (uma linha alterada) de uma lista da tela."""
+    return [
+        (f"{listing.table}: lista completa", lambda conn: fetch_changes(conn, listing, None), ()),
+        (f"{listing.table}: linhas alteradas",
+         lambda conn: fetch_changes(conn, listing, table_versions(conn, listing.table)[0] - 1), ()),
+    ]
+
+
+def failed_sale(conn):
+    """Venda recusada (cliente inativo): a consulta que descobre o motivo."""
+    try:
+        SalesService(conn).register_sale(1, 2, 1, 5000000)
+    except ValidationError:
+        pass
+
+
+def failed_cart(conn):
+    """Carrinho com item sem estoque: a consulta que identifica o veículo."""
+    try:
+        SalesService(conn).register_cart(1, 1, [CartLine(3, 1000, 5000000)])
+    except OutOfStockError:
+        pass
+
+
+def inventory_next_pages(conn):
+    """Página seguinte do estoque que passa dos ativos para os inativos (as duas consultas por chave)."""
+    # Chave após o último ativo de seed_inventory ("Marca 9" e "Modelo 99" são os maiores na ordem do texto)
+    return InventoryService(conn, Catalog()).page((1, "Marca 9", "Modelo 99", 10 ** 9))
+
+
+# (descrição, chamada(conn), linhas de plano aceitas)
+# Uma linha aceita precisa ter o motivo ao lado; qualquer outra varredura ou ordenação temporária falha.
+APP_CALLS = [
+    ("login", lambda conn: UserService(conn).authenticate("admin", "admin"), ()),
+    ("versões das tabelas", lambda conn: table_versions(conn, "sales", "vehicles"), ()),
+    # Horizonte do change_log na abertura (SessionManager, API); as de seed_sales ficam fora das retidas.
+    # table_versions tem uma linha por tabela rastreada: percorrê-la inteira é o esperado
+    ("limpeza do change_log", lambda conn: prune_change_log(conn, retained=100), ("SCAN table_versions",)),
+    ("catálogo de marcas e modelos", lambda conn: Catalog().refresh(conn), ()),
+    *listing_calls(MAKES_LISTING),
+    *listing_calls(MODELS_LISTING),
+    *listing_calls(people_listing("customers")),
+    *listing_calls(people_listing("sellers")),
+    *listing_calls(USERS_LISTING),
+    *listing_calls(SALES_LISTING),
+    # Histórico de vendas paginado (sync_tree com page_size e load_tree_page), por (sale_ts, id)
+    ("sales: primeira página", lambda conn: fetch_changes(conn, SALES_LISTING, None, limit=200), ()),
+    ("sales: página seguinte", lambda conn: fetch_page(conn, SALES_LISTING, (SALES_START_TS + 4000 * SALE_INTERVAL, 4001), 200), ()),
+    ("estoque: primeira página", lambda conn: InventoryService(conn, Catalog()).page(), ()),
+    ("estoque: páginas seguintes", inventory_next_pages, ()),
+    ("estoque: veículo por id", lambda conn: InventoryService(conn, Catalog()).get(1), ()),
+    ("estoque: inativar veículo", lambda conn: InventoryService(conn, Catalog()).set_vehicle_active(4, False), ()),
+    ("estoque: reativar veículo", lambda conn: InventoryService(conn, Catalog()).set_vehicle_active(4, True), ()),
+    ("clientes: inativar", lambda conn: PeopleService("customers", conn).set_active(2, False), ()),
+    ("venda", lambda conn: SalesService(conn).register_sale(1, 1, 1, 5000000), ()),
+    ("venda recusada", failed_sale, ()),
+    ("carrinho", lambda conn: SalesService(conn).register_cart(1, 1, [CartLine(1, 2, 5000000), CartLine(2, 1, 4000000)]), ()),
+    ("carrinho sem estoque", failed_cart, ()),
+    # Busca (search.py): candidatos mais recentes lidos do índice FTS5 em ordem de rowid
+    ("busca de clientes ativos (FTS5)", lambda conn: search(conn, "joa", ["customers"], only_active=True), ()),
+    ("busca geral (FTS5)", lambda conn: search(conn, "fiat argo"), ()),
+    ("relatório de estoque", lambda conn: ReportService(conn).inventory_report(5, True).fetchall(), ()),
+    ("relatório de estoque (só disponíveis)", lambda conn: ReportService(conn).inventory_report(5, False).fetchall(), ()),
+    ("relatório de vendas", lambda conn: ReportService(conn).sales_report(1704067200, 1706745599).fetchall(), ()),
+    # O período vem na ordem da chave primária (day, seller_id, make); dentro de cada dia as
+    # linhas (uma por vendedor e marca) são ordenadas pelo nome do vendedor, que vem da junção
+    ("resumo de vendas", lambda conn: ReportService(conn).sales_summary(20240101, 20240131).fetchall(),
+     ("USE TEMP B-TREE FOR RIGHT PART OF ORDER BY",)),
+    # Os gráficos agregam o resumo diário (tamanho proporcional aos dias, não às vendas) e o estoque
+    # disponível. Os GROUP BY/ORDER BY dos totais ordenam resultados do tamanho do gráfico
+    # (períodos, vendedores, marcas); as faixas de preço ordenam só o número da faixa de cada
+    # veículo disponível do filtro, e o COUNT(DISTINCT) dos preços limita as faixas aos valores existentes.
+    ("análise: vendas por período (1 ano, por semana)",
+     lambda conn: ReportService(conn).analytics_data(AnalyticsFilter(20240101, 20241231, "week")),
+     ("USE TEMP B-TREE FOR GROUP BY", "USE TEMP B-TREE FOR ORDER BY", "USE TEMP B-TREE FOR count(DISTINCT)")),
+    ("análise: marca e vendedor",
+     lambda conn: ReportService(conn).analytics_data(AnalyticsFilter(granularity="day", make="Marca 1", seller_id=1)),
+     ("USE TEMP B-TREE FOR GROUP BY", "USE TEMP B-TREE FOR ORDER BY", "USE TEMP B-TREE FOR count(DISTINCT)")),
+    # API HTTP (api_server.py): páginas por chave
+    ("api: veículos à venda", lambda conn: InventoryService(conn, Catalog()).available_page(("Marca 1", "Modelo 1", 10), 100), ()),
+    ("api: vendas do período", lambda conn: ReportService(conn).sales_page(1704067200, 1706745599, page_size=100), ()),
+    ("api: estoque baixo", lambda conn: ReportService(conn).low_stock_page(5, page_size=100), ()),
+    ("api: totais por dia", lambda conn: ReportService(conn).daily_totals(20240101, 20240131), ()),
+]
+
+# Instruções verificadas (o resto do rastro é BEGIN/COMMIT e afins)
+EXPLAINED_KEYWORDS = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE")
+
+
+def plan_problems(conn, sql, accepted=()):
+    """Retorna as linhas do plano que indicam varredura completa ou ordenação temporária não aceitas."""
+    problems = []
+    subqueries = set()
+    for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}"):
+        detail = row[3]
+        # Percorrer o resultado de uma subconsulta não é varrer uma tabela
+        for prefix in ("CO-ROUTINE ", "MATERIALIZE "):
+            if detail.startswith(prefix):
+                subqueries.add(detail[len(prefix):])
+        full_scan = (detail.startswith("SCAN ") and " USING " not in detail and "CONSTANT ROW" not in detail
+                     and "VIRTUAL TABLE INDEX" not in detail and detail[len("SCAN "):] not in subqueries)
+        if (full_scan or "TEMP B-TREE" in detail) and detail not in accepted:
+            problems.append(detail)
+    return problems
+
+
+def traced_statements(conn, call):
+    """SQL executado pela chamada (com os parâmetros já expandidos), sem repetições e na ordem."""
+    statements = []
+    conn.set_trace_callback(statements.append)
+    try:
+        call(conn)
+    finally:
+        conn.set_trace_callback(None)
+    return [sql for sql in dict.fromkeys(statements) if sql.lstrip().upper().startswith(EXPLAINED_KEYWORDS)]
+
+
+def seed_inventory(conn, vehicles=5000):
+    """Estoque típico (maioria ativa, estoques baixos) + ANALYZE, para o planejador decidir como em produção."""
+    conn.executemany(
+        "INSERT INTO vehicles (make, model, manufacture_year, model_year, color, sale_price_cents, stock, is_active) "
+        "VALUES (?, ?, 2020, 2021, 'Preto', 5000000, ?, ?)",
+        [(f"Marca {i % 30}", f"Modelo {i % 300}", i % 21, int(i % 10 < 7)) for i in range(vehicles)]
+    )
+    refresh_statistics(conn)
+    conn.commit()
+
+
+def seed_sales(conn, people=200, sales=8000):
+    """Clientes e vendedores ativos (joão, maria...) e um ano de vendas, para o resumo diário e as buscas."""
+    for table in ("customers", "sellers"):
+        conn.executemany(
+            f"INSERT INTO {table} (name, phone, email) VALUES (?, '', ?)",
+            [(f"{('João', 'Maria', 'José')[i % 3]} {i}", f"{table}{i}@exemplo.com") for i in range(people)]
+        )
+    conn.execute("UPDATE vehicles SET stock = 50, is_active = 1 WHERE id IN (1, 2, 4)")
+    conn.execute("UPDATE vehicles SET stock = 0, is_active = 1 WHERE id = 3")
+    conn.executemany(
+        "INSERT INTO sales (vehicle_id, customer_id, seller_id, final_price_cents, sale_ts, sale_day) "
+        "VALUES (?, ?, ?, 5000000, ?, CAST(strftime('%Y%m%d', ?, 'unixepoch') AS INTEGER))",
+        [(1 + i % 5000, 1 + i % people, 1 + i % 20, SALES_START_TS + i * SALE_INTERVAL, SALES_START_TS + i * SALE_INTERVAL)
+         for i in range(sales)]
+    )
+    refresh_statistics(conn)
+    conn.commit()
+
+
+def main():
+    conn = sqlite3.connect(":memory:")
+    migrate(conn)
+    UserService(conn).setup()
+    seed_inventory(conn)
+    seed_sales(conn)
+    failures = checked = 0
+    for label, call, accepted in APP_CALLS:
+        statements = traced_statements(conn, call)
+        problems = [(sql, detail) for sql in statements for detail in plan_problems(conn, sql, accepted)]
+        checked += len(statements)
+        status = "FALHA" if problems or not statements else "ok"
+        print(f"[{status}] {label} ({len(statements)} instruções)")
+        for sql, detail in problems:
+            print(f"        {detail}\n          em: {' '.join(sql.split())[:160]}")
+        failures += status == "FALHA"
+    print(f"{len(APP_CALLS) - failures}/{len(APP_CALLS)} chamadas ({checked} instruções) sem varredura completa")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
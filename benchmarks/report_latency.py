@@ -0,0 +1,153 @@
+"""Latência dos relatórios antes e depois da conversão para inteiros (centavos/epoch).
+
+Gera um banco no esquema anterior (preços REAL e datas TEXT, migração 7),
+mede o relatório de vendas de um mês, o total por mês e a leitura da
+análise gráfica; aplica as migrações de conversão e mede as mesmas
+consultas sobre as colunas inteiras. Imprime o resultado em JSON.
+
+Uso:
+    python -m benchmarks.report_latency --sales 200000
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from database import connect
+from migrations import MIGRATIONS, migrate
+
+LEGACY_VERSION = 7
+
+SALES_JOIN = """
+    FROM sales s
+    LEFT JOIN vehicles v ON v.id = s.vehicle_id
+    LEFT JOIN customers c ON c.id = s.customer_id
+    LEFT JOIN sellers se ON se.id = s.seller_id
+"""
+
+LEGACY_QUERIES = {
+    "relatório de vendas (1 mês)": (
+        f"SELECT s.sale_date, v.make, v.model, c.name, se.name, s.final_price {SALES_JOIN} "
+        "WHERE s.sale_date BETWEEN ? AND ? || ' 23:59:59' ORDER BY s.sale_date DESC",
+        ("2024-06-01", "2024-06-30"),
+    ),
+    "faturamento por mês": (
+        "SELECT substr(sale_date, 1, 7), COUNT(*), SUM(final_price) FROM sales GROUP BY 1",
+        (),
+    ),
+}
+
+INTEGER_QUERIES = {
+    "relatório de vendas (1 mês)": (
+        f"SELECT s.sale_ts, v.make, v.model, c.name, se.name, s.final_price_cents {SALES_JOIN} "
+        "WHERE s.sale_ts BETWEEN ? AND ? ORDER BY s.sale_ts DESC",
+        (int(datetime(2024, 6, 1).timestamp()), int(datetime(2024, 7, 1).timestamp()) - 1),
+    ),
+    "faturamento por mês": (
+        "SELECT sale_day / 100, COUNT(*), SUM(final_price_cents) FROM sales GROUP BY 1",
+        (),
+    ),
+}
+
+
+def build_legacy_database(path, sales):
+    """Cria o banco na versão 7 com vendas em REAL/TEXT."""
+    conn = sqlite3.connect(path)
+    for migration in MIGRATIONS:
+        if migration.version <= LEGACY_VERSION:
+            migration.run(conn)
+    rng = random.Random(42)
+    conn.executemany(
+        "INSERT INTO sellers (name, email) VALUES (?, ?)",
+        [(f"Vendedor {i}", f"vendedor{i}@loja") for i in range(50)]
+    )
+    conn.executemany(
+        "INSERT INTO customers (name, email) VALUES (?, ?)",
+        [(f"Cliente {i}", f"cliente{i}@loja") for i in range(5000)]
+    )
+    conn.executemany(
+        "INSERT INTO vehicles (make, model, manufacture_year, model_year, color, sale_price, stock) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [(f"Marca {i % 20}", f"Modelo {i}", 2020, 2021, "Preto", rng.randint(30000, 300000) + 0.99, 10) for i in range(2000)]
+    )
+    start = datetime(2020, 1, 1)
+    conn.executemany(
+        "INSERT INTO sales (vehicle_id, customer_id, seller_id, final_price, sale_date) VALUES (?, ?, ?, ?, ?)",
+        (
+            (
+                rng.randint(1, 2000), rng.randint(1, 5000), rng.randint(1, 50),
+                rng.randint(30000, 300000) + rng.randint(0, 99) / 100,
+                (start + timedelta(seconds=rng.randint(0, 5 * 365 * 86400))).strftime("%Y-%m-%d %H:%M:%S"),
+            )
+            for _ in range(sales)
+        )
+    )
+    conn.commit()
+    conn.close()
+
+
+def time_queries(conn, queries, repeat):
+    """Melhor tempo (ms) de cada consulta, consumindo todas as linhas."""
+    results = {}
+    for label, (sql, params) in queries.items():
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            conn.execute(sql, params).fetchall()
+            elapsed = (time.perf_counter() - started) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        results[label] = round(best, 2)
+    return results
+
+
+def time_analytics_load(conn, legacy):
+    """Leitura das vendas para a análise gráfica, incluindo a obtenção do mês de cada venda."""
+    started = time.perf_counter()
+    if legacy:
+        # Equivalente ao pd.to_datetime(...).dt.to_period('M') feito antes
+        months = [datetime.strptime(d, "%Y-%m-%d %H:%M:%S").strftime("%Y-%m") for (d,) in conn.execute("SELECT sale_date FROM sales")]
+    else:
+        months = [day // 100 for (day,) in conn.execute("SELECT sale_day FROM sales")]
+    elapsed = (time.perf_counter() - started) * 1000
+    return round(elapsed, 2), len(months)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sales", type=int, default=200_000, help="quantidade de vendas geradas")
+    parser.add_argument("--repeat", type=int, default=5, help="repetições por consulta (melhor tempo)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        build_legacy_database(path, args.sales)
+        conn = connect(path)
+
+        before = time_queries(conn, LEGACY_QUERIES, args.repeat)
+        before["análise: leitura + mês"], _ = time_analytics_load(conn, legacy=True)
+        legacy_total = conn.execute("SELECT SUM(final_price) FROM sales").fetchone()[0]
+
+        started = time.perf_counter()
+        migrate(conn)
+        migration_s = round(time.perf_counter() - started, 2)
+
+        after = time_queries(conn, INTEGER_QUERIES, args.repeat)
+        after["análise: leitura + mês"], _ = time_analytics_load(conn, legacy=False)
+        cents_total = conn.execute("SELECT SUM(final_price_cents) FROM sales").fetchone()[0]
+        conn.close()
+
+    print(json.dumps({
+        "sales": args.sales,
+        "before_ms": before,
+        "after_ms": after,
+        "migration_s": migration_s,
+        # Diferença acumulada pela soma em ponto flutuante frente à soma exata em centavos
+        "revenue_drift": round(legacy_total - cents_total / 100, 6),
+    }, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
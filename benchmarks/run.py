@@ -0,0 +1,263 @@
+"""Benchmarks dos caminhos da aplicação sobre bancos sintéticos (sem interface gráfica).
+
+Gera (ou reaproveita do cache) um banco com benchmarks.datagen e mede as
+mesmas consultas e transformações usadas pela aplicação (os serviços de
+services.py e a formatação das listas de app.py): páginas do estoque e do histórico de vendas, histórico incremental,
+relatórios exportados em CSV, dados e tabelas da análise gráfica, busca e
+registro de vendas. Cada medição é repetida e informa mediana e mínimo em
+milissegundos. O resultado sai em JSON (tela ou --output) e pode ser
+comparado com o de outro commit (--compare).
+
+Uso:
+    python -m benchmarks.run --sales 10000
+    python -m benchmarks.run --sales 1000000 --output depois.json --compare antes.json
+    python -m benchmarks.run --sales 10000000 --only estoque,relatório
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+from app import format_inventory_row, format_sale_row
+from benchmarks.datagen import DATAGEN_VERSION, generate
+from database import connect
+from exports import export_rows
+from migrations import migrate, table_versions
+from search import search
+from services import (
+    SALES_HISTORY_PAGE_SIZE, SALES_LISTING, AnalyticsFilter, CartLine, InventoryService, ReportService, SalesService,
+    fetch_changes, fetch_page,
+)
+
+# Vendas registradas na medição de register_sale
+SALES_TO_REGISTER = 100
+# Unidades de cada carrinho na medição de register_cart (venda de frota)
+FLEET_UNITS = 30
+# Limite de estoque baixo usado no relatório e nas cores da lista
+STOCK_THRESHOLD = 5
+
+
+def cached_database(sales, seed, data_dir):
+    """Banco gerado para (vendas, semente), guardado em data_dir para as próximas execuções."""
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"vendas_{sales}_s{seed}_v{DATAGEN_VERSION}.db")
+    if not os.path.exists(path):
+        temp_path = f"{path}.tmp"
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        print(f"Gerando {path}...")
+        generate(temp_path, sales, seed=seed, progress=lambda step: print(f"  {step}..."))
+        os.replace(temp_path, path)
+    return path
+
+
+def measure(repeat, func):
+    """Executa func() repeat vezes; retorna mediana, mínimo (ms) e o último resultado (linhas)."""
+    timings = []
+    rows = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return {"median_ms": round(statistics.median(timings), 2), "min_ms": round(min(timings), 2), "rows": rows}
+
+
+def _inventory_page(inventory, last_key):
+    vehicles = inventory.page(last_key)
+    for vehicle in vehicles:
+        format_inventory_row(vehicle, STOCK_THRESHOLD)
+    return len(vehicles)
+
+
+def _sales_history(conn, base_version):
+    # Mesmo caminho de sync_tree: primeira página (base_version None) ou só as vendas alteradas
+    # (None: nenhuma venda nova, como com --only sem "registrar venda")
+    sales = fetch_changes(conn, SALES_LISTING, base_version, limit=SALES_HISTORY_PAGE_SIZE)[2] or []
+    for sale in sales:
+        format_sale_row(sale)
+    return len(sales)
+
+
+def _sales_history_page(conn, after):
+    # Mesmo caminho de load_tree_page: a página seguinte à última venda exibida
+    sales = fetch_page(conn, SALES_LISTING, after, SALES_HISTORY_PAGE_SIZE)
+    for sale in sales:
+        format_sale_row(sale)
+    return len(sales)
+
+
+def _export(tmp, cursor):
+    return export_rows(cursor, [column[0] for column in cursor.description], os.path.join(tmp, "relatorio.csv"))
+
+
+def _register_sale(sales, vehicle_ids, customer_id, seller_id):
+    # Cada chamada vende um veículo diferente (o estoque de um só acabaria)
+    sales.register_sale(next(vehicle_ids), customer_id, seller_id, 10_000_000)
+    return 1
+
+
+def fleet_carts(conn, count, units):
+    """count carrinhos de units unidades cada, esgotando veículos com estoque (um carrinho por medição)."""
+    rows = conn.execute(
+        "SELECT id, stock, sale_price_cents FROM vehicles WHERE is_active = 1 AND stock > 0 ORDER BY stock DESC, id"
+    )
+    carts = []
+    cart, missing = [], units
+    for vehicle_id, stock, price in rows:
+        quantity = min(stock, missing)
+        cart.append(CartLine(vehicle_id, quantity, price))
+        missing -= quantity
+        if not missing:
+            carts.append(cart)
+            if len(carts) == count:
+                break
+            cart, missing = [], units
+    return carts
+
+
+def _register_cart(sales, carts, customer_id, seller_id):
+    cart = next(carts)
+    return sales.register_cart(customer_id, seller_id, cart).units
+
+
+def run_benchmarks(path, repeat, only, tmp):
+    """Mede cada caminho da aplicação; retorna {nome: medição}."""
+    conn = connect(path)
+    migrate(conn)
+    reader = connect(path, read_only=True)
+    inventory = InventoryService(reader)
+    reports = ReportService(reader)
+    results = {}
+
+    def bench(name, func, times=repeat):
+        if only and not any(word in name for word in only):
+            return
+        results[name] = measure(times, func)
+
+    # Estoque (refresh_inventory_list/load_inventory_page): primeira página e uma página no meio da lista
+    bench("estoque: primeira página", lambda: _inventory_page(inventory, None))
+    vehicles = reader.execute("SELECT COUNT(*) FROM vehicles").fetchone()[0]
+    middle = reader.execute(
+        "SELECT is_active, make, model, id FROM vehicles ORDER BY is_active DESC, make, model, id LIMIT 1 OFFSET ?",
+        (vehicles // 2,)
+    ).fetchone()
+    bench("estoque: página no meio (keyset)", lambda: _inventory_page(inventory, middle))
+
+    # Histórico de vendas (refresh_sales_history): primeira página e a página no meio do histórico
+    bench("histórico de vendas: primeira página", lambda: _sales_history(reader, None))
+    sales = reader.execute("SELECT COUNT(*) FROM sales").fetchone()[0]
+    middle_sale = reader.execute(
+        "SELECT sale_ts, id FROM sales ORDER BY sale_ts DESC, id DESC LIMIT 1 OFFSET ?", (sales // 2,)
+    ).fetchone()
+    bench("histórico de vendas: página no meio (keyset)", lambda: _sales_history_page(reader, middle_sale))
+
+    # Relatórios (prepare_report + generate_report) exportados em CSV
+    today = date.today()
+    last_ts = int(datetime(today.year, today.month, today.day).timestamp()) + 86399
+    month_ts = int(datetime.combine(today - timedelta(days=30), datetime.min.time()).timestamp())
+    year_ts = int(datetime.combine(today - timedelta(days=365), datetime.min.time()).timestamp())
+    year_day = int((today - timedelta(days=365)).strftime("%Y%m%d"))
+    today_day = int(today.strftime("%Y%m%d"))
+    bench("relatório: estoque baixo", lambda: _export(tmp, reports.inventory_report(STOCK_THRESHOLD, False)))
+    bench("relatório: vendas 30 dias", lambda: _export(tmp, reports.sales_report(month_ts, last_ts)))
+    bench("relatório: vendas 1 ano", lambda: _export(tmp, reports.sales_report(year_ts, last_ts)), times=1)
+    bench("relatório: resumo de vendas 1 ano", lambda: _export(tmp, reports.sales_summary(year_day, today_day)))
+
+    # Análise gráfica (plot_analytics): agregações no SQL, sem filtro e com os filtros da aba
+    bench("análise: consultas", lambda: len(reports.analytics_data().sales_by_period))
+    make = reader.execute("SELECT make FROM vehicles LIMIT 1").fetchone()[0]
+    seller_id = reader.execute("SELECT id FROM sellers LIMIT 1").fetchone()[0]
+    bench("análise: 1 ano por dia", lambda: len(reports.analytics_data(AnalyticsFilter(year_day, today_day, "day")).sales_by_period))
+    bench("análise: por semana, marca e vendedor",
+          lambda: len(reports.analytics_data(AnalyticsFilter(granularity="week", make=make, seller_id=seller_id)).sales_by_period))
+
+    # Busca da aba de vendas (digitação de um prefixo curto e de um nome)
+    bench("busca: prefixo curto", lambda: len(search(reader, "si", ["customers"], only_active=True)))
+    bench("busca: nome e sobrenome", lambda: len(search(reader, "maria silva", ["customers"], only_active=True)))
+
+    # Registro de vendas (register_sale) e a atualização incremental do histórico que vem em seguida
+    if not only or any(word in name for word in only for name in ("registrar venda", "histórico de vendas: incremental")):
+        vehicle_ids = [row[0] for row in conn.execute(
+            "SELECT id FROM vehicles WHERE is_active = 1 AND stock > 0 ORDER BY id LIMIT ?", (SALES_TO_REGISTER,)
+        )]
+        iter_ids = iter(vehicle_ids)
+        customer_id = conn.execute("SELECT id FROM customers WHERE is_active = 1 LIMIT 1").fetchone()[0]
+        seller_id = conn.execute("SELECT id FROM sellers WHERE is_active = 1 LIMIT 1").fetchone()[0]
+        base_version, = table_versions(reader, "sales")
+        bench("registrar venda", lambda: _register_sale(SalesService(conn), iter_ids, customer_id, seller_id), times=len(vehicle_ids))
+        bench("histórico de vendas: incremental", lambda: _sales_history(reader, base_version))
+        # Venda de frota: o carrinho inteiro numa transação (comparar com FLEET_UNITS x "registrar venda")
+        carts = fleet_carts(conn, repeat, FLEET_UNITS)
+        iter_carts = iter(carts)
+        bench(f"registrar venda: carrinho de {FLEET_UNITS} unidades", lambda: _register_cart(SalesService(conn), iter_carts, customer_id, seller_id), times=len(carts))
+
+    reader.close()
+    conn.close()
+    return results
+
+
+def compare(results, previous):
+    """Razão atual/anterior da mediana de cada medição presente nos dois resultados."""
+    ratios = {}
+    for name, result in results.items():
+        before = previous.get("results", {}).get(name)
+        if isinstance(result, dict) and isinstance(before, dict) and before.get("median_ms"):
+            ratios[name] = round(result["median_ms"] / before["median_ms"], 2)
+    return ratios
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sales", type=int, default=10_000, help="vendas do banco sintético (ex.: 10000, 1000000, 10000000)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=5, help="repetições de cada medição")
+    parser.add_argument("--only", help="mede só os itens cujo nome contém uma das palavras (separadas por vírgula)")
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "vehicle_bench"),
+                        help="cache dos bancos gerados (padrão: %(default)s)")
+    parser.add_argument("--output", help="grava o JSON neste arquivo")
+    parser.add_argument("--compare", help="JSON de uma execução anterior para comparar")
+    args = parser.parse_args()
+
+    source = cached_database(args.sales, args.seed, args.data_dir)
+    only = [word.strip() for word in args.only.split(",")] if args.only else None
+    with tempfile.TemporaryDirectory() as tmp:
+        # O registro de vendas altera o banco: as medições rodam sobre uma cópia
+        path = os.path.join(tmp, "bench.db")
+        shutil.copyfile(source, path)
+        results = run_benchmarks(path, args.repeat, only, tmp)
+
+    report = {
+        "commit": git_commit(),
+        "sales": args.sales,
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "sqlite": sqlite3.sqlite_version,
+        "python": platform.python_version(),
+        "results": results,
+    }
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            report["ratio_vs_previous"] = compare(results, json.load(f))
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Vendas concorrentes das mesmas unidades: vazão e verificação de venda acima do estoque.
+
+Vários terminais (processos) vendem ao mesmo tempo, sorteando entre os mesmos
+poucos veículos, até esgotar o estoque de todos. Ao final confere, veículo a
+veículo, que as vendas gravadas batem com a baixa do estoque, que nenhum
+estoque ficou negativo e que todo veículo zerado foi inativado. Compara
+SalesService.register_sale (BEGIN IMMEDIATE + UPDATE ... RETURNING) com a
+sequência anterior de quatro instruções em transação adiada (--legacy).
+
+Uso:
+    python -m benchmarks.sale_contention --terminals 2
+    python -m benchmarks.sale_contention --terminals 8 --vehicles 20 --stock 500 --legacy
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.concurrency import percentile
+from database import connect
+from migrations import migrate
+from services import OutOfStockError, SalesService
+
+
+def prepare_database(path, vehicles, stock):
+    """Banco novo com os veículos disputados, um cliente e um vendedor."""
+    conn = connect(path)
+    migrate(conn)
+    conn.executemany(
+        "INSERT INTO vehicles (make, model, manufacture_year, model_year, color, sale_price_cents, stock) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [("Disputa", f"Modelo {i}", 2024, 2024, "Preto", 10_000_000, stock) for i in range(vehicles)]
+    )
+    customer_id = conn.execute("INSERT INTO customers (name, email) VALUES ('Cliente Disputa', 'cliente@disputa')").lastrowid
+    seller_id = conn.execute("INSERT INTO sellers (name, email) VALUES ('Vendedor Disputa', 'vendedor@disputa')").lastrowid
+    conn.commit()
+    vehicle_ids = [row[0] for row in conn.execute("SELECT id FROM vehicles ORDER BY id")]
+    conn.close()
+    return vehicle_ids, customer_id, seller_id
+
+
+def legacy_sale(conn, vehicle_id, customer_id, seller_id, final_price_cents):
+    """Sequência anterior: UPDATE, INSERT, SELECT do estoque e UPDATE de inativação, em transação adiada."""
+    try:
+        if conn.execute("UPDATE vehicles SET stock = stock - 1 WHERE id = ? AND stock > 0", (vehicle_id,)).rowcount == 0:
+            conn.rollback()
+            raise OutOfStockError("Estoque insuficiente para este veículo.")
+        now = datetime.now()
+        conn.execute(
+            "INSERT INTO sales (vehicle_id, customer_id, seller_id, final_price_cents, sale_ts, sale_day) VALUES (?, ?, ?, ?, ?, ?)",
+            (vehicle_id, customer_id, seller_id, final_price_cents, int(now.timestamp()), int(now.strftime("%Y%m%d")))
+        )
+        stock_left = conn.execute("SELECT stock FROM vehicles WHERE id = ?", (vehicle_id,)).fetchone()[0]
+        if stock_left == 0:
+            conn.execute("UPDATE vehicles SET is_active = 0, sale_date_only = ? WHERE id = ?", (now.strftime("%Y-%m-%d"), vehicle_id))
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+def sales_terminal(path, legacy, vehicle_ids, customer_id, seller_id, deadline, seed, results):
+    """Vende unidades sorteadas até todos os veículos esgotarem (ou o prazo acabar)."""
+    conn = connect(path)
+    sales = SalesService(conn)
+    rng = random.Random(seed)
+    remaining = list(vehicle_ids)
+    sold = out_of_stock = locked = 0
+    latencies = []
+    while remaining and time.time() < deadline:
+        vehicle_id = rng.choice(remaining)
+        started = time.perf_counter()
+        try:
+            if legacy:
+                legacy_sale(conn, vehicle_id, customer_id, seller_id, 10_000_000)
+            else:
+                sales.register_sale(vehicle_id, customer_id, seller_id, 10_000_000)
+            latencies.append(time.perf_counter() - started)
+            sold += 1
+        except OutOfStockError:
+            # Outro terminal vendeu a última unidade
+            remaining.remove(vehicle_id)
+            out_of_stock += 1
+        except sqlite3.OperationalError as e:
+            if "locked" not in str(e):
+                raise
+            locked += 1
+    conn.close()
+    results.put({"sold": sold, "out_of_stock": out_of_stock, "locked": locked, "latencies": latencies, "finished": time.time()})
+
+
+def check_consistency(path, vehicle_ids, stock):
+    """Confere estoque, vendas e inativação de cada veículo; retorna (unidades vendidas a mais, inconsistências)."""
+    conn = connect(path, read_only=True)
+    placeholders = ", ".join("?" for _ in vehicle_ids)
+    sold = dict(conn.execute(
+        f"SELECT vehicle_id, SUM(quantity) FROM sales WHERE vehicle_id IN ({placeholders}) GROUP BY vehicle_id", vehicle_ids
+    ).fetchall())
+    oversold = 0
+    problems = []
+    for vehicle_id, left, is_active, sale_date in conn.execute(
+        f"SELECT id, stock, is_active, sale_date_only FROM vehicles WHERE id IN ({placeholders})", vehicle_ids
+    ):
+        count = sold.get(vehicle_id, 0)
+        oversold += max(0, count - stock)
+        if left < 0 or count != stock - left:
+            problems.append(f"veículo {vehicle_id}: {count} vendas, estoque final {left}")
+        if left == 0 and (is_active or not sale_date):
+            problems.append(f"veículo {vehicle_id}: estoque zero mas não inativado")
+    conn.close()
+    return oversold, problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--terminals", type=int, default=2, help="terminais vendendo ao mesmo tempo")
+    parser.add_argument("--vehicles", type=int, default=10, help="veículos disputados")
+    parser.add_argument("--stock", type=int, default=500, help="unidades de cada veículo")
+    parser.add_argument("--duration", type=float, default=60, help="tempo máximo em segundos")
+    parser.add_argument("--legacy", action="store_true", help="sequência anterior de quatro instruções (transação adiada)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "disputa.db")
+        vehicle_ids, customer_id, seller_id = prepare_database(path, args.vehicles, args.stock)
+        results = multiprocessing.Queue()
+        started = time.time()
+        processes = [
+            multiprocessing.Process(target=sales_terminal, args=(
+                path, args.legacy, vehicle_ids, customer_id, seller_id, started + args.duration, i, results
+            ))
+            for i in range(args.terminals)
+        ]
+        for process in processes:
+            process.start()
+        collected = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        elapsed = max(r["finished"] for r in collected) - started
+        oversold, problems = check_consistency(path, vehicle_ids, args.stock)
+
+    latencies = [lat for r in collected for lat in r["latencies"]]
+    sold = sum(r["sold"] for r in collected)
+    summary = {
+        "mode": "legacy" if args.legacy else "returning",
+        "terminals": args.terminals,
+        "units": args.vehicles * args.stock,
+        "sold": sold,
+        "elapsed_s": round(elapsed, 2),
+        "sales_per_s": round(sold / elapsed, 1),
+        "sale_p50_ms": round(percentile(latencies, 0.5) * 1000, 2) if latencies else None,
+        "sale_p99_ms": round(percentile(latencies, 0.99) * 1000, 2) if latencies else None,
+        "out_of_stock_attempts": sum(r["out_of_stock"] for r in collected),
+        "locked_errors": sum(r["locked"] for r in collected),
+        "oversold_units": oversold,
+        "problems": problems[:10],
+    }
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+    return 1 if oversold or problems else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,85 @@
+"""Latência da busca textual (FTS5) com um histórico grande de vendas.
+
+Cria um banco temporário com N vendas (indexadas pelos triggers), executa
+buscas típicas de digitação (prefixos curtos, nomes completos, filtros por
+entidade e só ativos) e mede o tempo de cada uma. Todas devem ficar abaixo
+de 50 ms. Imprime o resultado em JSON.
+
+Uso:
+    python -m benchmarks.search_latency --sales 1000000
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from database import connect
+from migrations import migrate
+from search import search
+
+# Limite de latência por busca, em milissegundos
+TARGET_MS = 50
+# Execuções por busca (vale o pior tempo)
+REPEAT = 5
+
+QUERIES = [
+    ("j", None, False),
+    ("jo", None, False),
+    ("joao", None, False),
+    ("joao sil", None, False),
+    ("cliente 42", ["customers"], False),
+    ("marca 3 modelo", ["vehicles"], True),
+    ("vendedor 7", ["sellers"], True),
+    ("maria souza", ["sales"], False),
+]
+FIRST_NAMES = ["João", "Maria", "José", "Ana", "Carlos", "Paula"]
+LAST_NAMES = ["Silva", "Souza", "Oliveira", "Santos", "Pereira", "Lima"]
+
+
+def build_database(path, sales):
+    """Banco com 500 veículos, 5000 clientes, 20 vendedores e N vendas."""
+    conn = connect(path)
+    migrate(conn)
+    conn.executemany(
+        "INSERT INTO vehicles (make, model, manufacture_year, model_year, color, sale_price_cents, stock) VALUES (?, ?, 2020, 2021, 'Preto', ?, ?)",
+        [(f"Marca {i % 10}", f"Modelo {i}", 5000000 + i, i % 3) for i in range(500)]
+    )
+    conn.executemany(
+        "INSERT INTO customers (name, email) VALUES (?, ?)",
+        [(f"{random.choice(FIRST_NAMES)} {random.choice(LAST_NAMES)} Cliente {i}", f"cliente{i}@exemplo.com") for i in range(5000)]
+    )
+    conn.executemany("INSERT INTO sellers (name) VALUES (?)", [(f"Vendedor {i}",) for i in range(20)])
+    start = 1577836800  # 2020-01-01
+    conn.executemany(
+        "INSERT INTO sales (vehicle_id, customer_id, seller_id, final_price_cents, sale_ts, sale_day) VALUES (?, ?, ?, ?, ?, 20200101)",
+        ((random.randint(1, 500), random.randint(1, 5000), random.randint(1, 20), 5000000, start + i * 60) for i in range(sales))
+    )
+    conn.commit()
+    return conn
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sales", type=int, default=200000)
+    args = parser.parse_args()
+
+    results = {"sales": args.sales, "target_ms": TARGET_MS, "queries": {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = build_database(os.path.join(tmp, "bench.db"), args.sales)
+        for text, entities, only_active in QUERIES:
+            timings = []
+            for _ in range(REPEAT):
+                started = time.perf_counter()
+                rows = search(conn, text, entities, only_active)
+                timings.append((time.perf_counter() - started) * 1000)
+            label = f"{text} [{','.join(entities or ['todas'])}{', ativos' if only_active else ''}]"
+            results["queries"][label] = {"results": len(rows), "max_ms": round(max(timings), 1)}
+        conn.close()
+    results["ok"] = all(query["max_ms"] < TARGET_MS for query in results["queries"].values())
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""Memória e recursos ao longo de muitos ciclos de login/logout na mesma janela.
+
+Abre a aplicação com o SessionManager (uma raiz Tk, um mainloop) sobre um
+banco temporário e repete: login (alternando Admin e um usuário comum),
+processa os eventos por --settle-ms (as consultas iniciais chegam à tela) e
+logout. Depois do aquecimento mede memória Python (tracemalloc), RSS,
+objetos vivos, comandos Tcl, widgets, descritores de arquivo abertos e
+threads; ao final, só a memória Python pode ter crescido um pouco (até
+MAX_GROWTH_KIB) e as contagens de recursos devem ser as mesmas. Também mede
+o tempo até a janela responder após o login (montagem só da aba visível),
+que deve ficar igual com bancos maiores (compare --sales), e conta as
+leituras do user_version feitas no login (as migrações rodam uma vez, na
+abertura da sessão, e não a cada login). Imprime o resultado em JSON.
+
+Sem display (--headless, ou quando o Tk não consegue abrir a janela) os
+ciclos repetem só a parte da sessão que não depende de widgets: as mesmas
+conexões e threads (consultas e tarefas longas) do SessionManager, a
+autenticação, os serviços de VehicleStoreApp e as consultas da aba aberta no
+login (Parâmetros), entregues por um laço que faz o papel do mainloop. Nesse modo
+comandos Tcl e widgets não são medidos; para medi-los, use xvfb-run.
+
+Uso:
+    python -m benchmarks.session_cycles --cycles 500
+    xvfb-run python -m benchmarks.session_cycles --cycles 500 --sales 50000
+    python -m benchmarks.session_cycles --cycles 500 --headless
+"""
+import argparse
+import gc
+import heapq
+import itertools
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import tkinter as tk
+import tracemalloc
+
+from app import SessionManager
+from benchmarks.concurrency import percentile
+from benchmarks.export_memory import build_database
+from catalog import get_catalog
+from database import get_connection_manager
+from migrations import prune_change_log
+from query_executor import QueryExecutor
+from services import (
+    MAKES_LISTING, MODELS_LISTING, InventoryService, PeopleService, SalesService, UserService, fetch_changes,
+)
+
+# Ciclos antes da primeira medição (caches do Tk, do SQLite e dos serviços já aquecidos)
+WARMUP_CYCLES = 20
+# Crescimento aceito da memória Python entre a medição após o aquecimento e a final
+MAX_GROWTH_KIB = 512
+# Contagens que não podem crescer entre as medições
+RESOURCE_KEYS = ("tcl_commands", "widgets", "open_fds", "threads")
+# Usuário comum (sem a aba de Admin) usado nos ciclos ímpares
+PLAIN_USER = ("caixa", "Caixa", "caixa")
+
+
+def rss_kib():
+    """Memória residente do processo (Linux); None em outros sistemas."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError):
+        return None
+
+
+def open_fds():
+    """Descritores de arquivo abertos (Linux); None em outros sistemas."""
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        return None
+
+
+def count_widgets(widget):
+    return 1 + sum(count_widgets(child) for child in widget.winfo_children())
+
+
+def snapshot(root):
+    gc.collect()
+    headless = isinstance(root, HeadlessLoop)
+    return {
+        "python_kib": tracemalloc.get_traced_memory()[0] // 1024,
+        "rss_kib": rss_kib(),
+        "objects": len(gc.get_objects()),
+        "tcl_commands": None if headless else len(root.tk.splitlist(root.tk.call("info", "commands"))),
+        "widgets": None if headless else count_widgets(root),
+        "open_fds": open_fds(),
+        "threads": threading.active_count(),
+    }
+
+
+class HeadlessLoop:
+    """Faz o papel do mainloop sem display: executa os after() agendados (entregas do QueryExecutor)."""
+
+    def __init__(self):
+        self._scheduled = []
+        self._order = itertools.count()
+
+    def after(self, ms, func):
+        heapq.heappush(self._scheduled, (time.perf_counter() + ms / 1000, next(self._order), func))
+
+    def update(self):
+        while self._scheduled and self._scheduled[0][0] <= time.perf_counter():
+            heapq.heappop(self._scheduled)[2]()
+
+
+class HeadlessSession:
+    """A parte da sessão (SessionManager + VehicleStoreApp) que não depende de widgets."""
+
+    def __init__(self, loop, path):
+        self.db = get_connection_manager(path)
+        self.queries = QueryExecutor(loop, path)
+        self.long_jobs = QueryExecutor(loop, path)
+        self.users = UserService(self.db.writer)
+        # Como SessionManager.setup_db: migrações, admin padrão e limpeza do change_log uma vez por processo
+        self.users.setup()
+        prune_change_log(self.db.writer)
+        self.app = None
+
+    def login(self, username, password):
+        user = self.users.authenticate(username, password)
+        if user is None:
+            raise RuntimeError(f"login de {username!r} falhou")
+        conn = self.db.writer
+        catalog = get_catalog(self.db.path)
+        # Serviços criados por VehicleStoreApp e as listas da aba de Parâmetros, lidas na thread de consultas
+        self.app = {
+            "services": (InventoryService(conn, catalog), PeopleService("customers", conn),
+                         PeopleService("sellers", conn), SalesService(conn), UserService(conn)),
+            "lists": {},
+        }
+        for listing in (MAKES_LISTING, MODELS_LISTING):
+            self.queries.submit(
+                lambda reader, job, listing=listing: fetch_changes(reader, listing, None),
+                lambda result, lists=self.app["lists"], table=listing.table: lists.__setitem__(table, result[2]),
+                group="parametros", key=f"tree:{listing.table}"
+            )
+
+    def logout(self):
+        # Como VehicleStoreApp.close: as consultas pendentes da sessão deixam de ser entregues
+        self.queries.cancel()
+        self.long_jobs.cancel()
+        self.app = None
+
+    def close(self):
+        self.queries.close(wait=True)
+        self.long_jobs.close(wait=True)
+        self.db.close()
+
+
+def pump(root, seconds):
+    """Processa os eventos do Tk (e as entregas da thread de consultas) pelo tempo informado."""
+    deadline = time.perf_counter() + seconds
+    while True:
+        root.update()
+        if time.perf_counter() >= deadline:
+            return
+        time.sleep(0.002)
+
+
+def login(session, username, password):
+    if isinstance(session, HeadlessSession):
+        session.login(username, password)
+        return
+    screen = session.login
+    screen.username_entry.delete(0, tk.END)
+    screen.username_entry.insert(0, username)
+    screen.password_entry.delete(0, tk.END)
+    screen.password_entry.insert(0, password)
+    screen.authenticate()
+    if session.app is None:
+        raise RuntimeError(f"login de {username!r} falhou")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cycles", type=int, default=500, help="ciclos de login/logout medidos (após o aquecimento)")
+    parser.add_argument("--sales", type=int, default=20000, help="vendas do banco temporário")
+    parser.add_argument("--settle-ms", type=float, default=30, help="tempo de eventos processados em cada sessão")
+    parser.add_argument("--headless", action="store_true", help="sem janela: só conexões, consultas e serviços da sessão")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        conn = build_database(path, args.sales)
+        users = UserService(conn)
+        users.setup()
+        users.add_user(*PLAIN_USER)
+        conn.close()
+
+        root = None
+        if not args.headless:
+            try:
+                root = tk.Tk()
+            except tk.TclError as e:
+                print(f"Sem display ({e}); executando sem janela (--headless).", file=sys.stderr)
+        if root is None:
+            root = HeadlessLoop()
+            session = HeadlessSession(root, path)
+        else:
+            session = SessionManager(root, path)
+        # Leituras do user_version (migrate) feitas pela conexão de escrita durante os logins
+        version_reads = []
+        session.db.writer.set_trace_callback(
+            lambda sql: version_reads.append(sql) if "user_version" in sql.lower() else None
+        )
+        accounts = [("admin", "admin"), (PLAIN_USER[0], PLAIN_USER[2])]
+        tracemalloc.start()
+        started = time.perf_counter()
+        baseline = None
+        login_times = []
+        for i in range(WARMUP_CYCLES + args.cycles):
+            if i == WARMUP_CYCLES:
+                baseline = snapshot(root)
+            login_started = time.perf_counter()
+            login(session, *accounts[i % 2])
+            root.update()
+            login_times.append(time.perf_counter() - login_started)
+            pump(root, args.settle_ms / 1000)
+            if isinstance(session, HeadlessSession):
+                session.logout()
+            else:
+                session.app.logout()
+            root.update()
+        elapsed = time.perf_counter() - started
+        final = snapshot(root)
+        tracemalloc.stop()
+        session.close()
+
+    growth = {key: final[key] - baseline[key] for key in final if final[key] is not None and baseline[key] is not None}
+    result = {
+        "mode": "headless" if isinstance(root, HeadlessLoop) else "tk",
+        "cycles": args.cycles,
+        "seconds": round(elapsed, 2),
+        "cycle_ms": round(elapsed / (WARMUP_CYCLES + args.cycles) * 1000, 1),
+        "sales": args.sales,
+        "login_p50_ms": round(percentile(login_times, 0.5) * 1000, 1),
+        "login_p99_ms": round(percentile(login_times, 0.99) * 1000, 1),
+        "user_version_reads_per_login": round(len(version_reads) / (WARMUP_CYCLES + args.cycles), 2),
+        "after_warmup": baseline,
+        "final": final,
+        "growth": growth,
+        "steady": growth["python_kib"] <= MAX_GROWTH_KIB and all(growth.get(key, 0) <= 0 for key in RESOURCE_KEYS),
+    }
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    return 0 if result["steady"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
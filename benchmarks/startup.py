@@ -0,0 +1,76 @@
+"""Tempo de importação do app na partida a frio (python -X importtime).
+
+Importa o módulo app em processos novos (sem módulos em cache na memória),
+lê o relatório de -X importtime e mede o tempo acumulado do import de app.
+Falha (código de saída 1) se a mediana passar de --max-ms ou se alguma das
+dependências pesadas (matplotlib, numpy, pandas, openpyxl, pyarrow) for
+importada na abertura: elas só devem ser carregadas no primeiro uso dos
+gráficos ou da exportação, ou no pré-carregamento após o login. Imprime o
+resultado em JSON, com os módulos mais caros da última execução.
+
+Uso:
+    python -m benchmarks.startup
+    python -m benchmarks.startup --runs 10 --max-ms 200
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Bibliotecas que não podem fazer parte da abertura do app
+HEAVY_MODULES = ("matplotlib", "numpy", "pandas", "openpyxl", "pyarrow")
+# Módulos mais caros (tempo próprio) listados no resultado
+TOP_MODULES = 10
+
+
+def import_profile(module):
+    """Executa 'import module' num processo novo; retorna {módulo: (próprio_us, acumulado_us)}."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=root, capture_output=True, text=True, check=True
+    )
+    profile = {}
+    for line in completed.stderr.splitlines():
+        # "import time:      self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        profile[name.strip()] = (int(own), int(cumulative))
+    return profile
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="app", help="módulo importado na partida")
+    parser.add_argument("--runs", type=int, default=5, help="processos medidos")
+    parser.add_argument("--max-ms", type=float, default=300, help="mediana máxima aceita do import")
+    args = parser.parse_args()
+
+    timings = []
+    for _ in range(args.runs):
+        profile = import_profile(args.module)
+        timings.append(profile[args.module][1] / 1000)
+    heavy = sorted({name.split(".")[0] for name in profile} & set(HEAVY_MODULES))
+    median = statistics.median(timings)
+    result = {
+        "module": args.module,
+        "runs": args.runs,
+        "import_ms_median": round(median, 1),
+        "import_ms_max": round(max(timings), 1),
+        "max_ms": args.max_ms,
+        "heavy_modules_loaded": heavy,
+        "top_modules_ms": {
+            name: round(own / 1000, 1)
+            for name, (own, _) in sorted(profile.items(), key=lambda item: item[1][0], reverse=True)[:TOP_MODULES]
+        },
+        "ok": median <= args.max_ms and not heavy,
+    }
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    return 0 if result["ok"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
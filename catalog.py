@@ -0,0 +1,64 @@
+"""Cache em memória do catálogo de marcas e modelos.
+
+Os dropdowns de marca/modelo e a validação de veículos leem daqui, sem ir ao
+banco. O cache é do processo (get_catalog) e é recarregado quando
+invalidate() é chamado após cadastrar uma marca/modelo ou quando
+refresh(conn) encontra outra versão de makes/models em table_versions (por
+exemplo, após um cadastro em outro terminal).
+"""
+from database import DB_PATH
+from migrations import table_versions
+
+CATALOG_TABLES = ("makes", "models")
+
+
+class Catalog:
+    """Marcas (ordenadas) e o mapa marca -> modelos (ordenados)."""
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self.version = None
+        self.makes = []
+        self.models = {}
+        self._pairs = frozenset()
+
+    def refresh(self, conn):
+        """Recarrega o catálogo se ele mudou no banco; retorna True se recarregou.
+
+        Com o cache válido custa uma leitura de table_versions.
+        """
+        version = table_versions(conn, *CATALOG_TABLES)
+        if version == self.version:
+            return False
+        makes = [name for (name,) in conn.execute("SELECT name FROM makes ORDER BY name ASC")]
+        models = {make: [] for make in makes}
+        for make, model in conn.execute("SELECT make_name, model_name FROM models ORDER BY make_name, model_name ASC"):
+            models.setdefault(make, []).append(model)
+        self.makes = makes
+        self.models = models
+        self._pairs = frozenset((make, model) for make, names in models.items() for model in names)
+        self.version = version
+        return True
+
+    def invalidate(self):
+        """Força a recarga no próximo refresh()."""
+        self.version = None
+
+    def models_of(self, make):
+        """Modelos cadastrados para a marca (lista vazia se não houver)."""
+        return self.models.get(make, [])
+
+    def __contains__(self, pair):
+        """(marca, modelo) in catalog: o par está cadastrado (ver validation.validate_vehicle)."""
+        return pair in self._pairs
+
+
+_catalog = None
+
+
+def get_catalog(path=DB_PATH):
+    """Retorna o Catalog do processo (criado no primeiro uso)."""
+    global _catalog
+    if _catalog is None or _catalog.path != path:
+        _catalog = Catalog(path)
+    return _catalog
@@ -0,0 +1,113 @@
+"""Gráficos da aba de Análise Gráfica: uma única figura, atualizada no lugar."""
+import numpy as np
+from matplotlib import style
+from matplotlib.figure import Figure
+
+style.use('ggplot')
+
+# Rótulos exibidos no eixo dos períodos (os demais ficam só no traço)
+PERIOD_LABELS = 12
+# Título do eixo dos períodos por granularidade (chaves de ANALYTICS_PERIODS)
+PERIOD_AXIS_TITLES = {'day': 'Dia', 'week': 'Semana (início)', 'month': 'Mês/Ano', 'quarter': 'Trimestre'}
+
+
+class AnalyticsChart:
+    """Os 4 gráficos da análise numa Figure fora do registro do pyplot.
+
+    Eixos, títulos e artistas são criados uma vez; update() troca só os dados
+    (set_data da linha, alturas das barras) e quem exibe a figura redesenha o
+    canvas. As barras só são recriadas quando a quantidade muda (ex.: marca
+    nova). close() libera a figura.
+    """
+
+    def __init__(self, figsize=(10, 6)):
+        self.figure = Figure(figsize=figsize)
+        self.figure.suptitle('Análise de Dados de Vendas e Estoque de Veículos', fontsize=14)
+        self.ax_period, self.ax_make, self.ax_seller, self.ax_price = self.figure.subplots(2, 2).flat
+
+        self._setup_axes(self.ax_period, '1. Vendas por Período', 'Mês/Ano', 'Nº de Vendas', 'y')
+        self._setup_axes(self.ax_make, '2. Estoque Disponível por Marca', 'Marca', 'Qtde. em Estoque', 'y')
+        self._setup_axes(self.ax_seller, '3. Top 5 Vendedores (Nº de Vendas)', 'Nº de Vendas', 'Vendedor', 'x')
+        self._setup_axes(self.ax_price, '4. Distribuição de Preços (Estoque Disponível)', 'Preço (R$)', 'Frequência', None)
+        self.ax_seller.invert_yaxis()  # Maior vendedor no topo
+        self.ax_price.ticklabel_format(style='plain', axis='x')
+
+        self.period_line, = self.ax_period.plot([], [], marker='o', color='skyblue')
+        self.make_bars = self.seller_bars = self.price_bars = None
+        self.empty_texts = {
+            ax: ax.text(0.5, 0.5, text, ha='center', va='center', fontsize=10, transform=ax.transAxes, visible=False)
+            for ax, text in (
+                (self.ax_period, 'Sem dados de Vendas'),
+                (self.ax_make, 'Sem veículos Disponíveis'),
+                (self.ax_seller, 'Sem dados de Vendedores'),
+                (self.ax_price, 'Sem dados de Preço para Estoque'),
+            )
+        }
+
+    @staticmethod
+    def _setup_axes(ax, title, xlabel, ylabel, grid_axis):
+        ax.set_title(title, fontsize=10)
+        ax.set_xlabel(xlabel, fontsize=8)
+        ax.set_ylabel(ylabel, fontsize=8)
+        if grid_axis:
+            ax.grid(axis=grid_axis, linestyle='--')
+
+    def update(self, data, granularity='month'):
+        """Troca os dados dos gráficos pelos de ReportService.analytics_data (AnalyticsData)."""
+        # 1. Vendas por período: só os dados da linha; rótulos espaçados quando há muitos períodos
+        periods = [label for label, _ in data.sales_by_period]
+        positions = np.arange(len(periods))
+        self.period_line.set_data(positions, [total for _, total in data.sales_by_period])
+        step = max(1, -(-len(periods) // PERIOD_LABELS))
+        self.ax_period.set_xticks(positions[::step], periods[::step], rotation=45, fontsize=7)
+        self.ax_period.set_xlabel(PERIOD_AXIS_TITLES[granularity], fontsize=8)
+        self._show(self.ax_period, len(periods))
+
+        # 2. Estoque por marca e 3. top vendedores: alturas/larguras das barras existentes
+        self.make_bars = self._bars(self.ax_make, self.make_bars, [total for _, total in data.stock_by_make], color='lightcoral')
+        self.ax_make.set_xticks(np.arange(len(data.stock_by_make)), [make for make, _ in data.stock_by_make], rotation=45, fontsize=7)
+        self.seller_bars = self._bars(
+            self.ax_seller, self.seller_bars, [total for _, total in data.sales_by_seller], horizontal=True, color='lightgreen'
+        )
+        self.ax_seller.set_yticks(np.arange(len(data.sales_by_seller)), [name for name, _ in data.sales_by_seller], fontsize=8)
+
+        # 4. Histograma de preços (faixas vindas do SQL): posição, largura e altura das barras
+        self.price_bars = self._bars(self.ax_price, self.price_bars, [count for _, _, count in data.price_bins], color='gold', edgecolor='black')
+        for patch, (low, high, _) in zip(self.price_bars, data.price_bins):
+            patch.set_x(low)
+            patch.set_width(high - low)
+        self.ax_price.tick_params(axis='x', rotation=45, labelsize=7)
+
+        # Os eixos acompanham os novos dados
+        for ax in (self.ax_period, self.ax_make, self.ax_seller, self.ax_price):
+            ax.relim()
+            ax.autoscale_view()
+        self.figure.tight_layout(rect=[0, 0.03, 1, 0.95])
+
+    def _bars(self, ax, bars, values, horizontal=False, **kwargs):
+        """Reaproveita as barras quando a quantidade não mudou; senão recria só esse conjunto."""
+        if bars is not None and len(bars) == len(values):
+            for patch, value in zip(bars, values):
+                if horizontal:
+                    patch.set_width(value)
+                else:
+                    patch.set_height(value)
+        else:
+            if bars is not None:
+                bars.remove()
+            positions = np.arange(len(values))
+            bars = ax.barh(positions, values, **kwargs) if horizontal else ax.bar(positions, values, **kwargs)
+        self._show(ax, len(values))
+        return bars
+
+    def _show(self, ax, count):
+        # Sem dados: esconde os eixos (escalas dos dados anteriores) e mostra o aviso no centro do gráfico
+        self.empty_texts[ax].set_visible(count == 0)
+        ax.xaxis.set_visible(count > 0)
+        ax.yaxis.set_visible(count > 0)
+
+    def close(self):
+        """Libera a figura e seus artistas (não há referência no pyplot)."""
+        self.figure.clear()
+        self.period_line = self.make_bars = self.seller_bars = self.price_bars = None
+        self.empty_texts = {}
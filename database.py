@@ -0,0 +1,83 @@
+"""Gerenciamento das conexões SQLite compartilhadas pela aplicação.
+
+Todas as janelas usam o mesmo ConnectionManager: uma conexão de escrita
+(cadastros e vendas) e uma conexão somente leitura (relatórios e gráficos).
+Com o journal em modo WAL os leitores trabalham sobre um snapshot e não
+bloqueiam a escrita, e vice-versa.
+
+Observação: o WAL exige memória compartilhada entre os processos, portanto
+todos os terminais precisam acessar o arquivo pela mesma máquina (disco
+local ou servidor de arquivos que suporte locks POSIX corretamente).
+"""
+import sqlite3
+
+DB_PATH = 'vehicle_management.db'
+
+# Tempo máximo de espera por um lock antes de falhar com "database is locked"
+BUSY_TIMEOUT_MS = 5000
+# Cache de páginas por conexão (valor negativo = KiB)
+CACHE_SIZE_KIB = 64 * 1024
+# Região do arquivo mapeada em memória para leituras
+MMAP_SIZE_BYTES = 256 * 1024 * 1024
+
+def connect(path=DB_PATH, read_only=False):
+    """Abre uma conexão com os PRAGMAs de desempenho/concorrência aplicados."""
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000)
+    if not read_only:
+        # journal_mode é persistente no arquivo; basta a conexão de escrita ativá-lo
+        conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    # NORMAL é seguro em WAL (pode perder só a última transação numa queda de energia)
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KIB}")
+    conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE_BYTES}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    if read_only:
+        conn.execute("PRAGMA query_only = ON")
+    return conn
+
+
+class ConnectionManager:
+    """Mantém as conexões de escrita e de leitura de um arquivo de banco."""
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self._writer = None
+        self._reader = None
+
+    @property
+    def writer(self):
+        """Conexão usada para cadastros, vendas e qualquer outra escrita."""
+        if self._writer is None:
+            self._writer = connect(self.path)
+        return self._writer
+
+    @property
+    def reader(self):
+        """Conexão somente leitura para relatórios e análises (não bloqueia a escrita)."""
+        if self._reader is None:
+            # Garante que o arquivo já está em WAL antes de abrir o leitor
+            self.writer
+            self._reader = connect(self.path, read_only=True)
+        return self._reader
+
+    def close(self):
+        """Fecha as conexões abertas."""
+        for conn in (self._reader, self._writer):
+            if conn is not None:
+                conn.close()
+        self._writer = None
+        self._reader = None
+
+
+_manager = None
+
+
+def get_connection_manager(path=DB_PATH):
+    """Retorna o ConnectionManager do processo (criado no primeiro uso)."""
+    global _manager
+    if _manager is None or _manager.path != path:
+        if _manager is not None:
+            _manager.close()
+        _manager = ConnectionManager(path)
+    return _manager
@@ -0,0 +1,160 @@
+"""Exportação de relatórios em fluxo (XLSX, CSV e Parquet).
+
+As linhas são lidas do cursor em blocos (fetchmany) e gravadas à medida que
+chegam: a memória usada fica limitada a um bloco, seja qual for o tamanho do
+relatório. O formato é escolhido pela extensão do arquivo. O arquivo é gravado
+num temporário ao lado do destino e só substitui o destino no final, então
+uma exportação interrompida não deixa arquivo pela metade.
+"""
+import csv
+import os
+from importlib import import_module
+from importlib.util import find_spec
+from itertools import chain, islice
+
+# openpyxl e pyarrow são importados só na primeira exportação do formato (a abertura do app não paga por eles)
+
+# Linhas lidas do cursor (e gravadas) por vez
+EXPORT_CHUNK_SIZE = 1000
+
+# Blocos lidos antes de fixar o esquema Parquet quando há colunas só com NULL
+PARQUET_SCHEMA_LOOKAHEAD = 10
+
+# Extensão -> (descrição, biblioteca necessária)
+EXPORT_FORMATS = {
+    ".xlsx": ("Excel", "openpyxl"),
+    ".csv": ("CSV", None),
+    ".parquet": ("Parquet", "pyarrow"),
+}
+# Módulos importados na escrita de cada formato que depende de biblioteca externa
+_FORMAT_MODULES = {".xlsx": ("openpyxl",), ".parquet": ("pyarrow", "pyarrow.parquet")}
+
+
+def missing_dependency(file_path):
+    """Nome da biblioteca ausente para exportar no formato do arquivo (None se estiver tudo instalado)."""
+    # find_spec localiza a biblioteca sem importá-la
+    library = EXPORT_FORMATS.get(os.path.splitext(file_path)[1].lower(), (None, None))[1]
+    return library if library is not None and find_spec(library) is None else None
+
+
+def preload_export_dependencies():
+    """Importa antecipadamente as bibliotecas instaladas dos formatos (ex.: numa thread após o login)."""
+    for extension, modules in _FORMAT_MODULES.items():
+        # Os mesmos módulos que _write_xlsx/_write_parquet importam; formatos sem biblioteca instalada ficam de fora
+        if find_spec(EXPORT_FORMATS[extension][1]) is not None:
+            for module in modules:
+                import_module(module)
+
+
+def iter_chunks(rows, size=EXPORT_CHUNK_SIZE):
+    """Percorre as linhas em listas de até size itens (fetchmany quando rows é um cursor)."""
+    if hasattr(rows, "fetchmany"):
+        while True:
+            chunk = rows.fetchmany(size)
+            if not chunk:
+                return
+            yield chunk
+    else:
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, size))
+            if not chunk:
+                return
+            yield chunk
+
+
+def _write_xlsx(path, columns, chunks, sheet_name, progress):
+    from openpyxl import Workbook
+
+    # write_only: as linhas vão direto para o arquivo, sem manter as células em memória
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=sheet_name[:31])
+    sheet.append(columns)
+    written = 0
+    for chunk in chunks:
+        for row in chunk:
+            sheet.append(row)
+        written += len(chunk)
+        progress(written)
+    workbook.save(path)
+    return written
+
+
+def _write_csv(path, columns, chunks, sheet_name, progress):
+    # utf-8-sig para o Excel reconhecer a acentuação ao abrir o CSV
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        written = 0
+        for chunk in chunks:
+            writer.writerows(chunk)
+            written += len(chunk)
+            progress(written)
+    return written
+
+
+def _write_parquet(path, columns, chunks, sheet_name, progress):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    def to_table(chunk):
+        return pa.Table.from_arrays([pa.array(values) for values in zip(*chunk)], names=columns)
+
+    # Um row group por bloco. O esquema vem dos primeiros blocos: coluna só com NULL tem tipo
+    # null, então lê mais blocos (até PARQUET_SCHEMA_LOOKAHEAD) e unifica os tipos; a que
+    # continuar sem tipo vira texto, que aceita os valores dos blocos seguintes no cast
+    chunks = iter(chunks)
+    pending = []
+    schema = None
+    for chunk in chunks:
+        pending.append(to_table(chunk))
+        schema = pa.unify_schemas([schema, pending[-1].schema] if schema else [pending[-1].schema], promote_options="permissive")
+        if not any(pa.types.is_null(field.type) for field in schema) or len(pending) >= PARQUET_SCHEMA_LOOKAHEAD:
+            break
+    if schema is None:
+        # Relatório vazio: arquivo só com as colunas
+        schema = pa.schema([(name, pa.null()) for name in columns])
+    else:
+        schema = pa.schema([field.with_type(pa.string()) if pa.types.is_null(field.type) else field for field in schema])
+
+    writer = pq.ParquetWriter(path, schema)
+    written = 0
+    try:
+        for table in chain(pending, map(to_table, chunks)):
+            writer.write_table(table.cast(schema))
+            written += table.num_rows
+            progress(written)
+    finally:
+        writer.close()
+    return written
+
+
+_WRITERS = {
+    ".xlsx": _write_xlsx,
+    ".csv": _write_csv,
+    ".parquet": _write_parquet,
+}
+
+
+def export_rows(rows, columns, file_path, sheet_name="Relatório", progress=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """Grava as linhas (cursor ou iterável) em file_path, em blocos, e retorna quantas foram gravadas.
+
+    progress(linhas_gravadas) é chamado após cada bloco. Relatórios sem linhas não
+    geram arquivo (retorna 0).
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension not in _WRITERS:
+        raise ValueError(f"Formato de exportação não suportado: {extension or file_path}")
+    library = missing_dependency(file_path)
+    if library is not None:
+        raise ImportError(f"Exportar em {EXPORT_FORMATS[extension][0]} requer a biblioteca {library}.")
+
+    temp_path = f"{file_path}.tmp"
+    try:
+        written = _WRITERS[extension](temp_path, list(columns), iter_chunks(rows, chunk_size), sheet_name, progress or (lambda written: None))
+        if written:
+            os.replace(temp_path, file_path)
+        return written
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
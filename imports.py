@@ -0,0 +1,218 @@
+"""Importação em lote de veículos, clientes e vendedores (CSV ou XLSX).
+
+O arquivo é lido em fluxo: cada bloco de linhas é validado com as mesmas
+regras dos formulários (validation.py) e gravado com executemany numa
+transação curta, que libera o lock de escrita entre os blocos. Linhas
+rejeitadas vão para um CSV ao lado do arquivo, com o número da linha e o
+motivo; as válidas são importadas mesmo assim.
+
+Os triggers de INSERT de versão (change_log) e de busca (search_index) custam
+mais que o próprio INSERT quando disparados linha a linha. Dentro da transação
+de cada bloco uma linha em bulk_import os suspende (cláusula WHEN), o bloco é
+gravado e os dois efeitos são aplicados de uma vez sobre as linhas novas; a
+linha é apagada antes do COMMIT, então as gravações das outras conexões
+continuam disparando os triggers. O esquema não muda durante a importação.
+As telas só precisam ser atualizadas uma vez no final.
+
+O cabeçalho identifica as colunas, em qualquer ordem, pelo nome em português
+ou em inglês (ex.: "Marca" ou "make"); acentos e maiúsculas são ignorados.
+"""
+import csv
+import os
+import re
+import unicodedata
+from datetime import datetime
+from importlib.util import find_spec
+
+from exports import iter_chunks
+from search import index_rows_after
+from validation import ValidationError, load_known_models, validate_person, validate_vehicle
+
+# Linhas validadas e gravadas por transação
+IMPORT_CHUNK_SIZE = 5000
+
+# Extensão -> (descrição, biblioteca necessária)
+IMPORT_FORMATS = {
+    ".csv": ("CSV", None),
+    ".xlsx": ("Excel", "openpyxl"),
+}
+
+_PERSON_COLUMNS = [
+    ("Nome", ("nome", "name"), True),
+    ("Telefone", ("telefone", "phone"), False),
+    ("Email", ("email", "e mail"), True),
+]
+
+# Entidade -> (colunas (nome, cabeçalhos aceitos, obrigatória), INSERT)
+# A ordem das colunas é a dos argumentos da validação correspondente.
+IMPORT_ENTITIES = {
+    "vehicles": (
+        [
+            ("Marca", ("marca", "make"), True),
+            ("Modelo", ("modelo", "model"), True),
+            ("Ano Fabricação", ("ano fabricacao", "ano de fabricacao", "manufacture year"), True),
+            ("Ano Modelo", ("ano modelo", "model year"), True),
+            ("Cor", ("cor", "color"), False),
+            ("Preço", ("preco", "preco de venda", "price", "sale price"), True),
+            ("Estoque", ("estoque", "stock"), True),
+        ],
+        "INSERT INTO vehicles (make, model, manufacture_year, model_year, color, sale_price_cents, stock) VALUES (?, ?, ?, ?, ?, ?, ?)",
+    ),
+    "customers": (_PERSON_COLUMNS, "INSERT INTO customers (name, phone, email) VALUES (?, ?, ?)"),
+    "sellers": (_PERSON_COLUMNS, "INSERT INTO sellers (name, phone, email) VALUES (?, ?, ?)"),
+}
+
+
+def missing_dependency(file_path):
+    """Nome da biblioteca ausente para ler o formato do arquivo (None se estiver tudo instalado)."""
+    # find_spec localiza a biblioteca sem importá-la (openpyxl só é importado ao ler um .xlsx)
+    library = IMPORT_FORMATS.get(os.path.splitext(file_path)[1].lower(), (None, None))[1]
+    return library if library is not None and find_spec(library) is None else None
+
+
+def default_rejects_path(file_path):
+    """Arquivo das linhas rejeitadas: 'estoque.xlsx' -> 'estoque.rejeitados.csv'."""
+    return f"{os.path.splitext(file_path)[0]}.rejeitados.csv"
+
+
+def read_rows(file_path):
+    """Percorre as linhas do arquivo (a primeira é o cabeçalho) sem carregá-lo inteiro."""
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension not in IMPORT_FORMATS:
+        raise ValueError(f"Formato de importação não suportado: {extension or file_path}")
+    library = missing_dependency(file_path)
+    if library is not None:
+        raise ImportError(f"Importar {IMPORT_FORMATS[extension][0]} requer a biblioteca {library}.")
+
+    if extension == ".csv":
+        # utf-8-sig aceita o BOM gravado pelo Excel; o separador (vírgula, ponto e vírgula ou tab) é detectado
+        with open(file_path, newline="", encoding="utf-8-sig") as f:
+            sample = f.read(64 * 1024)
+            f.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+            except csv.Error:
+                dialect = csv.excel
+            yield from csv.reader(f, dialect)
+    else:
+        from openpyxl import load_workbook
+
+        # read_only: as linhas são lidas do arquivo sob demanda
+        workbook = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            yield from workbook.active.iter_rows(values_only=True)
+        finally:
+            workbook.close()
+
+
+def _normalize(header):
+    text = unicodedata.normalize("NFKD", str(header or "").lower())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(re.findall(r"[a-z0-9]+", text))
+
+
+def _column_positions(header, columns):
+    """Posição de cada coluna no cabeçalho (None para opcionais ausentes)."""
+    found = {_normalize(name): position for position, name in enumerate(header)}
+    positions = []
+    missing = []
+    for name, aliases, required in columns:
+        position = next((found[alias] for alias in aliases if alias in found), None)
+        if position is None and required:
+            missing.append(name)
+        positions.append(position)
+    if missing:
+        raise ValueError(f"Colunas obrigatórias ausentes no arquivo: {', '.join(missing)}.")
+    return positions
+
+
+def _validator(conn, entity):
+    """Função que valida os valores de uma linha e retorna a tupla do INSERT."""
+    if entity == "vehicles":
+        known_models = load_known_models(conn)
+        current_year = datetime.now().year
+        return lambda values: validate_vehicle(*values, known_models, current_year)
+
+    # Email é UNIQUE: verificado antes do INSERT para rejeitar só a linha, não o bloco
+    emails = {email for (email,) in conn.execute(f"SELECT email FROM {entity} WHERE email IS NOT NULL")}
+
+    def validate(values):
+        row = validate_person(*values)
+        if row[2] in emails:
+            raise ValidationError(f"Email já cadastrado: {row[2]}")
+        emails.add(row[2])
+        return row
+    return validate
+
+
+def _insert_chunk(conn, table, insert_sql, rows):
+    """Grava as linhas numa transação, com os triggers de versão e de busca aplicados em conjunto."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Suspende os triggers de INSERT da tabela (WHEN da migração 16) só dentro desta transação:
+        # a linha de bulk_import é apagada antes do COMMIT e outras conexões nunca a veem
+        conn.execute("INSERT INTO bulk_import (table_name) VALUES (?)", (table,))
+        # Com o lock de escrita, as linhas novas recebem ids acima do maior atual
+        last_id = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+        conn.executemany(insert_sql, rows)
+        conn.execute("UPDATE table_versions SET version = version + 1 WHERE table_name = ?", (table,))
+        conn.execute(
+            "INSERT OR REPLACE INTO change_log (table_name, row_id, version) "
+            f"SELECT ?, id, (SELECT version FROM table_versions WHERE table_name = ?) FROM {table} WHERE id > ?",
+            (table, table, last_id)
+        )
+        index_rows_after(conn, table, last_id, len(rows))
+        conn.execute("DELETE FROM bulk_import WHERE table_name = ?", (table,))
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+def import_file(conn, entity, file_path, rejects_path=None, progress=None, chunk_size=IMPORT_CHUNK_SIZE):
+    """Importa o arquivo para a tabela da entidade e retorna (importadas, rejeitadas).
+
+    Cada bloco de chunk_size linhas é gravado na sua própria transação; se a
+    importação falhar no meio, os blocos anteriores continuam gravados.
+    progress(importadas, rejeitadas) é chamado após cada bloco. As rejeitadas
+    vão para rejects_path (padrão: default_rejects_path), criado só se houver
+    alguma.
+    """
+    columns, insert_sql = IMPORT_ENTITIES[entity]
+    rows = read_rows(file_path)
+    header = next(rows, None)
+    if header is None:
+        raise ValueError("O arquivo está vazio.")
+    positions = _column_positions(header, columns)
+    validate = _validator(conn, entity)
+    rejects_path = rejects_path or default_rejects_path(file_path)
+
+    imported = rejected = 0
+    rejects_file = rejects = None
+    try:
+        # Número da linha no arquivo (o cabeçalho é a linha 1) para localizar as rejeitadas
+        for chunk in iter_chunks(enumerate(rows, start=2), chunk_size):
+            valid = []
+            for line, row in chunk:
+                values = [row[position] if position is not None and position < len(row) else None for position in positions]
+                if all(value is None or str(value).strip() == "" for value in values):
+                    continue  # linha em branco
+                try:
+                    valid.append(validate(values))
+                except ValidationError as e:
+                    if rejects is None:
+                        rejects_file = open(rejects_path, "w", newline="", encoding="utf-8-sig")
+                        rejects = csv.writer(rejects_file)
+                        rejects.writerow(["Linha", *header, "Erro"])
+                    rejects.writerow([line, *row, str(e)])
+                    rejected += 1
+
+            if valid:
+                _insert_chunk(conn, entity, insert_sql, valid)
+            imported += len(valid)
+            if progress is not None:
+                progress(imported, rejected)
+    finally:
+        if rejects_file is not None:
+            rejects_file.close()
+    return imported, rejected
@@ -0,0 +1,94 @@
+"""Comandos de manutenção do banco (executar a partir da raiz do projeto).
+
+Uso:
+    python manage.py migrate
+    python manage.py rebuild-rollups [--from AAAA-MM-DD] [--to AAAA-MM-DD]
+    python manage.py rebuild-search
+    python manage.py import {vehicles,customers,sellers} ARQUIVO.csv|ARQUIVO.xlsx [--rejects ARQUIVO.csv]
+"""
+import argparse
+import sys
+
+from database import DB_PATH, connect
+from imports import IMPORT_ENTITIES, default_rejects_path, import_file
+from migrations import migrate
+from rollups import parse_day_key, rebuild_sales_daily
+from search import rebuild_search_index
+
+
+def cmd_migrate(conn, args):
+    """Aplica as migrações pendentes."""
+    applied = migrate(conn)
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    print(f"{applied} migração(ões) aplicada(s); esquema na versão {version}.")
+
+
+def cmd_rebuild_rollups(conn, args):
+    """Recalcula o resumo diário de vendas (sales_daily)."""
+    migrate(conn)
+    first_day = parse_day_key(args.first_day) if args.first_day else None
+    last_day = parse_day_key(args.last_day) if args.last_day else None
+    months = rebuild_sales_daily(
+        conn, first_day, last_day,
+        progress=lambda start, end: print(f"  {start // 10000:04d}-{start // 100 % 100:02d} recalculado")
+    )
+    print(f"Resumo diário recalculado ({months} mês(es)).")
+
+
+def cmd_rebuild_search(conn, args):
+    """Recarrega o índice de busca textual (search_index) a partir dos cadastros."""
+    migrate(conn)
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        rebuild_search_index(conn)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    print("Índice de busca recarregado.")
+
+
+def cmd_import(conn, args):
+    """Importa veículos, clientes ou vendedores de um arquivo CSV/XLSX."""
+    migrate(conn)
+    rejects_path = args.rejects or default_rejects_path(args.file)
+    imported, rejected = import_file(
+        conn, args.entity, args.file, rejects_path,
+        progress=lambda imported, rejected: print(f"  {imported} importada(s), {rejected} rejeitada(s)")
+    )
+    print(f"{imported} linha(s) importada(s).")
+    if rejected:
+        print(f"{rejected} linha(s) rejeitada(s); veja {rejects_path}.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manutenção do banco da loja de veículos.")
+    parser.add_argument("--db", default=DB_PATH, help="arquivo do banco (padrão: %(default)s)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("migrate", help="aplica as migrações pendentes").set_defaults(func=cmd_migrate)
+
+    rebuild = commands.add_parser("rebuild-rollups", help="recalcula o resumo diário de vendas")
+    rebuild.add_argument("--from", dest="first_day", help="primeiro dia (AAAA-MM-DD)")
+    rebuild.add_argument("--to", dest="last_day", help="último dia (AAAA-MM-DD)")
+    rebuild.set_defaults(func=cmd_rebuild_rollups)
+
+    commands.add_parser("rebuild-search", help="recarrega o índice de busca textual").set_defaults(func=cmd_rebuild_search)
+
+    bulk_import = commands.add_parser("import", help="importa cadastros de um arquivo CSV/XLSX")
+    bulk_import.add_argument("entity", choices=list(IMPORT_ENTITIES), help="tabela de destino")
+    bulk_import.add_argument("file", help="arquivo .csv ou .xlsx com cabeçalho")
+    bulk_import.add_argument("--rejects", help="arquivo das linhas rejeitadas (padrão: ARQUIVO.rejeitados.csv)")
+    bulk_import.set_defaults(func=cmd_import)
+
+    args = parser.parse_args(argv)
+    conn = connect(args.db)
+    try:
+        args.func(conn, args)
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,597 @@
+"""Migrações versionadas do esquema do banco (PRAGMA user_version).
+
+Cada migração tem um número; migrate() aplica, em ordem e uma única vez, as
+migrações com número maior que o user_version gravado no arquivo. Com o banco
+já atualizado, migrate() faz apenas a leitura do user_version, sem DDL nem
+introspecção.
+
+Migration roda numa única transação (BEGIN IMMEDIATE). BatchedMigration é
+para atualizações de dados grandes: processa um lote por transação curta,
+liberando o lock de escrita entre os lotes, e só grava o user_version no
+último lote. A instrução do lote deve ser idempotente (selecionar apenas
+linhas pendentes), assim uma migração interrompida continua de onde parou.
+"""
+
+import sqlite3
+
+# DROP COLUMN (migrações 7 e 10) exige SQLite 3.35 ou superior
+MIN_SQLITE_VERSION = (3, 35, 0)
+
+# Linhas processadas por transação nas migrações em lotes
+BACKFILL_BATCH_SIZE = 5000
+
+# Tabelas cujas alterações são registradas por triggers em table_versions/change_log
+TRACKED_TABLES = ("makes", "models", "sellers", "vehicles", "customers", "sales", "users")
+
+# Versões de cada tabela mantidas no change_log (prune_change_log); uma tela mais
+# atrasada que isso recarrega a lista inteira (services.fetch_changes)
+CHANGE_LOG_RETAINED_VERSIONS = 10000
+
+# Conjunto de índices da aplicação (migração 3)
+INDEXES = {
+    # Filtro por período do relatório de vendas e histórico ordenado por data
+    # (substituído por idx_sales_sale_ts na migração 10)
+    "idx_sales_sale_date": "CREATE INDEX IF NOT EXISTS idx_sales_sale_date ON sales (sale_date)",
+    # Removido na migração 7 (vendas passam a referenciar o vendedor por seller_id)
+    "idx_sales_seller_name": "CREATE INDEX IF NOT EXISTS idx_sales_seller_name ON sales (seller_name)",
+    # Ordem da lista de estoque (is_active DESC, make, model) e paginação por chave
+    "idx_vehicles_active_make_model": "CREATE INDEX IF NOT EXISTS idx_vehicles_active_make_model ON vehicles (is_active DESC, make, model)",
+    # Veículos disponíveis para venda (índice parcial)
+    "idx_vehicles_available": "CREATE INDEX IF NOT EXISTS idx_vehicles_available ON vehicles (make, model) WHERE stock > 0 AND is_active = 1",
+    # Relatório de estoque baixo
+    "idx_vehicles_stock": "CREATE INDEX IF NOT EXISTS idx_vehicles_stock ON vehicles (stock)",
+    # Dropdowns de vendas (somente ativos) e listas completas ordenadas por nome
+    "idx_customers_active_name": "CREATE INDEX IF NOT EXISTS idx_customers_active_name ON customers (is_active, name)",
+    "idx_customers_name": "CREATE INDEX IF NOT EXISTS idx_customers_name ON customers (name)",
+    "idx_sellers_active_name": "CREATE INDEX IF NOT EXISTS idx_sellers_active_name ON sellers (is_active, name)",
+    "idx_sellers_name": "CREATE INDEX IF NOT EXISTS idx_sellers_name ON sellers (name)",
+    "idx_users_role_username": "CREATE INDEX IF NOT EXISTS idx_users_role_username ON users (role DESC, username)",
+}
+
+
+class Migration:
+    """Migração aplicada numa única transação."""
+
+    def __init__(self, version, description, apply):
+        self.version = version
+        self.description = description
+        self.apply = apply
+
+    def run(self, conn):
+        """Executa apply(conn) e grava o user_version na mesma transação."""
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.apply(conn)
+            conn.execute(f"PRAGMA user_version = {self.version}")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+
+class BatchedMigration(Migration):
+    """Atualização de dados em lotes, uma transação curta por lote.
+
+    apply recebe (conn, batch_size) e retorna quantas linhas processou; a
+    migração termina quando um lote processa menos que batch_size linhas.
+    Também aceita uma instrução SQL com um único parâmetro (o tamanho do lote).
+    """
+
+    def __init__(self, version, description, apply, batch_size=BACKFILL_BATCH_SIZE):
+        if isinstance(apply, str):
+            statement = apply
+            apply = lambda conn, size: conn.execute(statement, (size,)).rowcount
+        super().__init__(version, description, apply)
+        self.batch_size = batch_size
+
+    def run(self, conn):
+        while True:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                processed = self.apply(conn, self.batch_size)
+                finished = processed < self.batch_size
+                if finished:
+                    conn.execute(f"PRAGMA user_version = {self.version}")
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            if finished:
+                return
+
+
+def create_base_schema(conn):
+    """Tabelas originais da aplicação (bancos antigos já podem tê-las)."""
+    # 0. Tabela de Usuários
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY,
+            username TEXT UNIQUE NOT NULL,
+            hashed_password TEXT NOT NULL,
+            role TEXT NOT NULL,
+            name TEXT
+        )
+    """)
+    # 1. Tabela de Parâmetros (Marcas)
+    conn.execute("CREATE TABLE IF NOT EXISTS makes (name TEXT PRIMARY KEY)")
+    # 2. Tabela de Parâmetros (Modelos)
+    conn.execute("CREATE TABLE IF NOT EXISTS models (id INTEGER PRIMARY KEY, make_name TEXT, model_name TEXT, UNIQUE(make_name, model_name))")
+    # 3. Tabela de Vendedores
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sellers (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            phone TEXT,
+            email TEXT UNIQUE,
+            is_active INTEGER DEFAULT 1
+        )
+    """)
+    # 4. Tabela de Veículos em Estoque
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS vehicles (
+            id INTEGER PRIMARY KEY,
+            make TEXT NOT NULL,
+            model TEXT NOT NULL,
+            manufacture_year INTEGER,
+            model_year INTEGER,
+            color TEXT,
+            sale_price REAL NOT NULL,
+            stock INTEGER NOT NULL,
+            is_active INTEGER DEFAULT 1,
+            sale_date_only TEXT
+        )
+    """)
+    # 5. Tabela de Clientes
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS customers (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            phone TEXT,
+            email TEXT UNIQUE,
+            is_active INTEGER DEFAULT 1
+        )
+    """)
+    # 6. Tabela de Histórico de Vendas
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sales (
+            id INTEGER PRIMARY KEY,
+            vehicle_id INTEGER,
+            vehicle_info TEXT,
+            customer_name TEXT,
+            seller_name TEXT,
+            final_price REAL NOT NULL,
+            sale_date TEXT NOT NULL
+        )
+    """)
+
+    # Bancos anteriores à coluna 'sale_date_only' (única checagem de colunas, feita uma vez)
+    columns = [col[1] for col in conn.execute("PRAGMA table_info(vehicles)")]
+    if 'sale_date_only' not in columns:
+        conn.execute("ALTER TABLE vehicles ADD COLUMN sale_date_only TEXT")
+
+
+def create_change_tracking(conn):
+    """Versão por tabela e última versão de cada linha alterada, mantidas por triggers."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS table_versions (
+            table_name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS change_log (
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            version INTEGER NOT NULL,
+            PRIMARY KEY (table_name, row_id)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_change_log_version ON change_log (table_name, version)")
+    for table in TRACKED_TABLES:
+        conn.execute("INSERT OR IGNORE INTO table_versions (table_name, version) VALUES (?, 0)", (table,))
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            conn.execute(version_trigger_sql(table, event))
+
+
+def version_trigger_sql(table, event):
+    """Trigger que incrementa a versão da tabela e registra a linha alterada no change_log."""
+    row_ref = "OLD" if event == "DELETE" else "NEW"
+    return f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_{event.lower()}_version AFTER {event} ON {table}
+        BEGIN
+            UPDATE table_versions SET version = version + 1 WHERE table_name = '{table}';
+            INSERT OR REPLACE INTO change_log (table_name, row_id, version)
+                SELECT '{table}', {row_ref}.rowid, version FROM table_versions WHERE table_name = '{table}';
+        END
+    """
+
+
+def table_versions(conn, *tables):
+    """Retorna as versões atuais das tabelas informadas (uma única consulta)."""
+    placeholders = ", ".join("?" for _ in tables)
+    versions = dict(conn.execute(f"SELECT table_name, version FROM table_versions WHERE table_name IN ({placeholders})", tables).fetchall())
+    return tuple(versions.get(table, 0) for table in tables)
+
+
+def prune_change_log(conn, retained=CHANGE_LOG_RETAINED_VERSIONS):
+    """Apaga do change_log as entradas mais antigas que as últimas retained versões de cada tabela.
+
+    O horizonte fica em table_versions.pruned_version (migração 19): telas com versão
+    anterior a ele recarregam a lista inteira. Retorna quantas entradas foram apagadas.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        deleted = 0
+        for table, horizon in conn.execute(
+            "SELECT table_name, version - ? FROM table_versions WHERE version - ? > pruned_version", (retained, retained)
+        ).fetchall():
+            deleted += conn.execute(
+                "DELETE FROM change_log WHERE table_name = ? AND version <= ?", (table, horizon)
+            ).rowcount
+            conn.execute("UPDATE table_versions SET pruned_version = ? WHERE table_name = ?", (horizon, table))
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return deleted
+
+
+def create_indexes(conn):
+    """Índices das consultas da aplicação (ver benchmarks/query_plans.py)."""
+    for sql in INDEXES.values():
+        conn.execute(sql)
+    refresh_statistics(conn)
+
+
+def refresh_statistics(conn):
+    """Atualiza as estatísticas do planejador com amostragem limitada (barato em tabelas grandes)."""
+    conn.execute("PRAGMA analysis_limit = 1000")
+    conn.execute("ANALYZE")
+
+
+def add_sales_foreign_keys(conn):
+    """Colunas customer_id/seller_id em sales e cadastro dos nomes que não existem mais."""
+    conn.execute("ALTER TABLE sales ADD COLUMN customer_id INTEGER REFERENCES customers(id)")
+    conn.execute("ALTER TABLE sales ADD COLUMN seller_id INTEGER REFERENCES sellers(id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sales_customer_id ON sales (customer_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sales_seller_id ON sales (seller_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sales_vehicle_id ON sales (vehicle_id)")
+
+    # Nomes do histórico sem cadastro correspondente viram cadastros inativos, preservando o histórico
+    conn.execute("""
+        INSERT INTO customers (name, is_active)
+        SELECT DISTINCT customer_name, 0 FROM sales
+        WHERE customer_name IS NOT NULL AND customer_name NOT IN (SELECT name FROM customers)
+    """)
+    conn.execute("""
+        INSERT INTO sellers (name, is_active)
+        SELECT DISTINCT seller_name, 0 FROM sales
+        WHERE seller_name IS NOT NULL AND seller_name NOT IN (SELECT name FROM sellers)
+    """)
+
+    # O preenchimento das chaves não deve gerar uma entrada de change_log por venda
+    conn.execute("DROP TRIGGER IF EXISTS trg_sales_update_version")
+
+
+def drop_sales_text_columns(conn):
+    """Remove as colunas de texto de sales, agora resolvidas por junção."""
+    conn.execute("DROP INDEX IF EXISTS idx_sales_seller_name")
+    for column in ("vehicle_info", "customer_name", "seller_name"):
+        conn.execute(f"ALTER TABLE sales DROP COLUMN {column}")
+    conn.execute(version_trigger_sql("sales", "UPDATE"))
+    # Força a reconstrução do histórico de vendas já exibido nos terminais
+    conn.execute("UPDATE table_versions SET version = version + 1 WHERE table_name = 'sales'")
+    refresh_statistics(conn)
+
+
+def add_integer_money_and_time(conn):
+    """Colunas inteiras: preços em centavos, data da venda em epoch (segundos) e chave do dia (AAAAMMDD)."""
+    conn.execute("ALTER TABLE vehicles ADD COLUMN sale_price_cents INTEGER")
+    conn.execute("ALTER TABLE sales ADD COLUMN final_price_cents INTEGER")
+    conn.execute("ALTER TABLE sales ADD COLUMN sale_ts INTEGER")
+    conn.execute("ALTER TABLE sales ADD COLUMN sale_day INTEGER")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sales_sale_ts ON sales (sale_ts)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sales_sale_day ON sales (sale_day)")
+    # O estoque é pequeno perto das vendas: convertido aqui mesmo, numa única transação
+    conn.execute("UPDATE vehicles SET sale_price_cents = CAST(ROUND(sale_price * 100) AS INTEGER)")
+    conn.execute("DROP TRIGGER IF EXISTS trg_sales_update_version")
+
+
+def drop_real_and_text_columns(conn):
+    """Remove as colunas REAL/TEXT substituídas pelas colunas inteiras."""
+    conn.execute("DROP INDEX IF EXISTS idx_sales_sale_date")
+    conn.execute("ALTER TABLE sales DROP COLUMN final_price")
+    conn.execute("ALTER TABLE sales DROP COLUMN sale_date")
+    conn.execute("ALTER TABLE vehicles DROP COLUMN sale_price")
+    conn.execute(version_trigger_sql("sales", "UPDATE"))
+    conn.execute("UPDATE table_versions SET version = version + 1 WHERE table_name IN ('sales', 'vehicles')")
+    refresh_statistics(conn)
+
+
+# --- RESUMO DIÁRIO DE VENDAS (MIGRAÇÕES 11 E 17) ---
+# SQL congelado, como o da busca: rollups.py só recalcula o resumo sobre o esquema atual.
+
+SALES_DAILY_TABLE_V11 = """
+    CREATE TABLE sales_daily (
+        day INTEGER NOT NULL,
+        seller_id INTEGER NOT NULL,
+        make TEXT NOT NULL,
+        sale_count INTEGER NOT NULL,
+        revenue_cents INTEGER NOT NULL,
+        PRIMARY KEY (day, seller_id, make)
+    ) WITHOUT ROWID
+"""
+
+
+def sales_daily_triggers(units, columns):
+    """Triggers que mantêm sales_daily; units é a expressão das unidades da venda com {row} (NEW/OLD).
+
+    Vendas sem vendedor/veículo entram como seller_id 0 e marca ''. columns são as
+    colunas de sales cujo UPDATE refaz a contribuição da venda.
+    """
+    add = f"""
+        INSERT INTO sales_daily (day, seller_id, make, sale_count, revenue_cents)
+        VALUES (
+            NEW.sale_day, COALESCE(NEW.seller_id, 0),
+            COALESCE((SELECT make FROM vehicles WHERE id = NEW.vehicle_id), ''),
+            {units.format(row='NEW')}, {units.format(row='NEW')} * NEW.final_price_cents
+        )
+        ON CONFLICT (day, seller_id, make) DO UPDATE SET
+            sale_count = sale_count + excluded.sale_count,
+            revenue_cents = revenue_cents + excluded.revenue_cents;
+    """
+    remove = f"""
+        UPDATE sales_daily SET sale_count = sale_count - {units.format(row='OLD')},
+            revenue_cents = revenue_cents - {units.format(row='OLD')} * OLD.final_price_cents
+        WHERE day = OLD.sale_day AND seller_id = COALESCE(OLD.seller_id, 0)
+          AND make = COALESCE((SELECT make FROM vehicles WHERE id = OLD.vehicle_id), '');
+        DELETE FROM sales_daily
+        WHERE day = OLD.sale_day AND seller_id = COALESCE(OLD.seller_id, 0) AND sale_count <= 0;
+    """
+    return (
+        f"CREATE TRIGGER trg_sales_insert_daily AFTER INSERT ON sales BEGIN {add} END",
+        f"CREATE TRIGGER trg_sales_delete_daily AFTER DELETE ON sales BEGIN {remove} END",
+        f"CREATE TRIGGER trg_sales_update_daily AFTER UPDATE OF {', '.join(columns)} ON sales BEGIN {remove} {add} END",
+    )
+
+
+def add_sales_daily(conn):
+    """Resumo diário de vendas (rollups.py), populado a partir do histórico existente."""
+    conn.execute(SALES_DAILY_TABLE_V11)
+    for trigger in sales_daily_triggers("1", ("sale_day", "seller_id", "vehicle_id", "final_price_cents")):
+        conn.execute(trigger)
+    conn.execute("""
+        INSERT INTO sales_daily (day, seller_id, make, sale_count, revenue_cents)
+        SELECT s.sale_day, COALESCE(s.seller_id, 0), COALESCE(v.make, ''), COUNT(*), SUM(s.final_price_cents)
+        FROM sales s
+        LEFT JOIN vehicles v ON v.id = s.vehicle_id
+        GROUP BY 1, 2, 3
+    """)
+
+
+def add_sales_quantity(conn):
+    """Unidades por linha de venda (carrinho: uma linha por item); o resumo diário passa a somá-las.
+
+    As vendas existentes têm uma unidade cada, então sales_daily continua correto sem recálculo.
+    """
+    conn.execute("ALTER TABLE sales ADD COLUMN quantity INTEGER NOT NULL DEFAULT 1 CHECK (quantity > 0)")
+    for event in ("insert", "delete", "update"):
+        conn.execute(f"DROP TRIGGER trg_sales_{event}_daily")
+    for trigger in sales_daily_triggers("{row}.quantity", ("sale_day", "seller_id", "vehicle_id", "final_price_cents", "quantity")):
+        conn.execute(trigger)
+
+
+def add_sales_daily_seller_index(conn):
+    """Índice coberto do resumo diário por vendedor (top vendedores e filtro de vendedor da análise)."""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sales_daily_seller ON sales_daily (seller_id, day, sale_count)")
+    refresh_statistics(conn)
+
+
+def add_inventory_report_index(conn):
+    """Índice do relatório de estoque filtrado por status (is_active = 1 AND stock <= ? ORDER BY stock)."""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_vehicles_active_stock ON vehicles (is_active, stock)")
+    refresh_statistics(conn)
+
+
+# --- BUSCA TEXTUAL (MIGRAÇÕES 13 E 14) ---
+# SQL congelado: as migrações não leem search.py, então mudar as expressões de busca lá
+# não altera o que estas migrações criam (uma mudança de esquema entra numa migração nova).
+
+SEARCH_INDEX_V13 = """
+    CREATE VIRTUAL TABLE search_index USING fts5(
+        title, detail, tags,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '1 2 3 4 5 6'
+    )
+"""
+
+# Entidade -> (código no rowid, colunas rowid/title/detail/tags com {p} como a linha de origem)
+SEARCH_ROWS_V13 = {
+    "vehicles": (1, """
+        ({p}.id << 3) + 1,
+        {p}.make || ' ' || {p}.model || ' ' || COALESCE({p}.manufacture_year, '') || '/' || COALESCE({p}.model_year, ''),
+        printf('R$ %d.%02d', {p}.sale_price_cents / 100, {p}.sale_price_cents % 100) || ' ' || COALESCE({p}.color, ''),
+        'zzveiculo' || CASE WHEN {p}.is_active = 1 AND {p}.stock > 0 THEN ' zzdisponivel' ELSE '' END
+    """),
+    "customers": (2, """
+        ({p}.id << 3) + 2,
+        {p}.name,
+        COALESCE({p}.email, '') || ' ' || COALESCE({p}.phone, ''),
+        'zzcliente' || CASE WHEN {p}.is_active = 1 THEN ' zzativo' ELSE '' END
+    """),
+    "sellers": (3, """
+        ({p}.id << 3) + 3,
+        {p}.name,
+        COALESCE({p}.email, '') || ' ' || COALESCE({p}.phone, ''),
+        'zzvendedor' || CASE WHEN {p}.is_active = 1 THEN ' zzativo' ELSE '' END
+    """),
+    "sales": (4, """
+        ({p}.id << 3) + 4,
+        COALESCE((SELECT v.make || ' ' || v.model || ' ' || COALESCE(v.manufacture_year, '') || '/' || COALESCE(v.model_year, '')
+                  FROM vehicles v WHERE v.id = {p}.vehicle_id), ''),
+        COALESCE((SELECT c.name FROM customers c WHERE c.id = {p}.customer_id), '') || ' / '
+            || COALESCE((SELECT se.name FROM sellers se WHERE se.id = {p}.seller_id), '') || ' '
+            || date({p}.sale_ts, 'unixepoch', 'localtime') || ' '
+            || printf('R$ %d.%02d', {p}.final_price_cents / 100, {p}.final_price_cents % 100),
+        'zzvenda'
+    """),
+}
+
+
+def add_search_index(conn):
+    """Índice FTS5 de veículos, clientes, vendedores e vendas, com os triggers que o mantêm.
+
+    Os cadastros são carregados aqui; as vendas existentes, em lotes na migração 14.
+    Como os triggers das vendas já existem, vendas novas chegam indexadas durante a carga.
+    """
+    try:
+        conn.execute(SEARCH_INDEX_V13)
+    except sqlite3.OperationalError as e:
+        raise sqlite3.NotSupportedError(f"SQLite sem suporte a FTS5 ({e}); atualize o SQLite.") from e
+    for entity, (code, row) in SEARCH_ROWS_V13.items():
+        remove = f"DELETE FROM search_index WHERE rowid = (OLD.id << 3) + {code};"
+        add = f"INSERT INTO search_index (rowid, title, detail, tags) SELECT {row.format(p='NEW')};"
+        for event, body in (("INSERT", add), ("UPDATE", f"{remove} {add}"), ("DELETE", remove)):
+            conn.execute(f"CREATE TRIGGER trg_{entity}_{event.lower()}_search AFTER {event} ON {entity} BEGIN {body} END")
+        if entity != "sales":
+            conn.execute(f"INSERT INTO search_index (rowid, title, detail, tags) SELECT {row.format(p=entity)} FROM {entity}")
+
+
+def backfill_sales_search(conn, batch_size):
+    """Indexa as vendas existentes por faixas de id (um lote por transação).
+
+    A posição fica numa tabela temporária da conexão; se a carga for interrompida,
+    recomeça do início na próxima execução (INSERT OR REPLACE torna a repetição inofensiva).
+    """
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS search_backfill (last_id INTEGER NOT NULL)")
+    row = conn.execute("SELECT last_id FROM temp.search_backfill").fetchone()
+    ids = conn.execute("SELECT id FROM sales WHERE id > ? ORDER BY id LIMIT ?", (row[0] if row else 0, batch_size)).fetchall()
+    if ids:
+        conn.execute(
+            f"INSERT OR REPLACE INTO search_index (rowid, title, detail, tags) "
+            f"SELECT {SEARCH_ROWS_V13['sales'][1].format(p='sales')} FROM sales WHERE id BETWEEN ? AND ?",
+            (ids[0][0], ids[-1][0])
+        )
+    if len(ids) < batch_size:
+        conn.execute("DROP TABLE temp.search_backfill")
+    else:
+        conn.execute("DELETE FROM temp.search_backfill")
+        conn.execute("INSERT INTO temp.search_backfill (last_id) VALUES (?)", (ids[-1][0],))
+    return len(ids)
+
+
+# Tabelas que a importação em lote (imports.py) grava com os triggers de INSERT suspensos
+BULK_IMPORT_TABLES_V16 = ("vehicles", "customers", "sellers")
+
+
+def add_bulk_import_guard(conn):
+    """Triggers de INSERT (versão e busca) dos cadastros suspensos por uma linha em bulk_import.
+
+    A importação grava a linha no início da transação de cada bloco e a apaga antes do
+    COMMIT: os triggers pulam as linhas do bloco (os efeitos são aplicados em conjunto)
+    e nenhuma outra conexão chega a ver a linha, então os demais INSERTs seguem normais.
+    Sem DDL por bloco, os comandos preparados das outras conexões continuam válidos.
+    """
+    conn.execute("CREATE TABLE bulk_import (table_name TEXT PRIMARY KEY) WITHOUT ROWID")
+    for table in BULK_IMPORT_TABLES_V16:
+        when = f"WHEN NOT EXISTS (SELECT 1 FROM bulk_import WHERE table_name = '{table}')"
+        conn.execute(f"DROP TRIGGER trg_{table}_insert_version")
+        conn.execute(f"""
+            CREATE TRIGGER trg_{table}_insert_version AFTER INSERT ON {table} {when}
+            BEGIN
+                UPDATE table_versions SET version = version + 1 WHERE table_name = '{table}';
+                INSERT OR REPLACE INTO change_log (table_name, row_id, version)
+                    SELECT '{table}', NEW.rowid, version FROM table_versions WHERE table_name = '{table}';
+            END
+        """)
+        conn.execute(f"DROP TRIGGER trg_{table}_insert_search")
+        conn.execute(
+            f"CREATE TRIGGER trg_{table}_insert_search AFTER INSERT ON {table} {when} "
+            f"BEGIN INSERT INTO search_index (rowid, title, detail, tags) SELECT {SEARCH_ROWS_V13[table][1].format(p='NEW')}; END"
+        )
+
+
+def skip_unchanged_vehicle_search(conn):
+    """Reindexa o veículo na busca só quando o texto indexado muda.
+
+    Cada venda baixa o estoque e disparava a troca da linha no FTS5; o texto
+    só depende do estoque quando o veículo deixa de estar (ou volta a ficar)
+    disponível.
+    """
+    row = SEARCH_ROWS_V13["vehicles"][1]
+    conn.execute("DROP TRIGGER trg_vehicles_update_search")
+    conn.execute(f"""
+        CREATE TRIGGER trg_vehicles_update_search AFTER UPDATE ON vehicles
+        WHEN ({row.format(p='OLD')}) IS NOT ({row.format(p='NEW')})
+        BEGIN
+            DELETE FROM search_index WHERE rowid = (OLD.id << 3) + 1;
+            INSERT INTO search_index (rowid, title, detail, tags) SELECT {row.format(p='NEW')};
+        END
+    """)
+
+
+def add_change_log_horizon(conn):
+    """Versão até a qual o change_log de cada tabela já foi limpo (prune_change_log)."""
+    conn.execute("ALTER TABLE table_versions ADD COLUMN pruned_version INTEGER NOT NULL DEFAULT 0")
+
+
+MIGRATIONS = [
+    Migration(1, "esquema base", create_base_schema),
+    Migration(2, "controle de versões das tabelas", create_change_tracking),
+    Migration(3, "índices das consultas", create_indexes),
+    Migration(4, "chaves estrangeiras em vendas", add_sales_foreign_keys),
+    BatchedMigration(5, "preenche customer_id das vendas", """
+        UPDATE sales SET customer_id = (SELECT MIN(c.id) FROM customers c WHERE c.name = sales.customer_name)
+        WHERE rowid IN (
+            SELECT rowid FROM sales WHERE customer_id IS NULL AND customer_name IS NOT NULL LIMIT ?
+        )
+    """),
+    BatchedMigration(6, "preenche seller_id das vendas", """
+        UPDATE sales SET seller_id = (SELECT MIN(s.id) FROM sellers s WHERE s.name = sales.seller_name)
+        WHERE rowid IN (
+            SELECT rowid FROM sales WHERE seller_id IS NULL AND seller_name IS NOT NULL LIMIT ?
+        )
+    """),
+    Migration(7, "remove colunas de texto de vendas", drop_sales_text_columns),
+    Migration(8, "preços em centavos e datas em epoch", add_integer_money_and_time),
+    # sale_date está em hora local; 'utc' converte para epoch real. Datas inválidas viram 0.
+    BatchedMigration(9, "converte preços e datas das vendas", """
+        UPDATE sales SET
+            final_price_cents = CAST(ROUND(final_price * 100) AS INTEGER),
+            sale_ts = COALESCE(CAST(strftime('%s', sale_date, 'utc') AS INTEGER), 0),
+            sale_day = COALESCE(CAST(strftime('%Y%m%d', sale_date) AS INTEGER), 0)
+        WHERE rowid IN (SELECT rowid FROM sales WHERE sale_day IS NULL LIMIT ?)
+    """),
+    Migration(10, "remove colunas REAL/TEXT de preços e datas", drop_real_and_text_columns),
+    Migration(11, "resumo diário de vendas", add_sales_daily),
+    Migration(12, "índice do relatório de estoque", add_inventory_report_index),
+    Migration(13, "busca textual dos cadastros e das vendas", add_search_index),
+    BatchedMigration(14, "indexa as vendas existentes na busca", backfill_sales_search),
+    Migration(15, "índice do resumo diário por vendedor", add_sales_daily_seller_index),
+    Migration(16, "triggers de INSERT suspensos na importação em lote", add_bulk_import_guard),
+    Migration(17, "quantidade de unidades nas vendas", add_sales_quantity),
+    Migration(18, "busca dos veículos reindexada só quando o texto muda", skip_unchanged_vehicle_search),
+    Migration(19, "horizonte de limpeza do change_log", add_change_log_horizon),
+]
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def migrate(conn):
+    """Aplica as migrações pendentes e retorna quantas foram aplicadas."""
+    current = conn.execute("PRAGMA user_version").fetchone()[0]
+    if current >= LATEST_VERSION:
+        return 0
+    if sqlite3.sqlite_version_info < MIN_SQLITE_VERSION:
+        raise sqlite3.NotSupportedError(
+            f"SQLite {sqlite3.sqlite_version} não suportado; atualize para "
+            f"{'.'.join(map(str, MIN_SQLITE_VERSION))} ou superior."
+        )
+
+    # Encerra qualquer transação implícita aberta antes do BEGIN IMMEDIATE
+    conn.commit()
+    applied = 0
+    for migration in MIGRATIONS:
+        if migration.version > current:
+            migration.run(conn)
+            applied += 1
+    return applied
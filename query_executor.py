@@ -0,0 +1,167 @@
+"""Execução das consultas fora da thread do Tk.
+
+O QueryExecutor mantém uma thread de trabalho com conexão própria (somente
+leitura, ver database.connect). Cada tarefa recebe essa conexão e o próprio
+QueryJob; o resultado volta para o loop do Tk por uma fila consultada com
+after(), de modo que on_done/on_error sempre rodam na thread da interface e
+podem mexer nos widgets. Enquanto houver tarefas, o status (ativo, progresso,
+mensagem) é informado a cada verificação para alimentar o indicador de progresso.
+
+Tarefas canceladas (troca de aba, tarefa substituída pela mesma chave) são
+interrompidas dentro do SQLite pelo progress handler e têm o resultado
+descartado.
+"""
+import queue
+import threading
+
+from database import DB_PATH, connect
+
+# Intervalo de verificação dos resultados (abaixo de um quadro a 60 Hz)
+POLL_INTERVAL_MS = 15
+# Instruções da VM do SQLite entre duas verificações de cancelamento
+CANCEL_CHECK_OPS = 10000
+
+
+class QueryCancelled(Exception):
+    """Levantada dentro de uma tarefa cancelada (ver QueryJob.check)."""
+
+
+class QueryJob:
+    """Uma tarefa submetida ao QueryExecutor."""
+
+    def __init__(self, func, on_done, on_error, key, group):
+        self.func = func
+        self.on_done = on_done
+        self.on_error = on_error
+        self.key = key
+        self.group = group
+        self.cancelled = False
+        # Fração concluída (0 a 1) informada pela tarefa; None = indeterminado
+        self.progress = None
+        # Texto opcional exibido junto ao indicador (ex.: linhas gravadas)
+        self.message = None
+
+    def cancel(self):
+        """Marca a tarefa como cancelada; o resultado não será entregue."""
+        self.cancelled = True
+
+    def check(self):
+        """Interrompe a tarefa (QueryCancelled) se ela foi cancelada; para laços em Python."""
+        if self.cancelled:
+            raise QueryCancelled()
+
+    def set_progress(self, fraction):
+        """Atualiza o progresso exibido; pode ser chamado da thread de trabalho."""
+        self.progress = min(max(fraction, 0.0), 1.0)
+        self.check()
+
+    def set_message(self, text):
+        """Atualiza o texto exibido junto ao indicador; pode ser chamado da thread de trabalho."""
+        self.message = text
+        self.check()
+
+
+class QueryExecutor:
+    """Fila de consultas executadas numa thread de trabalho com conexão própria."""
+
+    def __init__(self, master, path=DB_PATH, on_status=None):
+        self.master = master
+        self.path = path
+        # on_status(ativo, progresso, mensagem) é chamado na thread do Tk a cada verificação
+        self.on_status = on_status
+        self._jobs = queue.Queue()
+        self._results = queue.Queue()
+        self._pending = []
+        self._current = None
+        self._polling = False
+        self._thread = threading.Thread(target=self._work, name="query-executor", daemon=True)
+        self._thread.start()
+
+    def submit(self, func, on_done, on_error=None, key=None, group=None):
+        """Agenda func(conn, job) na thread de trabalho.
+
+        on_done(resultado) e on_error(exceção) rodam na thread do Tk. Uma tarefa
+        com a mesma key cancela a anterior (vale só o pedido mais recente); group
+        agrupa tarefas para cancel(group), por exemplo as de uma aba.
+        """
+        if key is not None:
+            for job in self._pending:
+                if job.key == key:
+                    job.cancel()
+        job = QueryJob(func, on_done, on_error, key, group)
+        self._pending.append(job)
+        self._jobs.put(job)
+        self._schedule_poll()
+        return job
+
+    def cancel(self, group=None):
+        """Cancela as tarefas do grupo informado (ou todas, sem grupo)."""
+        for job in self._pending:
+            if group is None or job.group == group:
+                job.cancel()
+
+    def close(self, wait=False):
+        """Cancela as tarefas e encerra a thread de trabalho (wait: espera a conexão dela ser fechada)."""
+        self.cancel()
+        self._jobs.put(None)
+        if wait:
+            self._thread.join()
+
+    def _work(self):
+        """Laço da thread de trabalho."""
+        conn = connect(self.path, read_only=True)
+        # Interrompe a consulta em andamento assim que a tarefa for cancelada
+        conn.set_progress_handler(lambda: self._current is not None and self._current.cancelled, CANCEL_CHECK_OPS)
+        try:
+            while True:
+                job = self._jobs.get()
+                if job is None:
+                    break
+                if job.cancelled:
+                    self._results.put((job, None, None))
+                    continue
+                self._current = job
+                try:
+                    result, error = job.func(conn, job), None
+                except Exception as e:
+                    result, error = None, e
+                finally:
+                    self._current = None
+                    # Nenhum snapshot de leitura fica aberto entre tarefas
+                    if conn.in_transaction:
+                        conn.rollback()
+                self._results.put((job, result, error))
+        finally:
+            conn.close()
+
+    def _schedule_poll(self):
+        if not self._polling:
+            self._polling = True
+            self.master.after(POLL_INTERVAL_MS, self._poll)
+
+    def _poll(self):
+        """Entrega os resultados prontos na thread do Tk."""
+        self._polling = False
+        try:
+            while True:
+                try:
+                    job, result, error = self._results.get_nowait()
+                except queue.Empty:
+                    break
+                self._pending.remove(job)
+                if job.cancelled:
+                    continue
+                if error is None:
+                    job.on_done(result)
+                elif job.on_error is not None:
+                    job.on_error(error)
+                else:
+                    raise error
+        finally:
+            # Mesmo se um callback falhar, o status e a verificação seguinte continuam
+            active = [job for job in self._pending if not job.cancelled]
+            if self.on_status is not None:
+                current = active[0] if active else None
+                self.on_status(current is not None, current and current.progress, current and current.message)
+            if self._pending:
+                self._schedule_poll()
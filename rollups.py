@@ -0,0 +1,74 @@
+"""Tabelas de resumo (rollups) das vendas.
+
+sales_daily guarda, por dia, vendedor e marca, as unidades vendidas e o
+faturamento em centavos. É mantida pelos triggers das migrações 11 e 17
+(migrations.py) na mesma transação que grava a venda, de modo que gráficos e
+resumos leem um número de linhas proporcional aos dias, não às vendas.
+rebuild_sales_daily recalcula o resumo a partir de sales (para cargas em lote
+ou correções), um mês por transação.
+A marca registrada é a do veículo no momento da venda; depois de corrigir o
+cadastro de um veículo já vendido, recalcule o período afetado.
+"""
+from datetime import date
+
+
+def rebuild_day_range(conn, first_day, last_day):
+    """Recalcula sales_daily para os dias [first_day, last_day] (chaves AAAAMMDD) na transação atual."""
+    conn.execute("DELETE FROM sales_daily WHERE day BETWEEN ? AND ?", (first_day, last_day))
+    conn.execute("""
+        INSERT INTO sales_daily (day, seller_id, make, sale_count, revenue_cents)
+        SELECT s.sale_day, COALESCE(s.seller_id, 0), COALESCE(v.make, ''),
+               SUM(s.quantity), SUM(s.quantity * s.final_price_cents)
+        FROM sales s
+        LEFT JOIN vehicles v ON v.id = s.vehicle_id
+        WHERE s.sale_day BETWEEN ? AND ?
+        GROUP BY 1, 2, 3
+    """, (first_day, last_day))
+
+
+def rebuild_sales_daily(conn, first_day=None, last_day=None, progress=None):
+    """Recalcula o resumo diário, um mês por transação (não segura o lock de escrita por muito tempo).
+
+    Sem limites, cobre todo o período com vendas. progress(first_day, last_day) é chamado a cada mês.
+    Retorna a quantidade de meses processados.
+    """
+    include_invalid = first_day is None
+    if first_day is None or last_day is None:
+        low, high = conn.execute("SELECT MIN(sale_day), MAX(sale_day) FROM sales WHERE sale_day > 0").fetchone()
+        first_day = (low or 0) if first_day is None else first_day
+        last_day = (high or 0) if last_day is None else last_day
+
+    conn.commit()
+    months = 0
+    year, month = divmod(max(first_day, 10101) // 100, 100)
+    while first_day > 0 and year * 10000 + month * 100 <= last_day:
+        start = max(first_day, year * 10000 + month * 100)
+        end = min(last_day, year * 10000 + month * 100 + 99)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rebuild_day_range(conn, start, end)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        months += 1
+        if progress is not None:
+            progress(start, end)
+        month += 1
+        if month > 12:
+            year, month = year + 1, 1
+    # Vendas com data inválida na conversão (sale_day = 0) ficam fora do laço mensal
+    if include_invalid:
+        rebuild_day_range(conn, 0, 0)
+        conn.commit()
+    return months
+
+
+def day_key(value):
+    """Chave inteira AAAAMMDD de uma data."""
+    return value.year * 10000 + value.month * 100 + value.day
+
+
+def parse_day_key(text):
+    """Converte 'AAAA-MM-DD' na chave inteira AAAAMMDD (ValueError se inválida)."""
+    return day_key(date.fromisoformat(text.strip()))
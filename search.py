@@ -0,0 +1,167 @@
+"""Índice de busca textual (FTS5) dos cadastros e do histórico de vendas.
+
+search_index guarda uma linha por veículo, cliente, vendedor e venda, mantida
+por triggers na mesma transação que altera a tabela. O rowid codifica a
+entidade e a chave (id * 8 + código da entidade), e a coluna tags leva o
+tipo da entidade e o status (disponível/ativo), de modo que o filtro por
+entidade e por status também é resolvido pelo índice FTS. A busca por
+prefixo ("joa" encontra "João") usa os índices de prefixo do FTS5 (até 6
+letras; prefixos maiores expandem os termos na hora) e não depende do
+tamanho das tabelas. Vendas são indexadas com os nomes do veículo,
+cliente e vendedor do momento da venda; depois de renomear cadastros antigos,
+recarregue o índice (python manage.py rebuild-search).
+"""
+import re
+import unicodedata
+
+# Quantidade de resultados devolvidos por busca
+SEARCH_LIMIT = 10
+# A relevância é calculada só sobre as correspondências mais recentes, que o FTS5 lê em
+# ordem de rowid e interrompe cedo. O bm25 do próprio FTS5 não serve aqui: ele percorre a
+# lista completa de cada termo (inclusive das tags) para calcular o IDF.
+RANK_CANDIDATES = 200
+# Peso de um termo encontrado no título e no detalhe
+TITLE_WEIGHT = 2
+DETAIL_WEIGHT = 1
+# Bits do rowid reservados para o código da entidade
+ENTITY_BITS = 3
+
+# Entidade -> (código no rowid, tag da entidade, tag de status, título, detalhe, condição de status)
+# As tags usam o prefixo "zz" para não coincidirem com palavras dos textos (ex.: "Vendedor" num
+# nome): a lista de uma tag contém só as linhas daquela entidade/status e o AND com ela é barato.
+# As expressões usam {p} como a linha de origem (a própria tabela na carga). A tabela e os
+# triggers são criados pela migração 13 (migrations.py), com o mesmo SQL: uma mudança aqui
+# também precisa de uma migração nova que recrie os triggers.
+# Entidades sem status (vendas) usam None nas duas posições.
+SEARCH_ENTITIES = {
+    "vehicles": (
+        1, "zzveiculo", "zzdisponivel",
+        "{p}.make || ' ' || {p}.model || ' ' || COALESCE({p}.manufacture_year, '') || '/' || COALESCE({p}.model_year, '')",
+        "printf('R$ %d.%02d', {p}.sale_price_cents / 100, {p}.sale_price_cents % 100) || ' ' || COALESCE({p}.color, '')",
+        "{p}.is_active = 1 AND {p}.stock > 0",
+    ),
+    "customers": (
+        2, "zzcliente", "zzativo",
+        "{p}.name",
+        "COALESCE({p}.email, '') || ' ' || COALESCE({p}.phone, '')",
+        "{p}.is_active = 1",
+    ),
+    "sellers": (
+        3, "zzvendedor", "zzativo",
+        "{p}.name",
+        "COALESCE({p}.email, '') || ' ' || COALESCE({p}.phone, '')",
+        "{p}.is_active = 1",
+    ),
+    "sales": (
+        4, "zzvenda", None,
+        "COALESCE((SELECT v.make || ' ' || v.model || ' ' || COALESCE(v.manufacture_year, '') || '/' || COALESCE(v.model_year, '') "
+        "FROM vehicles v WHERE v.id = {p}.vehicle_id), '')",
+        "COALESCE((SELECT c.name FROM customers c WHERE c.id = {p}.customer_id), '') || ' / ' "
+        "|| COALESCE((SELECT se.name FROM sellers se WHERE se.id = {p}.seller_id), '') || ' ' "
+        "|| date({p}.sale_ts, 'unixepoch', 'localtime') || ' ' "
+        "|| printf('R$ %d.%02d', {p}.final_price_cents / 100, {p}.final_price_cents % 100)",
+        None,
+    ),
+}
+# Rótulos exibidos na interface
+ENTITY_LABELS = {"vehicles": "Veículo", "customers": "Cliente", "sellers": "Vendedor", "sales": "Venda"}
+ENTITY_BY_CODE = {spec[0]: entity for entity, spec in SEARCH_ENTITIES.items()}
+
+
+def _row_select(entity, p):
+    """SELECT (rowid, title, detail, tags) de uma linha da entidade."""
+    code, tag, status_tag, title, detail, status = SEARCH_ENTITIES[entity]
+    tags = f"'{tag}'"
+    if status is not None:
+        tags += f" || CASE WHEN {status.format(p=p)} THEN ' {status_tag}' ELSE '' END"
+    return f"SELECT ({p}.id << {ENTITY_BITS}) + {code}, {title.format(p=p)}, {detail.format(p=p)}, {tags}"
+
+
+def rebuild_search_index(conn, entities=None):
+    """Recarrega o índice a partir das tabelas (na transação atual)."""
+    for entity in entities or SEARCH_ENTITIES:
+        code = SEARCH_ENTITIES[entity][0]
+        conn.execute(f"DELETE FROM search_index WHERE rowid & {(1 << ENTITY_BITS) - 1} = {code}")
+        conn.execute(f"INSERT INTO search_index (rowid, title, detail, tags) {_row_select(entity, entity)} FROM {entity}")
+
+
+def index_rows_after(conn, entity, last_id, batch_size):
+    """Indexa (ou reindexa) até batch_size linhas da entidade com id > last_id.
+
+    Retorna (linhas processadas, último id processado); usado na carga em lotes.
+    """
+    ids = conn.execute(f"SELECT id FROM {entity} WHERE id > ? ORDER BY id LIMIT ?", (last_id, batch_size)).fetchall()
+    if not ids:
+        return 0, last_id
+    conn.execute(
+        f"INSERT OR REPLACE INTO search_index (rowid, title, detail, tags) {_row_select(entity, entity)} "
+        f"FROM {entity} WHERE id BETWEEN ? AND ?",
+        (ids[0][0], ids[-1][0])
+    )
+    return len(ids), ids[-1][0]
+
+
+def match_expression(text, entities=None, only_active=False):
+    """Expressão MATCH do FTS5 para o texto digitado (None se não houver termos).
+
+    As palavras são buscadas no título e no detalhe; só a última, que ainda está sendo
+    digitada, vira prefixo ("joao sil" -> "joao" AND "sil"*), pois expandir prefixos
+    custa mais que buscar termos completos. Entidade e status entram como termos da
+    coluna tags.
+    """
+    terms = re.findall(r"\w+", text)
+    if not terms:
+        return None
+    words = " AND ".join([f'"{term}"' for term in terms[:-1]] + [f'"{terms[-1]}"*'])
+    expression = f"{{title detail}} : ({words})"
+    if entities:
+        tags = " OR ".join(SEARCH_ENTITIES[entity][1] for entity in entities)
+        expression = f"tags : ({tags}) AND {expression}"
+    if only_active:
+        # Entidades sem status (vendas) não entram numa busca só de ativos
+        statuses = sorted({SEARCH_ENTITIES[entity][2] for entity in entities or SEARCH_ENTITIES} - {None})
+        expression = f"tags : ({' OR '.join(statuses)}) AND {expression}"
+    return expression
+
+
+def _words(text):
+    """Palavras normalizadas como o tokenizer (minúsculas, sem acentos)."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    return re.findall(r"\w+", "".join(ch for ch in text if not unicodedata.combining(ch)))
+
+
+def _score(terms, title, detail):
+    """Relevância: termos no título valem mais que no detalhe; palavra exata vale mais que prefixo."""
+    title_words = _words(title)
+    detail_words = _words(detail)
+    score = 0
+    for term in terms:
+        for words, weight in ((title_words, TITLE_WEIGHT), (detail_words, DETAIL_WEIGHT)):
+            if term in words:
+                score += weight * 2
+            elif any(word.startswith(term) for word in words):
+                score += weight
+    return score
+
+
+def search(conn, text, entities=None, only_active=False, limit=SEARCH_LIMIT):
+    """Busca por prefixo e retorna [(entidade, id, título, detalhe)], mais relevantes primeiro.
+
+    Cada entidade contribui com até RANK_CANDIDATES correspondências, as mais recentes
+    (assim vendas numerosas não escondem os cadastros); o conjunto é ordenado pela
+    relevância (ver _score) e, no empate, pela ordem de chegada.
+    """
+    terms = _words(text)
+    if not terms:
+        return []
+    candidates = []
+    for entity in entities or SEARCH_ENTITIES:
+        if only_active and SEARCH_ENTITIES[entity][2] is None:
+            continue
+        candidates.extend(conn.execute(
+            "SELECT rowid, title, detail FROM search_index WHERE search_index MATCH ? ORDER BY rowid DESC LIMIT ?",
+            (match_expression(text, [entity], only_active), RANK_CANDIDATES)
+        ).fetchall())
+    candidates.sort(key=lambda row: _score(terms, row[1], row[2]), reverse=True)
+    mask = (1 << ENTITY_BITS) - 1
+    return [(ENTITY_BY_CODE[rowid & mask], rowid >> ENTITY_BITS, title, detail) for rowid, title, detail in candidates[:limit]]
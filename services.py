@@ -0,0 +1,761 @@
+"""Camada de serviços: todo o acesso ao banco da aplicação, sem dependência do Tk.
+
+Cada serviço recebe uma conexão (por padrão a de escrita do ConnectionManager)
+e é dono das instruções SQL e das transações da sua área; as telas só leem os
+widgets, chamam o serviço e exibem o resultado. Os registros retornados são
+tuplas nomeadas (Vehicle, Person, Sale, ...), que continuam indexáveis como as
+linhas do sqlite3. Os SQL são constantes do módulo, então o cache de
+instruções preparadas de cada conexão os reaproveita entre as chamadas.
+
+Violações de regra de negócio levantam ValidationError (ou uma subclasse) com
+a mensagem para o usuário; falhas do banco propagam como sqlite3.Error.
+
+As leituras pesadas rodam na thread de consultas (query_executor.py): basta
+criar o serviço sobre a conexão somente leitura recebida pela tarefa, por
+exemplo ReportService(conn).analytics_data().
+"""
+import hashlib
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+from catalog import get_catalog
+from database import get_connection_manager
+from migrations import migrate, table_versions
+from validation import ValidationError, validate_person, validate_vehicle
+
+
+class DuplicateError(ValidationError):
+    """Cadastro que já existe (nome, email ou usuário repetido)."""
+
+
+class OutOfStockError(ValidationError):
+    """Veículo sem estoque para a venda."""
+
+
+# --- REGISTROS ---
+
+class Make(NamedTuple):
+    id: int
+    name: str
+
+
+class Model(NamedTuple):
+    id: int
+    make_name: str
+    model_name: str
+
+
+class Vehicle(NamedTuple):
+    id: int
+    make: str
+    model: str
+    manufacture_year: int
+    model_year: int
+    color: str
+    sale_price_cents: int
+    stock: int
+    is_active: int
+    sale_date_only: Optional[str]
+
+    @property
+    def page_key(self):
+        """Chave da ordenação do estoque (is_active DESC, make, model, id) usada na paginação."""
+        return self.is_active, self.make, self.model, self.id
+
+
+class Person(NamedTuple):
+    """Cliente ou vendedor."""
+    id: int
+    name: str
+    phone: str
+    email: str
+    is_active: int
+
+
+class Sale(NamedTuple):
+    """Venda com os nomes de veículo, cliente e vendedor resolvidos; final_price_cents é o preço de cada unidade."""
+    id: int
+    sale_ts: int
+    vehicle_info: Optional[str]
+    customer_name: Optional[str]
+    seller_name: Optional[str]
+    final_price_cents: int
+    quantity: int
+
+
+class SaleReceipt(NamedTuple):
+    """Resultado de SalesService.register_sale."""
+    sale_id: int
+    seller_name: str
+    stock_left: int
+
+
+class CartLine(NamedTuple):
+    """Item do carrinho: quantidade de unidades de um veículo, com o preço final de cada uma."""
+    vehicle_id: int
+    quantity: int
+    unit_price_cents: int
+
+
+class CartReceipt(NamedTuple):
+    """Resultado de SalesService.register_cart; sold_out são os veículos que zeraram o estoque."""
+    units: int
+    total_cents: int
+    seller_name: str
+    sold_out: list
+
+
+class User(NamedTuple):
+    id: int
+    username: str
+    name: str
+    role: str
+
+
+class DailyTotal(NamedTuple):
+    """Unidades vendidas e faturamento de um dia (day = AAAAMMDD)."""
+    day: int
+    units: int
+    revenue_cents: int
+
+
+class AnalyticsFilter(NamedTuple):
+    """Filtros da análise gráfica (None = sem filtro); dias em AAAAMMDD, granularity em ANALYTICS_PERIODS."""
+    start_day: Optional[int] = None
+    end_day: Optional[int] = None
+    granularity: str = "month"
+    make: Optional[str] = None
+    seller_id: Optional[int] = None
+
+
+class AnalyticsData(NamedTuple):
+    """Dados dos gráficos, já agregados no SQL (poucas linhas cada).
+
+    sales_by_period e sales_by_seller são [(rótulo, vendas)], stock_by_make é
+    [(marca, unidades)] e price_bins é [(preço inicial, preço final, veículos)] em reais.
+    """
+    sales_by_period: list
+    sales_by_seller: list
+    stock_by_make: list
+    price_bins: list
+
+
+# --- TRANSAÇÕES E LISTAS INCREMENTAIS ---
+
+@contextmanager
+def transaction(conn):
+    """BEGIN IMMEDIATE ... COMMIT; desfaz tudo se o bloco levantar exceção."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+class Listing(NamedTuple):
+    """Consulta de uma lista exibida na tela, atualizada por versão da tabela (fetch_changes).
+
+    A primeira coluna de select_sql é o rowid da tabela; id_column é a expressão
+    desse rowid quando select_sql tiver junções. Listas paginadas têm after_sql:
+    o predicado das linhas seguintes, na ordem de order_sql, à chave da última
+    linha exibida (ver fetch_page).
+    """
+    table: str
+    select_sql: str
+    order_sql: str
+    record: type
+    id_column: str = "rowid"
+    after_sql: Optional[str] = None
+
+
+# Acima deste número de linhas alteradas a lista é recarregada por completo
+INCREMENTAL_REFRESH_LIMIT = 500
+
+
+def fetch_changes(conn, listing, base_version, incremental=True, limit=None):
+    """Linhas da lista alteradas desde base_version; retorna (versão, ids alterados, registros).
+
+    Sem alterações, registros é None. Se base_version for None, incremental for
+    False, base_version for anterior ao horizonte do change_log
+    (migrations.prune_change_log) ou houver mais de INCREMENTAL_REFRESH_LIMIT
+    alterações, ids alterados é None e os registros são a lista completa, já
+    ordenada (só as limit primeiras linhas, se informado).
+    """
+    version, pruned_version = conn.execute(
+        "SELECT version, pruned_version FROM table_versions WHERE table_name = ?", (listing.table,)
+    ).fetchone() or (0, 0)
+    if version == base_version:
+        return version, None, None
+
+    changed_ids = None
+    if incremental and base_version is not None and base_version >= pruned_version:
+        # Uma linha além do limite basta para saber que a lista será recarregada
+        changed_ids = [row[0] for row in conn.execute(
+            "SELECT row_id FROM change_log WHERE table_name = ? AND version > ? LIMIT ?",
+            (listing.table, base_version, INCREMENTAL_REFRESH_LIMIT + 1)
+        )]
+        if len(changed_ids) > INCREMENTAL_REFRESH_LIMIT:
+            changed_ids = None
+
+    make = listing.record._make
+    if changed_ids is None:
+        if limit is not None:
+            return version, None, fetch_page(conn, listing, None, limit)
+        return version, None, list(map(make, conn.execute(f"{listing.select_sql} ORDER BY {listing.order_sql}")))
+
+    records = []
+    for start in range(0, len(changed_ids), INCREMENTAL_REFRESH_LIMIT):
+        chunk = changed_ids[start:start + INCREMENTAL_REFRESH_LIMIT]
+        placeholders = ", ".join("?" for _ in chunk)
+        records.extend(map(make, conn.execute(f"{listing.select_sql} WHERE {listing.id_column} IN ({placeholders})", chunk)))
+    return version, changed_ids, records
+
+
+def fetch_page(conn, listing, after, limit):
+    """Até limit registros da lista paginada após a chave after (None: a primeira página)."""
+    if after is None:
+        return list(map(listing.record._make, conn.execute(
+            f"{listing.select_sql} ORDER BY {listing.order_sql} LIMIT ?", (limit,)
+        )))
+    return list(map(listing.record._make, conn.execute(
+        f"{listing.select_sql} WHERE {listing.after_sql} ORDER BY {listing.order_sql} LIMIT ?", (*after, limit)
+    )))
+
+
+class Service:
+    """Base dos serviços: a conexão usada e o atalho para transações."""
+
+    def __init__(self, conn=None):
+        self.conn = conn if conn is not None else get_connection_manager().writer
+
+    def transaction(self):
+        return transaction(self.conn)
+
+
+# --- ESTOQUE E CATÁLOGO ---
+
+MAKES_LISTING = Listing("makes", "SELECT rowid, name FROM makes", "name ASC", Make)
+MODELS_LISTING = Listing("models", "SELECT id, make_name, model_name FROM models", "make_name, model_name ASC", Model)
+
+# Quantidade de veículos buscada por página na lista do estoque
+INVENTORY_PAGE_SIZE = 200
+# Linhas por página das consultas por chave da API (veículos à venda, vendas, estoque baixo),
+# independente das listas da tela
+REPORT_PAGE_SIZE = 100
+
+INVENTORY_COLUMNS = "id, make, model, manufacture_year, model_year, color, sale_price_cents, stock, is_active, sale_date_only"
+
+
+class InventoryService(Service):
+    """Marcas, modelos e veículos do estoque."""
+
+    def __init__(self, conn=None, catalog=None):
+        super().__init__(conn)
+        self.catalog = catalog if catalog is not None else get_catalog()
+
+    def refresh_catalog(self):
+        """Atualiza o cache de marcas/modelos (catalog.py); True se ele mudou."""
+        return self.catalog.refresh(self.conn)
+
+    def add_make(self, name):
+        """Cadastra uma marca e retorna o nome gravado."""
+        name = name.strip().title()
+        if not name:
+            raise ValidationError("O campo Marca não pode estar vazio.")
+        try:
+            with self.transaction():
+                self.conn.execute("INSERT INTO makes (name) VALUES (?)", (name,))
+        except sqlite3.IntegrityError:
+            raise DuplicateError("Esta Marca já existe.")
+        self.catalog.invalidate()
+        return name
+
+    def add_model(self, make_name, model_name):
+        """Cadastra um modelo da marca e retorna o nome gravado."""
+        model_name = model_name.strip().title()
+        if not make_name or not model_name:
+            raise ValidationError("Selecione a Marca e digite o Modelo.")
+        try:
+            with self.transaction():
+                self.conn.execute("INSERT INTO models (make_name, model_name) VALUES (?, ?)", (make_name, model_name))
+        except sqlite3.IntegrityError:
+            raise DuplicateError("Este Modelo já existe para esta Marca.")
+        self.catalog.invalidate()
+        return model_name
+
+    def page(self, last_key=None, page_size=INVENTORY_PAGE_SIZE):
+        """Próxima página do estoque após last_key (Vehicle.page_key); None busca a primeira."""
+        if last_key is None:
+            return list(map(Vehicle._make, self.conn.execute(
+                f"SELECT {INVENTORY_COLUMNS} FROM vehicles ORDER BY is_active DESC, make, model, id LIMIT ?",
+                (page_size,)
+            )))
+        # Continua exatamente após a última linha exibida (ordem: is_active DESC, make, model, id).
+        # Duas consultas separadas para que ambas sejam buscas no índice idx_vehicles_active_make_model.
+        last_active, last_make, last_model, last_id = last_key
+        vehicles = list(map(Vehicle._make, self.conn.execute(
+            f"SELECT {INVENTORY_COLUMNS} FROM vehicles WHERE is_active = ? AND (make, model, id) > (?, ?, ?) ORDER BY make, model, id LIMIT ?",
+            (last_active, last_make, last_model, last_id, page_size)
+        )))
+        if len(vehicles) < page_size:
+            vehicles += map(Vehicle._make, self.conn.execute(
+                f"SELECT {INVENTORY_COLUMNS} FROM vehicles WHERE is_active < ? ORDER BY is_active DESC, make, model, id LIMIT ?",
+                (last_active, page_size - len(vehicles))
+            ))
+        return vehicles
+
+    def get(self, vehicle_id):
+        """Vehicle pelo id (None se não existir)."""
+        row = self.conn.execute(f"SELECT {INVENTORY_COLUMNS} FROM vehicles WHERE id = ?", (vehicle_id,)).fetchone()
+        return None if row is None else Vehicle._make(row)
+
+    def available_page(self, after=None, page_size=REPORT_PAGE_SIZE):
+        """Veículos à venda (ativos com estoque) após after = (make, model, id), na ordem de idx_vehicles_active_make_model."""
+        if after is None:
+            return list(map(Vehicle._make, self.conn.execute(
+                f"SELECT {INVENTORY_COLUMNS} FROM vehicles WHERE stock > 0 AND is_active = 1 ORDER BY make, model, id LIMIT ?",
+                (page_size,)
+            )))
+        return list(map(Vehicle._make, self.conn.execute(
+            f"SELECT {INVENTORY_COLUMNS} FROM vehicles WHERE stock > 0 AND is_active = 1 AND (make, model, id) > (?, ?, ?) "
+            f"ORDER BY make, model, id LIMIT ?",
+            (*after, page_size)
+        )))
+
+    def add_vehicle(self, make, model, manufacture_year, model_year, color, price, stock):
+        """Valida (validation.validate_vehicle, marca/modelo no catálogo) e cadastra o veículo; retorna o Vehicle."""
+        self.refresh_catalog()
+        row = validate_vehicle(make, model, manufacture_year, model_year, color, price, stock, self.catalog)
+        with self.transaction():
+            # is_active usa default 1, sale_date_only é NULL
+            cursor = self.conn.execute(
+                "INSERT INTO vehicles (make, model, manufacture_year, model_year, color, sale_price_cents, stock) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                row
+            )
+        return Vehicle(cursor.lastrowid, *row, 1, None)
+
+    def set_vehicle_active(self, vehicle_id, active):
+        """Disponível (ativo) ou vendido (inativo, com a data de hoje); reativar exige estoque."""
+        with self.transaction():
+            if active:
+                row = self.conn.execute("SELECT stock FROM vehicles WHERE id = ?", (vehicle_id,)).fetchone()
+                if row is not None and row[0] == 0:
+                    raise ValidationError("Não é possível reativar um veículo com Estoque 0. Ajuste o estoque antes.")
+            sale_date = None if active else datetime.now().strftime("%Y-%m-%d")
+            self.conn.execute("UPDATE vehicles SET is_active = ?, sale_date_only = ? WHERE id = ?", (int(active), sale_date, vehicle_id))
+
+
+# --- CLIENTES E VENDEDORES ---
+
+PEOPLE_TABLES = ("customers", "sellers")
+
+
+def people_listing(table):
+    return Listing(table, f"SELECT id, name, phone, email, is_active FROM {table}", "name ASC, id", Person)
+
+
+class PeopleService(Service):
+    """Cadastro de clientes (table='customers') ou vendedores (table='sellers')."""
+
+    DUPLICATE_MESSAGES = {
+        "customers": "Email já cadastrado.",
+        "sellers": "Email já cadastrado para outro Vendedor.",
+    }
+
+    def __init__(self, table, conn=None):
+        if table not in PEOPLE_TABLES:
+            raise ValueError(f"Cadastro desconhecido: {table}")
+        super().__init__(conn)
+        self.table = table
+        self.listing = people_listing(table)
+
+    def add(self, name, phone, email):
+        """Valida e cadastra (ativo por padrão); retorna a Person gravada."""
+        row = validate_person(name, phone, email)
+        try:
+            with self.transaction():
+                cursor = self.conn.execute(f"INSERT INTO {self.table} (name, phone, email) VALUES (?, ?, ?)", row)
+        except sqlite3.IntegrityError:
+            raise DuplicateError(self.DUPLICATE_MESSAGES[self.table])
+        return Person(cursor.lastrowid, *row, 1)
+
+    def set_active(self, person_id, active):
+        with self.transaction():
+            self.conn.execute(f"UPDATE {self.table} SET is_active = ? WHERE id = ?", (int(active), person_id))
+
+
+# --- VENDAS ---
+
+# Vendas guardam apenas chaves (veículo, cliente, vendedor); os nomes entram só na exibição
+VEHICLE_INFO_SQL = "printf('%s %s %s/%s', v.make, v.model, v.manufacture_year, v.model_year)"
+SALES_DISPLAY_FROM = """
+    FROM sales s
+    LEFT JOIN vehicles v ON v.id = s.vehicle_id
+    LEFT JOIN customers c ON c.id = s.customer_id
+    LEFT JOIN sellers se ON se.id = s.seller_id
+"""
+
+# Histórico de vendas com os nomes resolvidos pelas chaves (a primeira coluna é o rowid),
+# paginado pela chave (sale_ts, id) sobre idx_sales_sale_ts
+SALES_LISTING = Listing(
+    "sales",
+    f"SELECT s.id, s.sale_ts, {VEHICLE_INFO_SQL}, c.name, se.name, s.final_price_cents, s.quantity {SALES_DISPLAY_FROM}",
+    "s.sale_ts DESC, s.id DESC",
+    Sale,
+    id_column="s.id",
+    after_sql="(s.sale_ts, s.id) < (?, ?)",
+)
+# Vendas buscadas por página no histórico
+SALES_HISTORY_PAGE_SIZE = 200
+
+# Baixa de :quantity unidades numa única instrução: só se houver estoque e cliente e vendedor
+# estiverem ativos; ao chegar a zero o veículo é inativado com a data da venda.
+# Nas expressões do SET, stock é o valor anterior à baixa.
+SALE_STOCK_SQL = """
+    UPDATE vehicles
+    SET stock = stock - :quantity,
+        is_active = CASE WHEN stock = :quantity THEN 0 ELSE is_active END,
+        sale_date_only = CASE WHEN stock = :quantity THEN :sale_date ELSE sale_date_only END
+    WHERE id = :vehicle_id AND is_active = 1 AND stock >= :quantity
+      AND EXISTS (SELECT 1 FROM customers WHERE id = :customer_id AND is_active = 1)
+      AND EXISTS (SELECT 1 FROM sellers WHERE id = :seller_id AND is_active = 1)
+    RETURNING stock, (SELECT name FROM sellers WHERE id = :seller_id)
+"""
+SALE_INSERT_SQL = """
+    INSERT INTO sales (vehicle_id, customer_id, seller_id, final_price_cents, quantity, sale_ts, sale_day)
+    VALUES (:vehicle_id, :customer_id, :seller_id, :final_price_cents, :quantity, :sale_ts, :sale_day)
+"""
+# Cliente ativo, nome do vendedor ativo (None quando não puderem vender/comprar) e se o veículo foi
+# retirado de venda com estoque (inativado manualmente; um veículo esgotado é inativado com estoque 0)
+SALE_PARTIES_SQL = """
+    SELECT (SELECT is_active FROM customers WHERE id = ?), (SELECT name FROM sellers WHERE id = ? AND is_active = 1),
+           (SELECT is_active = 0 AND stock > 0 FROM vehicles WHERE id = ?)
+"""
+
+
+class SalesService(Service):
+    """Registro de vendas."""
+
+    def register_sale(self, vehicle_id, customer_id, seller_id, final_price_cents):
+        """Grava a venda e baixa uma unidade do estoque numa única transação.
+
+        A transação começa com o lock de escrita (BEGIN IMMEDIATE) e tem duas
+        instruções: a baixa condicional com RETURNING (SALE_STOCK_SQL) e o INSERT
+        da venda. Duas mesas vendendo a última unidade nunca passam as duas.
+        Levanta ValidationError se o preço, o cliente, o vendedor ou o veículo
+        (inativo) não forem válidos e OutOfStockError se não houver estoque; nesses casos nada é gravado.
+        """
+        if final_price_cents <= 0:
+            raise ValidationError("Preço de venda final inválido.")
+        params = self._sale_params(customer_id, seller_id)
+        params.update(vehicle_id=vehicle_id, quantity=1, final_price_cents=final_price_cents)
+        with self.transaction():
+            stock_left, seller_name = self._take_stock(params)
+            sale_id = self.conn.execute(SALE_INSERT_SQL, params).lastrowid
+        return SaleReceipt(sale_id, seller_name, stock_left)
+
+    def register_cart(self, customer_id, seller_id, lines):
+        """Grava todas as unidades do carrinho (CartLine) numa única transação.
+
+        Cada item baixa o estoque com uma instrução (SALE_STOCK_SQL) e grava uma
+        única linha de venda com a quantidade de unidades (os triggers de versão,
+        busca e resumo diário rodam uma vez por item, não por unidade); um só
+        commit para o carrinho inteiro. Se qualquer item falhar (quantidade ou preço inválidos, estoque
+        insuficiente, cliente ou vendedor inativos) nada é gravado.
+        """
+        if not lines:
+            raise ValidationError("O carrinho está vazio.")
+        for line in lines:
+            if line.quantity <= 0:
+                raise ValidationError("Quantidade inválida.")
+            if line.unit_price_cents <= 0:
+                raise ValidationError("Preço de venda final inválido.")
+        params = self._sale_params(customer_id, seller_id)
+        sold_out = []
+        with self.transaction():
+            for line in lines:
+                params.update(vehicle_id=line.vehicle_id, quantity=line.quantity, final_price_cents=line.unit_price_cents)
+                try:
+                    stock_left, seller_name = self._take_stock(params)
+                except OutOfStockError:
+                    # Aponta o item do carrinho que não pôde ser atendido
+                    vehicle_info, stock = self.conn.execute(
+                        f"SELECT {VEHICLE_INFO_SQL}, v.stock FROM vehicles v WHERE v.id = ?", (line.vehicle_id,)
+                    ).fetchone() or ("veículo removido", 0)
+                    raise OutOfStockError(
+                        f"Estoque insuficiente para {vehicle_info}: {line.quantity} unidade(s) pedida(s), {stock} disponível(is)."
+                    ) from None
+                if stock_left == 0:
+                    sold_out.append(line.vehicle_id)
+                self.conn.execute(SALE_INSERT_SQL, params)
+        return CartReceipt(
+            sum(line.quantity for line in lines),
+            sum(line.quantity * line.unit_price_cents for line in lines),
+            seller_name, sold_out
+        )
+
+    @staticmethod
+    def _sale_params(customer_id, seller_id):
+        # Data em epoch (segundos) e chave inteira do dia local (AAAAMMDD)
+        now = datetime.now()
+        return {
+            "customer_id": customer_id, "seller_id": seller_id, "sale_date": now.strftime("%Y-%m-%d"),
+            "sale_ts": int(now.timestamp()), "sale_day": int(now.strftime("%Y%m%d")),
+        }
+
+    def _take_stock(self, params):
+        """Baixa o estoque (dentro da transação); retorna (estoque restante, nome do vendedor)."""
+        updated = self.conn.execute(SALE_STOCK_SQL, params).fetchall()
+        if not updated:
+            # Nada baixado: descobre o motivo (só neste caminho, fora do caso comum)
+            customer_active, seller_name, vehicle_withdrawn = self.conn.execute(
+                SALE_PARTIES_SQL, (params["customer_id"], params["seller_id"], params["vehicle_id"])
+            ).fetchone()
+            if not customer_active or seller_name is None:
+                raise ValidationError("Cliente ou vendedor selecionado não é válido.")
+            if vehicle_withdrawn:
+                raise ValidationError("Veículo inativo não pode ser vendido.")
+            # Esgotado (outro terminal pode ter vendido a última unidade) ou estoque menor que o pedido
+            raise OutOfStockError("Estoque insuficiente para este veículo.")
+        return updated[0]
+
+
+# --- RELATÓRIOS E ANÁLISE GRÁFICA ---
+
+# Status e data de venda projetados no próprio SQL (a data só aparece para vendidos)
+INVENTORY_REPORT_SELECT = """
+    SELECT id, make, model, manufacture_year, model_year, color, sale_price_cents / 100.0, stock,
+           CASE WHEN is_active THEN 'Disponível' ELSE 'Vendido' END,
+           CASE WHEN is_active THEN '' ELSE COALESCE(sale_date_only, '') END
+    FROM vehicles
+"""
+
+
+def inventory_report_query(threshold, include_inactive):
+    """Monta o SQL do relatório de estoque com todos os filtros como predicados indexáveis."""
+    conditions = ["stock <= ?"]
+    params = [threshold]
+    if not include_inactive:
+        # Usa idx_vehicles_active_stock (busca por is_active e faixa de estoque, já ordenada)
+        conditions.append("is_active = 1")
+    return f"{INVENTORY_REPORT_SELECT} WHERE {' AND '.join(conditions)} ORDER BY stock ASC", params
+
+
+def sales_report_query(start_ts, end_ts):
+    """SQL do relatório de vendas de um período (faixa de epoch, usa idx_sales_sale_ts)."""
+    query = f"""
+        SELECT datetime(s.sale_ts, 'unixepoch', 'localtime'), {VEHICLE_INFO_SQL}, c.name, se.name,
+               s.quantity, s.quantity * s.final_price_cents / 100.0
+        {SALES_DISPLAY_FROM}
+        WHERE s.sale_ts BETWEEN ? AND ?
+        ORDER BY s.sale_ts DESC
+    """
+    return query, (start_ts, end_ts)
+
+
+# Totais por dia, vendedor e marca lidos do resumo diário (sales_daily)
+SALES_SUMMARY_REPORT_SQL = """
+    SELECT printf('%04d-%02d-%02d', d.day / 10000, d.day / 100 % 100, d.day % 100),
+           COALESCE(se.name, 'N/A'), d.make, d.sale_count, d.revenue_cents / 100.0
+    FROM sales_daily d
+    LEFT JOIN sellers se ON se.id = d.seller_id
+    WHERE d.day BETWEEN ? AND ?
+    ORDER BY d.day DESC, se.name, d.make
+"""
+
+
+# Rótulo do período de cada dia do resumo (AAAAMMDD) por granularidade; a ordem dos rótulos é a cronológica
+_DAY_DATE_SQL = "printf('%04d-%02d-%02d', d.day / 10000, d.day / 100 % 100, d.day % 100)"
+ANALYTICS_PERIODS = {
+    "day": _DAY_DATE_SQL,
+    "week": f"date({_DAY_DATE_SQL}, 'weekday 0', '-6 days')",  # segunda-feira da semana
+    "month": "printf('%04d-%02d', d.day / 10000, d.day / 100 % 100)",
+    "quarter": "printf('%04d-T%d', d.day / 10000, (d.day / 100 % 100 + 2) / 3)",
+}
+# Máximo de pontos do gráfico de vendas por período (os mais recentes)
+ANALYTICS_MAX_PERIODS = 400
+# Marcas no gráfico de estoque (as de maior estoque) e faixas do histograma de preços
+ANALYTICS_TOP_MAKES = 20
+ANALYTICS_TOP_SELLERS = 5
+PRICE_BINS = 10
+
+
+def analytics_daily_filter(filters):
+    """Predicados sobre sales_daily (alias d) para os filtros da análise; retorna (WHERE, parâmetros)."""
+    conditions, params = [], []
+    if filters.start_day is not None:
+        # Faixa de dias usa a chave primária (day, seller_id, make)
+        conditions.append("d.day >= ?")
+        params.append(filters.start_day)
+    if filters.end_day is not None:
+        conditions.append("d.day <= ?")
+        params.append(filters.end_day)
+    if filters.make:
+        conditions.append("d.make = ?")
+        params.append(filters.make)
+    if filters.seller_id is not None:
+        conditions.append("d.seller_id = ?")
+        params.append(filters.seller_id)
+    return (f"WHERE {' AND '.join(conditions)}" if conditions else ""), params
+
+
+def analytics_stock_filter(filters):
+    """Predicados sobre os veículos disponíveis (o estoque é o atual: só o filtro de marca se aplica)."""
+    if filters.make:
+        return "WHERE is_active = 1 AND make = ?", [filters.make]
+    return "WHERE is_active = 1", []
+
+
+class ReportService(Service):
+    """Relatórios exportados e dados da análise gráfica (somente leitura).
+
+    Os relatórios retornam o cursor, lido sob demanda pela exportação (exports.py).
+    """
+
+    def inventory_report(self, threshold, include_inactive):
+        return self.conn.execute(*inventory_report_query(threshold, include_inactive))
+
+    def sales_report(self, start_ts, end_ts):
+        return self.conn.execute(*sales_report_query(start_ts, end_ts))
+
+    def sales_summary(self, start_day, end_day):
+        return self.conn.execute(SALES_SUMMARY_REPORT_SQL, (start_day, end_day))
+
+    def sales_page(self, start_ts, end_ts, after=None, page_size=REPORT_PAGE_SIZE):
+        """Vendas do período, mais recentes primeiro, após after = (sale_ts, id)."""
+        if after is None:
+            after = (end_ts + 1, 0)
+        return list(map(Sale._make, self.conn.execute(
+            f"{SALES_LISTING.select_sql} WHERE s.sale_ts BETWEEN ? AND ? AND {SALES_LISTING.after_sql} "
+            f"ORDER BY {SALES_LISTING.order_sql} LIMIT ?",
+            (start_ts, end_ts, *after, page_size)
+        )))
+
+    def low_stock_page(self, threshold, after=None, page_size=REPORT_PAGE_SIZE):
+        """Veículos ativos com estoque <= threshold, do menor estoque para o maior, após after = (stock, id)."""
+        after = after or (-1, 0)
+        return list(map(Vehicle._make, self.conn.execute(
+            f"SELECT {INVENTORY_COLUMNS} FROM vehicles WHERE is_active = 1 AND stock <= ? AND (stock, id) > (?, ?) "
+            f"ORDER BY stock, id LIMIT ?",
+            (threshold, *after, page_size)
+        )))
+
+    def daily_totals(self, start_day, end_day):
+        """Totais por dia do período, lidos do resumo diário (sales_daily)."""
+        return list(map(DailyTotal._make, self.conn.execute(
+            "SELECT day, SUM(sale_count), SUM(revenue_cents) FROM sales_daily WHERE day BETWEEN ? AND ? GROUP BY day ORDER BY day",
+            (start_day, end_day)
+        )))
+
+    def analytics_version(self):
+        """Versões das tabelas lidas por analytics_data (o resumo diário muda junto com sales)."""
+        return table_versions(self.conn, "sales", "vehicles", "sellers")
+
+    def analytics_data(self, filters=AnalyticsFilter()):
+        """Dados dos gráficos agregados no SQL (GROUP BY/LIMIT); só linhas do tamanho do gráfico voltam ao Python.
+
+        As vendas vêm do resumo diário (custo proporcional aos dias, não às vendas).
+        """
+        period = ANALYTICS_PERIODS.get(filters.granularity)
+        if period is None:
+            raise ValidationError(f"Granularidade inválida: {filters.granularity}")
+        where, params = analytics_daily_filter(filters)
+        # Soma por dia na ordem da chave primária (sem ordenação) e só então por período;
+        # os períodos mais recentes, devolvidos em ordem cronológica
+        sales_by_period = self.conn.execute(f"""
+            SELECT label, total FROM (
+                SELECT {period} AS label, SUM(d.total) AS total
+                FROM (SELECT d.day, SUM(d.sale_count) AS total FROM sales_daily d {where} GROUP BY d.day) d
+                GROUP BY label ORDER BY label DESC LIMIT ?
+            ) ORDER BY label
+        """, (*params, ANALYTICS_MAX_PERIODS)).fetchall()
+        # Agrupa por vendedor pelo índice idx_sales_daily_seller; os nomes só das linhas do LIMIT
+        sales_by_seller = self.conn.execute(f"""
+            SELECT COALESCE(se.name, 'N/A'), t.total
+            FROM (SELECT d.seller_id, SUM(d.sale_count) AS total FROM sales_daily d {where}
+                  GROUP BY d.seller_id ORDER BY total DESC LIMIT ?) t
+            LEFT JOIN sellers se ON se.id = t.seller_id
+            ORDER BY t.total DESC
+        """, (*params, ANALYTICS_TOP_SELLERS)).fetchall()
+
+        # Estoque disponível: unidades por marca e histograma de preços (faixas calculadas no SQL)
+        where, params = analytics_stock_filter(filters)
+        stock_by_make = self.conn.execute(
+            f"SELECT make, SUM(stock) AS total FROM vehicles {where} GROUP BY make ORDER BY total DESC LIMIT ?",
+            (*params, ANALYTICS_TOP_MAKES)
+        ).fetchall()
+        low, high, distinct = self.conn.execute(
+            f"SELECT MIN(sale_price_cents), MAX(sale_price_cents), COUNT(DISTINCT sale_price_cents) FROM vehicles {where}", params
+        ).fetchone()
+        price_bins = []
+        if distinct:
+            bins = min(PRICE_BINS, distinct)
+            width = max(high - low, 1) / bins
+            counts = dict(self.conn.execute(
+                f"SELECT MIN(CAST((sale_price_cents - ?) / ? AS INTEGER), ? - 1) AS bin, COUNT(*) FROM vehicles {where} GROUP BY bin",
+                (low, width, bins, *params)
+            ).fetchall())
+            price_bins = [((low + i * width) / 100, (low + (i + 1) * width) / 100, counts.get(i, 0)) for i in range(bins)]
+        return AnalyticsData(sales_by_period, sales_by_seller, stock_by_make, price_bins)
+
+
+# --- USUÁRIOS ---
+
+USERS_LISTING = Listing("users", "SELECT id, username, name, role FROM users", "role DESC, username ASC", User)
+
+DEFAULT_ADMIN = ("admin", "admin", "Administrador Principal")
+
+
+def hash_password(password):
+    """Gera um hash SHA256 para a senha com um salt simples."""
+    # Usar um salt constante para simplificar a demonstração no ambiente Tkinter/SQLite
+    salt = "loja_veiculos_salt"
+    hashed = hashlib.sha256((password + salt).encode('utf-8')).hexdigest()
+    return hashed
+
+
+class UserService(Service):
+    """Usuários do sistema e autenticação."""
+
+    def setup(self):
+        """Aplica as migrações e cria o Admin padrão se ele não existir; True se criou."""
+        migrate(self.conn)
+        username, password, name = DEFAULT_ADMIN
+        with self.transaction():
+            if self.conn.execute("SELECT 1 FROM users WHERE username = ?", (username,)).fetchone():
+                return False
+            self.conn.execute(
+                "INSERT INTO users (username, hashed_password, role, name) VALUES (?, ?, ?, ?)",
+                (username, hash_password(password), 'Admin', name)
+            )
+        return True
+
+    def authenticate(self, username, password):
+        """Retorna o User se usuário e senha conferem, senão None."""
+        row = self.conn.execute(
+            "SELECT id, username, name, role, hashed_password FROM users WHERE username = ?", (username,)
+        ).fetchone()
+        if row is None or row[4] != hash_password(password):
+            return None
+        return User._make(row[:4])
+
+    def add_user(self, username, name, password):
+        """Cadastra um usuário com perfil 'Usuário' e retorna o User gravado."""
+        username = username.strip()
+        name = name.strip().title()
+        password = password.strip()
+        if not username or not password or not name:
+            raise ValidationError("Todos os campos de cadastro são obrigatórios.")
+        try:
+            with self.transaction():
+                cursor = self.conn.execute(
+                    "INSERT INTO users (username, hashed_password, role, name) VALUES (?, ?, ?, ?)",
+                    (username, hash_password(password), 'Usuário', name)
+                )
+        except sqlite3.IntegrityError:
+            raise DuplicateError("Nome de usuário já existe. Escolha outro.")
+        return User(cursor.lastrowid, username, name, 'Usuário')
@@ -0,0 +1,86 @@
+"""Regras de validação dos cadastros, compartilhadas pelos formulários e pela importação em lote.
+
+As funções recebem os valores como digitados (texto) ou lidos de planilhas
+(texto ou número) e retornam a tupla pronta para o INSERT, ou levantam
+ValidationError com a mensagem exibida ao usuário.
+"""
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+
+# Ano mais antigo aceito para fabricação/modelo (o mais novo é o ano seguinte ao atual)
+MIN_VEHICLE_YEAR = 1900
+
+
+class ValidationError(ValueError):
+    """Valor inválido num cadastro; a mensagem é exibida ao usuário."""
+
+
+def parse_money(text):
+    """Converte um valor digitado ('48000,50') em centavos inteiros, sem passar por float."""
+    try:
+        value = Decimal(str(text).strip().replace(',', '.'))
+        return int((value * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+    except (ArithmeticError, ValueError):
+        raise ValidationError(f"Valor monetário inválido: {text}")
+
+
+def _text(value):
+    return "" if value is None else str(value).strip()
+
+
+def _parse_int(value, field):
+    """Inteiro digitado ou lido de planilha (o Excel pode entregar 2020.0)."""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    try:
+        return int(_text(value))
+    except ValueError:
+        raise ValidationError(f"{field} deve ser um número inteiro: {value}")
+
+
+def _required(values):
+    missing = [field for field, value in values if not _text(value)]
+    if missing:
+        raise ValidationError(f"Campos obrigatórios não preenchidos: {', '.join(missing)}.")
+
+
+def load_known_models(conn):
+    """Pares (marca, modelo) cadastrados nos Parâmetros."""
+    return set(conn.execute("SELECT make_name, model_name FROM models"))
+
+
+def validate_vehicle(make, model, manufacture_year, model_year, color, price, stock, known_models, current_year=None):
+    """Valida um veículo e retorna (make, model, manufacture_year, model_year, color, sale_price_cents, stock).
+
+    Marca/modelo devem estar em known_models (load_known_models ou catalog.Catalog); os anos
+    vão de MIN_VEHICLE_YEAR ao ano seguinte ao atual, com fabricação até o ano
+    modelo; preço maior que zero e estoque não negativo.
+    """
+    _required([("Marca", make), ("Modelo", model), ("Ano Fabricação", manufacture_year),
+               ("Ano Modelo", model_year), ("Preço", price), ("Estoque", stock)])
+    make = _text(make)
+    model = _text(model)
+    if (make, model) not in known_models:
+        raise ValidationError(f"Modelo não cadastrado nos Parâmetros: {make} {model}.")
+
+    manufacture_year = _parse_int(manufacture_year, "Ano Fabricação")
+    model_year = _parse_int(model_year, "Ano Modelo")
+    price = parse_money(price)
+    stock = _parse_int(stock, "Estoque")
+    max_year = (current_year or datetime.now().year) + 1
+    for field, year in (("Ano Fabricação", manufacture_year), ("Ano Modelo", model_year)):
+        if year < MIN_VEHICLE_YEAR or year > max_year:
+            raise ValidationError(f"{field} deve estar entre {MIN_VEHICLE_YEAR} e {max_year}.")
+    if manufacture_year > model_year:
+        raise ValidationError("O Ano de Fabricação não pode ser maior que o Ano Modelo.")
+    if price <= 0:
+        raise ValidationError("O Preço deve ser maior que zero.")
+    if stock < 0:
+        raise ValidationError("O Estoque não pode ser negativo.")
+    return make, model, manufacture_year, model_year, _text(color), price, stock
+
+
+def validate_person(name, phone, email):
+    """Valida um cliente/vendedor e retorna (name, phone, email); nome e email são obrigatórios."""
+    _required([("Nome", name), ("Email", email)])
+    return _text(name).title(), _text(phone), _text(email)
@@ -0,0 +1,127 @@
+"""Widgets Tk reutilizados pelas abas da aplicação."""
+import tkinter as tk
+from tkinter import ttk
+
+# Itens visíveis na lista de sugestões
+SUGGESTION_ROWS = 8
+
+
+class SearchEntry(ttk.Frame):
+    """Campo de busca com sugestões enquanto se digita (type-ahead).
+
+    search(texto, entregar) deve buscar os itens e chamar entregar([(chave, rótulo), ...]),
+    possivelmente mais tarde (ex.: pela thread de consultas); respostas de buscas
+    antigas são ignoradas. Nada é carregado antes de o usuário digitar. O item
+    escolhido fica em selected_key/selected_label e é avisado por on_select(chave, rótulo).
+    """
+
+    def __init__(self, master, search, width=40, on_select=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.search = search
+        self.on_select = on_select
+        self.selected_key = None
+        self.selected_label = None
+        self.results = []
+        self._request = 0
+
+        self.text_var = tk.StringVar()
+        self.entry = ttk.Entry(self, width=width, textvariable=self.text_var)
+        self.entry.pack(fill='x', expand=True)
+        self.entry.bind("<KeyRelease>", self._on_key)
+        self.entry.bind("<Down>", self._focus_list)
+        self.entry.bind("<Return>", self._choose_first)
+        self.entry.bind("<Escape>", lambda event: self.hide())
+        self.entry.bind("<FocusOut>", self._on_focus_out)
+
+        # Lista de sugestões numa janela sem borda posicionada logo abaixo do campo
+        self.popup = tk.Toplevel(self)
+        self.popup.withdraw()
+        self.popup.overrideredirect(True)
+        self.listbox = tk.Listbox(self.popup, height=SUGGESTION_ROWS, exportselection=False)
+        self.listbox.pack(fill='both', expand=True)
+        self.listbox.bind("<ButtonRelease-1>", self._choose_current)
+        self.listbox.bind("<Return>", self._choose_current)
+        self.listbox.bind("<Escape>", lambda event: (self.hide(), self.entry.focus_set()))
+        self.listbox.bind("<FocusOut>", self._on_focus_out)
+
+    def clear(self):
+        """Limpa o texto e a seleção."""
+        self.text_var.set("")
+        self.selected_key = None
+        self.selected_label = None
+        self.hide()
+
+    def hide(self):
+        self.popup.withdraw()
+
+    def _on_key(self, event):
+        if event.keysym in ("Down", "Up", "Return", "Escape", "Tab"):
+            return
+        text = self.text_var.get()
+        # Texto editado depois da escolha invalida a seleção
+        if text != self.selected_label:
+            self.selected_key = None
+            self.selected_label = None
+        if not text.strip():
+            self.hide()
+            return
+        self._request += 1
+        request = self._request
+        self.search(text, lambda results: self._show(request, results))
+
+    def _show(self, request, results):
+        if request != self._request or not self.winfo_exists():
+            return
+        self.results = results
+        self.listbox.delete(0, 'end')
+        for _, label in results:
+            self.listbox.insert('end', label)
+        if not results:
+            self.hide()
+            return
+        self.listbox.config(height=min(len(results), SUGGESTION_ROWS))
+        self.popup.geometry(f"{self.entry.winfo_width()}x{self.listbox.winfo_reqheight()}"
+                            f"+{self.entry.winfo_rootx()}+{self.entry.winfo_rooty() + self.entry.winfo_height()}")
+        self.popup.deiconify()
+        self.popup.lift()
+
+    def _focus_list(self, event):
+        if self.results and self.popup.winfo_viewable():
+            self.listbox.focus_set()
+            self.listbox.selection_clear(0, 'end')
+            self.listbox.selection_set(0)
+            self.listbox.activate(0)
+        return "break"
+
+    def _choose_first(self, event):
+        if self.results and self.popup.winfo_viewable():
+            self._choose(0)
+        return "break"
+
+    def _choose_current(self, event):
+        selection = self.listbox.curselection()
+        if selection:
+            self._choose(selection[0])
+        return "break"
+
+    def _choose(self, index):
+        key, label = self.results[index]
+        self.selected_key = key
+        self.selected_label = label
+        self.text_var.set(label)
+        self.entry.icursor('end')
+        self.hide()
+        self.entry.focus_set()
+        if self.on_select is not None:
+            self.on_select(key, label)
+
+    def _on_focus_out(self, event):
+        # Aguarda o foco assentar: clicar na lista tira o foco do campo momentaneamente
+        self.after(100, self._hide_if_unfocused)
+
+    def _hide_if_unfocused(self):
+        if not self.winfo_exists():
+            return
+        focus = self.focus_get()
+        if focus not in (self.entry, self.listbox):
+            self.hide()